@@ -1,9 +1,24 @@
 """Init module for rbkcli"""
 
-from rbkcli.interface.rbk_cli import RbkCli
-from rbkcli.core.handlers.customizer import RbkCliBlackOps
-from rbkcli.base import RbkcliException
+import importlib
 
 __version__ = '1.0.0-beta.3'
 __author__ = 'Bruno Giovanini Manesco'
-__all__ = [RbkCli, RbkCliBlackOps, RbkcliException]
+__all__ = ['RbkCli', 'RbkCliBlackOps', 'RbkcliException']
+
+# Public objects are only imported when accessed, so importing the package
+# does not load the whole CLI and its dependencies.
+_LAZY_IMPORTS = {
+    'RbkCli': 'rbkcli.interface.rbk_cli',
+    'RbkCliBlackOps': 'rbkcli.core.handlers.customizer',
+    'RbkcliException': 'rbkcli.base',
+}
+
+
+def __getattr__(name):
+    """Import the public object requested on first access."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError("module 'rbkcli' has no attribute '%s'" % name)
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
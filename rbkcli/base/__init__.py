@@ -2,12 +2,11 @@
 from __future__ import print_function
 
 import os
-from logging import ERROR, WARNING
 
 from .api import ApiRequester, RubrikApiHandler
 from .essentials import CONSTANTS, DotDict, RbkcliException
 from .jsops import DynaTable, RbkcliJsonOps
-from .tools import RbkcliLogger, RbkcliTools
+from .tools import CONFIG_PROVIDER, RbkcliLogger, RbkcliTools
 
 try:
     PermissionError
@@ -84,10 +83,8 @@ class RbkcliBase:
     def verify_loglevel(self):
         """Update log level in case config was changed."""
         new_log_level = self.conf_dict['config']['logLevel']['value']
-        if new_log_level == 'error':
-            self.rbkcli_logger.logger.setLevel(ERROR)
-        elif new_log_level == 'warning':
-            self.rbkcli_logger.logger.setLevel(WARNING)
+        module_levels = CONFIG_PROVIDER.value('moduleLogLevel', {})
+        self.rbkcli_logger.set_levels(new_log_level, module_levels)
 
     @staticmethod
     def create_base_folder(base_folder):
@@ -1,14 +1,250 @@
 """API base class for rbkcli."""
 
+import asyncio
 import base64
+import email.utils
+import hashlib
+import hmac
 import json
+import os
+import random
 import sys
+import threading
+import time
+from urllib.parse import quote
 
-import requests
-import urllib3
-
+from rbkcli.base.engine import aiohttp_module, http_client
 from rbkcli.base.essentials import CONSTANTS, DotDict, RbkcliException
-from rbkcli.base.tools import RbkcliTools
+from rbkcli.base.tools import (CONFIG_PROVIDER, RbkcliTools, file_lock,
+                               write_file)
+
+
+# Keep-alive sessions per target server, shared by every requester.
+SESSIONS = {}
+SESSIONS_LOCK = threading.Lock()
+
+
+def get_session(server):
+    """Return the keep-alive session of the server, created on first use."""
+    with SESSIONS_LOCK:
+        if server not in SESSIONS:
+            import requests
+            size = int(conf_number('httpPoolSize', 4))
+            session = requests.Session()
+            session.mount('https://', requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=max(size, 1)))
+            SESSIONS[server] = session
+        return SESSIONS[server]
+
+
+class TokenCache:
+    """
+    Session tokens acquired with username and password, per target.
+
+    Tokens are stored in conf/token_cache.json, only readable by the user,
+    keyed by a digest of the server and username. Each token is bound to
+    the password it was acquired with by a salted PBKDF2 hash, a token is
+    only reused with the same password and dropped otherwise. Following
+    commands (in any process) reuse the token instead of authenticating
+    with the password again. Targets without session API (older CDM) are
+    recorded with a empty token, so username/password is used without
+    requesting a token again for FALLBACK_TTL seconds.
+    """
+
+    FILE_NAME = 'token_cache.json'
+    FALLBACK_TTL = 3600
+    HASH_ROUNDS = 100000
+
+    def __init__(self):
+        """Initialize the passwords verified by this process."""
+        self.verified = {}
+
+    @classmethod
+    def file_path(cls):
+        """Return the path of the cache file."""
+        return CONSTANTS.CONF_FOLDER + '/' + cls.FILE_NAME
+
+    @staticmethod
+    def key(auth):
+        """Return the key of the token for the server and username."""
+        user = '%s:%s' % (auth.server, auth.username)
+        return hashlib.sha256(user.encode('utf-8')).hexdigest()
+
+    def load(self, key, password):
+        """Return the cached token, '' to use username/password or None."""
+        try:
+            tokens = CONFIG_PROVIDER.load_json(self.file_path(),
+                                               self._load_file)
+            entry = tokens[key]
+            if entry['token'] == '':
+                if not 0 <= time.time() - entry['time'] < self.FALLBACK_TTL:
+                    return None
+                return ''
+            if not self._verify(key, entry, password):
+                # Other password (wrong or rotated), authenticate again.
+                self.drop(key, entry['token'])
+                return None
+            return entry['token']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def store(self, key, token, password):
+        """Cache the token for the key, '' if the target has no sessions."""
+        salt = os.urandom(16).hex()
+        entry = {
+            'token': token,
+            'time': time.time(),
+            'salt': salt,
+            'password': self._hash(password, salt)
+        }
+        with file_lock(self.file_path()):
+            tokens = self._read()
+            tokens[key] = entry
+            self._write(tokens)
+        self.verified[key] = (entry['password'], password)
+
+    def _hash(self, password, salt):
+        """Return the salted slow hash of the password."""
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'),
+                                   bytes.fromhex(salt),
+                                   self.HASH_ROUNDS).hex()
+
+    def _verify(self, key, entry, password):
+        """Verify the token was acquired with the password."""
+        # The hash is slow on purpose, it is only computed once per process.
+        if self.verified.get(key) == (entry['password'], password):
+            return True
+        if not hmac.compare_digest(self._hash(password, entry['salt']),
+                                   entry['password']):
+            return False
+        self.verified[key] = (entry['password'], password)
+        return True
+
+    def drop(self, key, token):
+        """Remove the rejected token, unless it was already replaced."""
+        with file_lock(self.file_path()):
+            tokens = self._read()
+            if tokens.get(key, {}).get('token') == token:
+                del tokens[key]
+                self._write(tokens)
+
+    @staticmethod
+    def _load_file(file):
+        """Load the cache file."""
+        with open(file, 'r') as json_file:
+            return json.load(json_file)
+
+    def _read(self):
+        """Read the current cache file, while locked."""
+        try:
+            tokens = self._load_file(self.file_path())
+            if isinstance(tokens, dict):
+                return tokens
+        except (IOError, OSError, ValueError):
+            pass
+        return {}
+
+    def _write(self, tokens):
+        """Write the cache file, only readable by the user."""
+        write_file(self.file_path(), json.dumps(tokens, sort_keys=True),
+                   perms=0o600)
+        CONFIG_PROVIDER.invalidate(self.file_path())
+
+
+TOKEN_CACHE = TokenCache()
+
+# Requests retried on transient errors, only if the method is idempotent.
+IDEMPOTENT_METHODS = ('get', 'head', 'options', 'put', 'delete')
+RETRY_STATUS = (429, 502, 503, 504)
+
+
+def transient_errors():
+    """
+    Return the errors of requests that failed but can be sent again.
+
+    Connections refused, reset or timed out, and responses cut short while
+    their body was read (connection dropped by a proxy or a node).
+    """
+    import requests
+    import urllib3
+    return (requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+            urllib3.exceptions.ProtocolError)
+
+# Time limit of the running command, every request made by it (loops and
+# scripts included) has to finish before it. Zero means no limit.
+DEADLINE = {'time': 0, 'seconds': 0}
+
+
+def start_deadline():
+    """Start the deadline of a new command (commandDeadline seconds)."""
+    seconds = conf_number('commandDeadline', 0)
+    DEADLINE['seconds'] = seconds
+    DEADLINE['time'] = 0
+    if seconds > 0:
+        DEADLINE['time'] = time.time() + seconds
+
+
+def remaining_time():
+    """Return the seconds left until the deadline, or None if unlimited."""
+    if DEADLINE['time'] == 0:
+        return None
+    return DEADLINE['time'] - time.time()
+
+
+def conf_number(key, default):
+    """Return the numeric value of a configuration key, or the default."""
+    try:
+        return float(CONFIG_PROVIDER.value(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Query parameters used to page results, in order of preference.
+PAGING_STYLES = ('cursor', 'after_id', 'offset')
+
+
+def set_query(endpoint, key, value):
+    """Set the query parameter of the endpoint, replacing existing ones."""
+    path, _, query = endpoint.partition('?')
+    query = [field for field in query.split('&')
+             if field != '' and field.split('=')[0] != key]
+    query.append('%s=%s' % (key, quote(str(value), safe='')))
+    return path + '?' + '&'.join(query)
+
+
+def next_page(style, endpoint, text):
+    """Return the endpoint of the page after the results, or ''."""
+    try:
+        page = json.loads(text)
+        data = page['data']
+    except (ValueError, KeyError, TypeError):
+        return ''
+    if not isinstance(data, list) or data == []:
+        return ''
+    if page.get('hasMore') is False:
+        return ''
+
+    try:
+        if style == 'cursor' and page.get('nextCursor'):
+            return set_query(endpoint, 'cursor', page['nextCursor'])
+        if style == 'after_id' and page.get('hasMore'):
+            return set_query(endpoint, 'after_id', data[-1]['id'])
+        if style == 'offset':
+            offset = 0
+            query = endpoint.partition('?')[2]
+            for field in query.split('&'):
+                if field.startswith('offset='):
+                    offset = int(field[7:])
+            offset = offset + len(data)
+            # Without hasMore, the total amount tells if there are more.
+            if page.get('hasMore') or offset < page.get('total', 0):
+                return set_query(endpoint, 'offset', offset)
+    except (KeyError, TypeError, ValueError):
+        pass
+
+    return ''
 
 
 class ApiRequester:
@@ -18,7 +254,6 @@ class ApiRequester:
     DEFAULT_URL = '/api'
     PORT = ''
     VERIFICATION = False
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     class Decorators:
         """Decorators that share the ApiHandlers variables."""
@@ -29,11 +264,13 @@ class ApiRequester:
             def verify_auth(self, *args, **kwargs):
                 """Verify server, username and password by calling fn."""
                 # These verification should be added before any-
-                # authentication is performed.
-                tmp_tools = RbkcliTools(self.logger,
-                                        conf_dict=CONSTANTS.CONF_DICT)
-                if not tmp_tools.verify_auth_consistency(self.auth):
-                    self.auth = tmp_tools.load_interactive_auth(self.auth)
+                # authentication is performed, once per set of credentials.
+                if not CONFIG_PROVIDER.is_verified(self.auth):
+                    tmp_tools = RbkcliTools(self.logger,
+                                            conf_dict=CONSTANTS.CONF_DICT)
+                    if not tmp_tools.verify_auth_consistency(self.auth):
+                        self.auth = tmp_tools.load_interactive_auth(self.auth)
+                    CONFIG_PROVIDER.set_verified(self.auth)
 
                 return func(self, *args, **kwargs)
 
@@ -49,32 +286,34 @@ class ApiRequester:
         if auth is None:
             self.auth = {}
         self.url = ''
-        self.api_result = requests.Response()
+        self.api_result = None
         self.user_profile = user_profile
         self.auth_prpt = DotDict()
         self.auth_prpt.type_ = ''
         self.auth_prpt.header = ''
         self.auth_prpt.primary_exception = ''
+        self.auth_prpt.session_token = ''
+        self.auth_prpt.session_retries = 0
         self.python_version = sys.version.split("(")[0].strip()
         self.rbkcli_version = '1.0.0b4'
 
     @Decorators.auth_verifier
     def demand(self, method, endpoint, data=None, params=None):
         """Perform API request with provided data."""
+        # Imported on demand, commands not reaching the API start faster.
+        import requests
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
         self._create_url(endpoint)
         self._create_auth_header()
 
         try:
-            self.api_result = requests.request(method,
-                                               self.url,
-                                               params=params,
-                                               data=data,
-                                               headers=self.auth_prpt.header,
-                                               verify=self.VERIFICATION)
+            self.api_result = self._request(method, data, params)
 
-            self._validate_token_auth(method, endpoint, data={}, params={})
+            self._validate_token_auth(method, endpoint, data, params)
 
-        except requests.exceptions.ConnectionError as error:
+        except transient_errors() as error:
             self.logger.error('ApiRequesterError # ' + str(error))
             raise RbkcliException.ApiRequesterError(str(error))
 
@@ -84,6 +323,150 @@ class ApiRequester:
 
         return self.api_result
 
+    def _request(self, method, data, params):
+        """
+        Send the request, retrying idempotent methods on transient errors.
+
+        Connection errors, timeouts, responses cut short and
+        throttling/unavailable responses (429, 502, 503, 504) are retried up
+        to retryAttempts times, waiting a jittered exponential backoff or the
+        Retry-After of the response, up to retryMaxDelay seconds.
+        """
+        session = get_session(self.auth.server)
+        retries = int(conf_number('retryAttempts', 3))
+        if method.lower() not in IDEMPOTENT_METHODS:
+            retries = 0
+
+        attempt = 0
+        while True:
+            try:
+                result = session.request(method,
+                                         self.url,
+                                         params=params,
+                                         data=data,
+                                         headers=self.auth_prpt.header,
+                                         verify=self.VERIFICATION,
+                                         timeout=self._timeout())
+                if (result.status_code not in RETRY_STATUS or
+                        attempt >= retries):
+                    return result
+                reason = 'status %s' % result.status_code
+                delay = self._backoff(attempt,
+                                      result.headers.get('Retry-After'))
+            except transient_errors() as error:
+                if attempt >= retries:
+                    raise
+                reason = str(error)
+                delay = self._backoff(attempt)
+
+            attempt += 1
+            self.logger.warning('ApiRequester # Request [%s:%s] failed (%s),'
+                                ' retrying in %.1f seconds (%s/%s).', method,
+                                self.url, reason, delay, attempt, retries)
+            time.sleep(delay)
+
+    def _timeout(self):
+        """Return the connect and read timeouts, within the deadline."""
+        connect = conf_number('connectTimeout', 10)
+        read = conf_number('readTimeout', 300)
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                self._deadline_exceeded()
+            connect = min(connect, remaining)
+            read = min(read, remaining)
+
+        return (connect, read)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Return the seconds to wait before retrying the request."""
+        base = conf_number('retryBackoff', 1)
+        delay = random.uniform(0, base * 2 ** attempt)
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                date = email.utils.parsedate_tz(retry_after)
+                if date is not None:
+                    delay = email.utils.mktime_tz(date) - time.time()
+            delay = max(delay, 0) + random.uniform(0, base)
+        delay = min(delay, max(conf_number('retryMaxDelay', 60), 0))
+
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            self._deadline_exceeded()
+
+        return delay
+
+    def _deadline_exceeded(self):
+        """Abort the command, it reached its deadline."""
+        msg = str('Command deadline of %g seconds exceeded.' %
+                  DEADLINE['seconds'])
+        self.logger.error('ApiRequesterError # ' + msg)
+        raise RbkcliException.ApiRequesterError(msg)
+
+    async def demand_async(self, method, endpoint, data=None):
+        """
+        Perform API request with aiohttp, used by the concurrent engine.
+
+        Requests are retried the same way as demand() does. If the token is
+        rejected, the request is done again with demand(), which acquires a
+        new token or falls back to username/password.
+        """
+        aiohttp = aiohttp_module()
+        self._create_url(endpoint)
+        self._create_auth_header()
+        retries = int(conf_number('retryAttempts', 3))
+        if method.lower() not in IDEMPOTENT_METHODS:
+            retries = 0
+
+        attempt = 0
+        while True:
+            connect, read = self._timeout()
+            timeout = aiohttp.ClientTimeout(sock_connect=connect,
+                                            sock_read=read)
+            try:
+                async with http_client().request(
+                        method, self.url, data=data,
+                        headers=self.auth_prpt.header,
+                        timeout=timeout) as response:
+                    result = DotDict({
+                        'text': await response.text(),
+                        'status_code': response.status,
+                        # Case insensitive, as the headers of requests.
+                        'headers': response.headers
+                    })
+                if (result.status_code not in RETRY_STATUS or
+                        attempt >= retries):
+                    break
+                reason = 'status %s' % result.status_code
+                delay = self._backoff(attempt,
+                                      result.headers.get('Retry-After'))
+            # Responses cut short (ClientPayloadError) are ClientErrors too.
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                if attempt >= retries:
+                    self.logger.error('ApiRequesterError # ' + str(error))
+                    raise RbkcliException.ApiRequesterError(str(error))
+                reason = str(error) or type(error).__name__
+                delay = self._backoff(attempt)
+
+            attempt += 1
+            self.logger.warning('ApiRequester # Request [%s:%s] failed (%s),'
+                                ' retrying in %.1f seconds (%s/%s).', method,
+                                self.url, reason, delay, attempt, retries)
+            await asyncio.sleep(delay)
+
+        self.api_result = result
+        if (self.auth_prpt.type_ in ('token', 'session') and
+                (result.text == 'The supplied authentication is invalid' or
+                 result.status_code == 401)):
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, self.demand, method,
+                                              endpoint, data)
+
+        self._validate_token_auth(method, endpoint, data, None)
+        return result
+
     def demand_json(self, method, endpoint, data=None):
         """Call demand method and only return json data."""
         try:
@@ -152,13 +535,89 @@ class ApiRequester:
             msg = msg.strip(' ')
             self.logger.error('%s%s' % ('ApiRequesterError # ', msg))
             raise RbkcliException.ApiRequesterError(msg)
+
+        # With storeToken, the password is only used to acquire a token.
+        if (CONFIG_PROVIDER.value('storeToken', 'False') == 'True' and
+                self.auth_prpt.session_retries < 2):
+            token = self._load_session_token(auth)
+            if token != '':
+                self.auth_prpt.type_ = 'session'
+                auth = 'Bearer ' + token
         return auth
 
+    def _load_session_token(self, basic_auth):
+        """Return the cached session token, or request a new one."""
+        key = TOKEN_CACHE.key(self.auth)
+        token = TOKEN_CACHE.load(key, self.auth.password)
+        if token is None:
+            token = self._request_session_token(basic_auth)
+            if token is None:
+                token = ''
+            else:
+                TOKEN_CACHE.store(key, token, self.auth.password)
+        self.auth_prpt.session_token = token
+        return token
+
+    def _request_session_token(self, basic_auth):
+        """
+        Request a session token with username/password (/v1/session).
+
+        Returns '' if the target has no session API, so username/password
+        keeps being used, or None if the target could not be reached.
+        """
+        url = '%s://%s%s%s/v1/session' % (self.PROTOCOL, self.auth.server,
+                                          self.PORT, self.DEFAULT_URL)
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'User-Agent': "RubrikRbkcli--{}--{}".format(self.rbkcli_version,
+                                                       self.python_version),
+            'Authorization': basic_auth,
+        }
+        try:
+            result = get_session(self.auth.server).request(
+                'POST', url, data='{}', headers=headers,
+                verify=self.VERIFICATION, timeout=self._timeout())
+        except transient_errors() as error:
+            self.logger.warning('ApiRequester # Unable to acquire session '
+                                'token [%s], using username/password.',
+                                error)
+            return None
+
+        # Rejected credentials are not a reason to stop requesting tokens.
+        if result.status_code in (401, 403):
+            self.logger.warning('ApiRequester # Unable to acquire session '
+                                'token [%s], using username/password.',
+                                result.status_code)
+            return None
+
+        try:
+            token = json.loads(result.text)['token']
+        except (ValueError, KeyError, TypeError) as error:
+            self.logger.warning('ApiRequester # Unable to acquire session '
+                                'token [%s], using username/password for '
+                                '%s seconds.', error, TokenCache.FALLBACK_TTL)
+            return ''
+        self.logger.debug('ApiRequester # Acquired session token for '
+                          '[%s].', self.auth.server)
+        return token
+
     def _validate_token_auth(self, method, endpoint, data, params):
         """Validate last token authentication."""
         error_msg = 'The supplied authentication is invalid'
         error_msg2 = '"message":"Incorrect username/password"'
-        if (self.api_result.text == error_msg and
+        if (self.auth_prpt.type_ == 'session' and
+                (self.api_result.text == error_msg or
+                 self.api_result.status_code == 401)):
+            # Cached token expired or was revoked, acquire a new one.
+            TOKEN_CACHE.drop(TOKEN_CACHE.key(self.auth),
+                             self.auth_prpt.session_token)
+            self.auth_prpt.session_retries += 1
+            self.logger.warning('ApiRequester # The session token was '
+                                'rejected, requesting a new one.')
+
+            self.demand(method, endpoint, data, params)
+        elif (self.api_result.text == error_msg and
                 self.auth_prpt.type_ == 'token'):
             error_msg = 'The supplied TOKEN authentication is invalid.'
             self.auth_prpt.primary_exception = error_msg
@@ -175,10 +634,8 @@ class ApiRequester:
             raise RbkcliException.ApiRequesterError(error_msg)
         else:
             # Log successful actions
-            msg = '%s [%s:%s]' % ('ApiRequester # Successfully requested API',
-                                  method,
-                                  self.url)
-            self.logger.debug(msg)
+            self.logger.debug('ApiRequester # Successfully requested API '
+                              '[%s:%s]', method, self.url)
 
 
 class RubrikApiHandler:
@@ -195,6 +652,12 @@ class RubrikApiHandler:
         self.version = version
 
         self.endpoints = {}
+        self.remote = False
+        self.docs_folder = ''
+        self.doc_imported = False
+        self.doc_digest = ''
+        # Returns the documentation already imported with a digest, or None.
+        self.doc_loader = None
         self._assign_methods()
         self.filter_lists = DotDict({})
         self.focus_list = []
@@ -211,6 +674,7 @@ class RubrikApiHandler:
     def _assign_methods(self):
         """Assign the correct import and execute method based in version."""
         if self.version in ('v1', 'v2', 'internal'):
+            self.remote = True
             self.import_api = self._download_api_doc
             self.execute_api = self.api_requester
         else:
@@ -218,12 +682,32 @@ class RubrikApiHandler:
 
     def _download_api_doc(self):
         """Download the swagger api-doc file from server."""
+        # The documentation might have been downloaded (prefetched) already.
+        if self.doc_imported:
+            return self.endpoints
+        self.doc_imported = True
+
         try:
             url = str('https://%s/docs/%s/api-docs' %
                       (self.local_tools.auth.server,
                        self.version))
             tmp_tools = RbkcliTools(self.local_tools.logger)
-            content = tmp_tools.download_file(url)
+            raw_doc, validators = self._load_raw_doc(tmp_tools)
+            download = tmp_tools.fetch_file(url, validators)
+            if download.status == 304:
+                content = raw_doc
+            else:
+                content = download.content
+                self._store_raw_doc(tmp_tools, content, download.validators)
+
+            # Documentation already imported (unchanged or not modified) is
+            # reused by its digest, only changed documentation is parsed.
+            self.doc_digest = hashlib.sha1(content).hexdigest()
+            if self.doc_loader is not None:
+                imported = self.doc_loader(self.doc_digest)
+                if imported is not None:
+                    self.endpoints = imported
+                    return self.endpoints
             content_dict = tmp_tools.yaml_load(content)
             self.endpoints = {
                 'paths': content_dict['paths'],
@@ -237,6 +721,34 @@ class RubrikApiHandler:
 
         return self.endpoints
 
+    def _load_raw_doc(self, tools):
+        """Load the raw api-doc previously downloaded and its validators."""
+        if self.docs_folder == '':
+            return b'', {}
+        raw_file = '%s/%s.yaml' % (self.docs_folder, self.version)
+        try:
+            validators = tools.load_json_file(raw_file + '.json')
+            with open(raw_file, 'rb') as file:
+                return file.read(), validators
+        except (RbkcliException.ToolsError, IOError, OSError):
+            return b'', {}
+
+    def _store_raw_doc(self, tools, content, validators):
+        """Store the raw api-doc with its validators (ETag/Last-Modified)."""
+        if self.docs_folder == '' or validators == {'etag': '',
+                                                     'last_modified': ''}:
+            return
+        raw_file = '%s/%s.yaml' % (self.docs_folder, self.version)
+        try:
+            tools.safe_create_folder(self.docs_folder)
+            write_file(raw_file, content, 'wb')
+            # Validators are written last, so they only refer to full docs.
+            tools.create_json_file(validators, raw_file + '.json')
+        except (RbkcliException.ToolsError, IOError, OSError) as error:
+            self.local_tools.logger.warning('ApiHandler # Unable to store raw'
+                                            ' API documentation [%s]. %s' %
+                                            (self.version, error))
+
     def api_requester(self, *args, **kwargs):
         """Instantiate requester and request API."""
         method, endpoint = args
@@ -258,6 +770,90 @@ class RubrikApiHandler:
                                                                  params=params)
         return api_rs
 
+    def request_job(self, method, endpoint, endpoint_key, data):
+        """
+        Return a job requesting the API, to be run by execute_many.
+
+        The job is a coroutine function using aiohttp when it is installed
+        and the authentication was already verified, otherwise a function
+        using the keep-alive session of the target.
+        """
+        if self.focus_list != [] and endpoint_key not in self.focus_list:
+            msg = str('Requested endpoint [' + endpoint_key + '] not found on'
+                      ' authorized endpoints list.')
+            raise RbkcliException.ApiHandlerError(str(msg))
+
+        requester = ApiRequester(self.local_tools.logger,
+                                 self.local_tools.user_profile,
+                                 auth=self.local_tools.auth)
+        endpoint = '/%s/%s' % (self.version, endpoint)
+
+        if (aiohttp_module() is not None and
+                CONFIG_PROVIDER.is_verified(requester.auth)):
+            async def job():
+                return await requester.demand_async(method, endpoint, data)
+        else:
+            def job():
+                return requester.demand(method, endpoint, data=data)
+
+        return job
+
+    def paging_style(self, endpoint, method):
+        """
+        Return how the endpoint is paged, based in its query parameters.
+
+        Endpoints with a cursor parameter are paged with the nextCursor of
+        the results, with after_id by the id of the last object and with
+        offset by the amount of objects received. Returns '' if the endpoint
+        is not paged.
+        """
+        try:
+            parameters = self.endpoints['paths'][endpoint][method].get(
+                'parameters', [])
+            names = [parameter.get('name') for parameter in parameters
+                     if isinstance(parameter, dict)]
+        except (KeyError, TypeError, AttributeError):
+            return ''
+
+        for style in PAGING_STYLES:
+            if style in names:
+                return style
+        return ''
+
+    def paginate(self, method, endpoint, endpoint_key, data, style):
+        """
+        Request all the pages of the endpoint, yielding each response.
+
+        The next page is requested as soon as the current one arrives, so
+        it is already being fetched while the current page is processed.
+        Paging stops when the target reports no more results, or on the
+        first unsuccessful response (which is also yielded).
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def request(page_endpoint):
+            return self.execute_api(method, page_endpoint,
+                                    endpoint_key=endpoint_key, data=data,
+                                    params=None)
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(request, endpoint)
+        try:
+            while future is not None:
+                result = future.result()
+                future = None
+                if 200 <= result.status_code < 300:
+                    endpoint = next_page(style, endpoint, result.text)
+                    if endpoint != '':
+                        future = executor.submit(request, endpoint)
+                yield result
+        finally:
+            # Stopped early by the consumer (or Ctrl-C), the prefetch is not
+            # needed and it is not waited for.
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
     def gen_authorization_lists(self):
         """
         Create custom lists of authorized based in the user profile.
@@ -282,6 +878,11 @@ class RubrikApiHandler:
 
         self.focus_list = self.filter_lists[self.local_tools.user_profile]
 
+    def load_authorization_lists(self, filter_lists, focus_list):
+        """Load authorization lists previously generated for the profile."""
+        self.filter_lists = DotDict(filter_lists)
+        self.focus_list = focus_list
+
     def _create_all_methods_list(self, field='summary', string='TOKEN'):
         """Generate simplified list of paths and methods."""
         filter_list = []
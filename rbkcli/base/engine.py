@@ -0,0 +1,98 @@
+"""Concurrent request engine for rbkcli."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Per event loop state of the running execute_many (aiohttp client).
+RUNS = {}
+
+
+def aiohttp_module():
+    """Return the aiohttp module, or None if it is not installed."""
+    try:
+        import aiohttp
+        return aiohttp
+    except ImportError:
+        return None
+
+
+def execute_many(jobs, concurrency=4):
+    """
+    Run the jobs concurrently, returns their results in the same order.
+
+    Jobs are callables without arguments. Coroutine functions (requests
+    made with aiohttp) are awaited in the event loop, any other callable is
+    offloaded to a pool of threads. At most concurrency jobs run at once.
+
+    If a job fails, the pending jobs are cancelled and the error is raised.
+    With Ctrl-C (KeyboardInterrupt) the pending jobs are cancelled as well,
+    requests already sent are not waited for.
+    """
+    jobs = list(jobs)
+    if jobs == []:
+        return []
+    concurrency = max(1, min(int(concurrency), len(jobs)))
+
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    RUNS[loop] = {'concurrency': concurrency, 'client': None}
+    main = loop.create_task(_run_all(loop, executor, jobs, concurrency))
+    try:
+        return loop.run_until_complete(main)
+    except KeyboardInterrupt:
+        main.cancel()
+        loop.run_until_complete(asyncio.gather(main, return_exceptions=True))
+        raise
+    finally:
+        loop.run_until_complete(_close_client(loop))
+        del RUNS[loop]
+        loop.close()
+        try:
+            executor.shutdown(wait=False, cancel_futures=True)
+        except TypeError:
+            # Python older than 3.9, queued jobs are cancelled by _run_all.
+            executor.shutdown(wait=False)
+
+
+async def _run_all(loop, executor, jobs, concurrency):
+    """Run all the jobs, limited by a semaphore."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        async with semaphore:
+            if asyncio.iscoroutinefunction(job):
+                return await job()
+            return await loop.run_in_executor(executor, job)
+
+    tasks = [loop.create_task(run(job)) for job in jobs]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def http_client():
+    """
+    Return the aiohttp session of the running execute_many.
+
+    The session is created on first use and closed when execute_many
+    returns, its connections are limited to the concurrency of the run.
+    """
+    aiohttp = aiohttp_module()
+    run = RUNS[asyncio.get_event_loop()]
+    if run['client'] is None:
+        connector = aiohttp.TCPConnector(ssl=False,
+                                         limit=run['concurrency'])
+        run['client'] = aiohttp.ClientSession(connector=connector)
+    return run['client']
+
+
+async def _close_client(loop):
+    """Close the aiohttp session of the run, if one was created."""
+    client = RUNS[loop]['client']
+    if client is not None:
+        await client.close()
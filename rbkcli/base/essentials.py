@@ -8,6 +8,7 @@ CONF_FOLDER = BASE_FOLDER + '/conf'
 LOGS_FOLDER = BASE_FOLDER + '/logs'
 SCRIPTS_FOLDER = BASE_FOLDER + '/scripts'
 CMDLETS_FOLDER = CONF_FOLDER + '/cmdlets'
+APIS_FOLDER = BASE_FOLDER + '/apis'
 SUPPORTED_API_VERSIONS = ['v1',
                           'v2',
                           'internal',
@@ -48,6 +49,7 @@ CONSTANTS = DotDict({
     'TARGETS_FOLDER': TARGETS_FOLDER,
     'CONF_FOLDER': CONF_FOLDER,
     'LOGS_FOLDER': LOGS_FOLDER,
+    'APIS_FOLDER': APIS_FOLDER,
     'SUPPORTED_API_VERSIONS': SUPPORTED_API_VERSIONS,
     'SUPPORTED_API_METHODS': SUPPORTED_API_METHODS,
     'USERS_PROFILE': USERS_PROFILE,
@@ -1,6 +1,5 @@
 from datetime import datetime
 import os
-import jinja2
 
 
 g_table = """
@@ -118,6 +117,7 @@ class Tabelfier:
         self.title = title
         self.header = header
         self.columns = columns
+        import jinja2
         self.jinja_env = jinja2.Environment(
             loader=jinja2.FileSystemLoader(os.path.dirname(__file__))
         )
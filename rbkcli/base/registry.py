@@ -0,0 +1,213 @@
+"""Target registry module for rbkcli."""
+
+import json
+import os
+import sqlite3
+
+from rbkcli.base.essentials import CONSTANTS, RbkcliException
+
+
+class TargetRegistry():
+    """
+    Indexed registry of the known targets, their nodes and aliases.
+
+    Nodes are resolved into environment IDs with a sqlite database
+    (conf/target_registry.db) instead of scanning the resolution file. The
+    resolution file (conf/target_resolution.json) is kept as the editable
+    view of the registry: it is written when nodes are added and imported
+    again whenever it is changed by hand (to add aliases, for example).
+    The first import migrates existing resolution files to the registry.
+    """
+
+    FILE_NAME = 'target_registry.db'
+    RESOLUTION_FILE = 'target_resolution.json'
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS nodes (position INTEGER PRIMARY KEY, '
+        'id TEXT, ip TEXT, envId TEXT, envName TEXT, '
+        'UNIQUE (id, ip, envId))',
+        'CREATE INDEX IF NOT EXISTS nodes_ip ON nodes (ip)',
+        'CREATE TABLE IF NOT EXISTS aliases (alias TEXT, position INTEGER, '
+        'UNIQUE (alias, position))',
+        'CREATE INDEX IF NOT EXISTS aliases_alias ON aliases (alias)',
+        'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)'
+    ]
+
+    def __init__(self, tools):
+        """Initialize the registry, the database is opened when used."""
+        self.tools = tools
+        self.file_path = CONSTANTS.CONF_FOLDER + '/' + self.FILE_NAME
+        self.resolution_path = (CONSTANTS.CONF_FOLDER + '/' +
+                                self.RESOLUTION_FILE)
+        self.conn = None
+
+    def _connect(self):
+        """Open the database, creating the schema if needed."""
+        if self.conn is None:
+            try:
+                self.tools.safe_create_folder(CONSTANTS.CONF_FOLDER)
+                self.conn = sqlite3.connect(self.file_path, timeout=10)
+                with self.conn:
+                    for statement in self.SCHEMA:
+                        self.conn.execute(statement)
+            except sqlite3.Error as error:
+                self.conn = None
+                msg = 'Unable to open target registry [%s].' % error
+                self.tools.logger.error('RegistryError # ' + msg)
+                raise RbkcliException.ToolsError(msg)
+        return self.conn
+
+    def load(self):
+        """
+        Synchronize the registry with the resolution file.
+
+        Returns False if neither the registry or the resolution file have
+        any node, in which case the registry needs to be recreated.
+        """
+        conn = self._connect()
+        signature = json.dumps(self._signature())
+        if signature == self._get_meta('signature'):
+            return self._count() > 0
+
+        try:
+            nodes = self.tools.load_json_file(self.resolution_path)
+        except RbkcliException.ToolsError:
+            nodes = None
+
+        if isinstance(nodes, list):
+            # Resolution file was changed (or is new), import it.
+            try:
+                with conn:
+                    conn.execute('DELETE FROM nodes')
+                    conn.execute('DELETE FROM aliases')
+                    self._insert(nodes)
+                    self._set_meta('signature', signature)
+            except (KeyError, TypeError) as error:
+                msg = str('Invalid node in [%s], missing key %s.' %
+                          (self.RESOLUTION_FILE, error))
+                self.tools.logger.error('RegistryError # ' + msg)
+                raise RbkcliException.ToolsError(msg)
+            self.tools.logger.debug('Registry # Imported [%s] nodes from '
+                                    '[%s].', len(nodes), self.RESOLUTION_FILE)
+        elif self._count() > 0:
+            # Resolution file was removed or is invalid, recreate it.
+            self._export()
+
+        return self._count() > 0
+
+    def add(self, nodes):
+        """Add the discovered nodes of targets, in one transaction."""
+        # Imported here, tools depends on the registry.
+        from rbkcli.base.tools import file_lock
+
+        conn = self._connect()
+        with file_lock(self.resolution_path):
+            with conn:
+                self._insert(nodes)
+            self._export()
+
+    def resolve(self, target):
+        """Return the environment ID of the node IP or alias, or ''."""
+        cursor = self._connect().execute(
+            'SELECT envId FROM ('
+            'SELECT envId, position FROM nodes WHERE ip = ? UNION ALL '
+            'SELECT nodes.envId, aliases.position FROM aliases JOIN nodes '
+            'ON nodes.position = aliases.position WHERE alias = ?'
+            ') ORDER BY position LIMIT 1', (target, target))
+        row = cursor.fetchone()
+        if row is None:
+            return ''
+        return row[0]
+
+    def is_node_ip(self, ip):
+        """Verify if the IP belongs to a node of a known target."""
+        cursor = self._connect().execute(
+            'SELECT 1 FROM nodes WHERE ip = ? LIMIT 1', (ip,))
+        return cursor.fetchone() is not None
+
+    def alias_ip(self, alias):
+        """Return the IP of the node with the alias, or ''."""
+        cursor = self._connect().execute(
+            'SELECT nodes.ip FROM aliases JOIN nodes ON nodes.position = '
+            'aliases.position WHERE alias = ? ORDER BY aliases.position '
+            'LIMIT 1', (alias,))
+        row = cursor.fetchone()
+        if row is None:
+            return ''
+        return row[0]
+
+    def nodes(self):
+        """Return all the nodes, as in the resolution file."""
+        conn = self._connect()
+        aliases = {}
+        for alias, position in conn.execute(
+                'SELECT alias, position FROM aliases ORDER BY rowid'):
+            aliases.setdefault(position, []).append(alias)
+
+        nodes = []
+        for position, id_, ip, env_id, env_name in conn.execute(
+                'SELECT position, id, ip, envId, envName FROM nodes '
+                'ORDER BY position'):
+            nodes.append({
+                'aliases': aliases.get(position, []),
+                'envId': env_id,
+                'envName': env_name,
+                'id': id_,
+                'ip': ip
+            })
+        return nodes
+
+    def close(self):
+        """Close the database."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _insert(self, nodes):
+        """Insert nodes not registered yet, with their aliases."""
+        for node in nodes:
+            cursor = self.conn.execute(
+                'INSERT OR IGNORE INTO nodes (id, ip, envId, envName) '
+                'VALUES (?, ?, ?, ?)', (node['id'], node['ip'],
+                                        node['envId'], node['envName']))
+            if cursor.rowcount == 0:
+                cursor = self.conn.execute(
+                    'SELECT position FROM nodes WHERE id = ? AND ip = ? AND '
+                    'envId = ?', (node['id'], node['ip'], node['envId']))
+                position = cursor.fetchone()[0]
+            else:
+                position = cursor.lastrowid
+            for alias in node.get('aliases', []):
+                self.conn.execute('INSERT OR IGNORE INTO aliases (alias, '
+                                  'position) VALUES (?, ?)',
+                                  (alias, position))
+
+    def _export(self):
+        """Write the resolution file and record its signature."""
+        self.tools.create_json_file(self.nodes(), self.resolution_path)
+        with self.conn:
+            self._set_meta('signature', json.dumps(self._signature()))
+
+    def _count(self):
+        """Return the amount of registered nodes."""
+        return self.conn.execute('SELECT COUNT(*) FROM nodes').fetchone()[0]
+
+    def _signature(self):
+        """Return the modification time and size of the resolution file."""
+        try:
+            stat = os.stat(self.resolution_path)
+            return [stat.st_mtime, stat.st_size]
+        except OSError:
+            return [0, 0]
+
+    def _get_meta(self, key):
+        """Return the value stored for the key, or ''."""
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?',
+                                (key,)).fetchone()
+        if row is None:
+            return ''
+        return row[0]
+
+    def _set_meta(self, key, value):
+        """Store the value for the key."""
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES '
+                          '(?, ?)', (key, value))
@@ -1,6 +1,7 @@
 """rbkcli tools module."""
 from __future__ import print_function
 
+import atexit
 import copy
 import ipaddress
 import json
@@ -8,20 +9,17 @@ import logging
 import os
 import sys
 import socket
+import tempfile
+import threading
 import time
+import traceback
+from contextlib import contextmanager
 from getpass import getpass
 from logging.handlers import RotatingFileHandler
 from uuid import UUID, uuid4
 
-import paramiko
-
-import requests
-
-import urllib3
-
-import yaml
-
 from rbkcli.base.essentials import CONSTANTS, DotDict, RbkcliException
+from rbkcli.base.registry import TargetRegistry
 
 # Python 2 compatibility
 try:
@@ -34,6 +32,132 @@ try:
 except NameError:
     pass
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:
+    QueueHandler = QueueListener = None
+
+
+# Log levels accepted by the configuration file.
+LOG_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR
+}
+
+
+class CallerLogger(logging.Logger):
+    """
+    Logger attributing records to the caller of the RbkcliLogger methods.
+
+    Logger.findCaller would always find the RbkcliLogger methods (module
+    tools), the frames of logging and of RbkcliLogger are skipped instead,
+    as the stacklevel argument does on Python 3.8 and later.
+    """
+
+    def findCaller(self, stack_info=False, stacklevel=1):
+        """Return the file, line and function that called the logger."""
+        frame = sys._getframe(1)
+        while frame is not None:
+            code = frame.f_code
+            if (frame.f_globals.get('__name__') != 'logging' and
+                    code not in LOGGER_CODES):
+                break
+            frame = frame.f_back
+        if frame is None:
+            return '(unknown file)', 0, '(unknown function)', None
+
+        stack = None
+        if stack_info:
+            stack = 'Stack (most recent call last):\n' + ''.join(
+                traceback.format_stack(frame)).rstrip('\n')
+        return code.co_filename, frame.f_lineno, code.co_name, stack
+
+
+def get_logger():
+    """Return the rbkcli logger, created as a CallerLogger."""
+    # The logger class is only replaced while the rbkcli logger is created,
+    # other loggers of the process (SDK users) are left as they are.
+    logger_class = logging.getLoggerClass()
+    logging.setLoggerClass(CallerLogger)
+    try:
+        return logging.getLogger('rbkcli')
+    finally:
+        logging.setLoggerClass(logger_class)
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Filter records with the log level configured for their module."""
+
+    def __init__(self, level, module_levels):
+        """Initialize the filter with the default and per module levels."""
+        logging.Filter.__init__(self)
+        self.level = level
+        self.module_levels = module_levels
+
+    def filter(self, record):
+        """Verify if the record is as verbose as its module allows."""
+        level = self.module_levels.get(record.module, self.level)
+        return record.levelno >= level
+
+
+class LogPipeline:
+    """
+    Background writer shared by all the RbkcliLogger of the process.
+
+    Records are put in a queue by the caller and written to the files by a
+    listener thread, so logging does not wait for the disk. Each handler is
+    registered once per process, no matter how many loggers are created.
+    """
+
+    def __init__(self):
+        """Initialize the pipeline, no thread is started yet."""
+        self.handlers = {}
+        self.queue = None
+        self.listener = None
+
+    def register(self, logger, key, handler):
+        """Write the records of the logger with the handler, only once."""
+        if key in self.handlers:
+            handler.close()
+            return
+        self.handlers[key] = handler
+
+        if QueueHandler is None:
+            logger.addHandler(handler)
+            return
+
+        if self.queue is None:
+            self.queue = queue.Queue(-1)
+            logger.addHandler(QueueHandler(self.queue))
+            atexit.register(self.stop)
+        self.start()
+
+    def start(self):
+        """Start the listener, with all the handlers registered so far."""
+        # Listener handlers are fixed, a new listener replaces the running.
+        self.stop()
+        self.listener = QueueListener(self.queue,
+                                      *self.handlers.values(),
+                                      respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """Write the pending records and stop the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+LOG_PIPELINE = LogPipeline()
+
 
 class RbkcliLogger:
     """Customize logger."""
@@ -41,7 +165,7 @@ class RbkcliLogger:
     def __init__(self, log_name, module, mode=''):
         """Initialize logger."""
         self.module = module
-        self.logger = logging.getLogger('rbkcli')
+        self.logger = get_logger()
         self.logger.status = 'creating'
 
         self._validate_log_folder(log_name)
@@ -50,50 +174,71 @@ class RbkcliLogger:
         self.logger.status = 'created'
         self.status = 'created'
 
-    def error(self, msg):
+    def error(self, msg, *args):
         """Log an error msg to file."""
-        self.logger.error(msg)
+        self.logger.error(msg, *args)
 
-    def info(self, msg):
+    def info(self, msg, *args):
         """Log an info msg to file."""
-        self.logger.info(msg)
+        self.logger.info(msg, *args)
 
-    def debug(self, msg):
+    def debug(self, msg, *args):
         """Log a debug msg to file.."""
-        self.logger.debug(msg)
+        self.logger.debug(msg, *args)
 
-    def exception(self, msg):
+    def exception(self, msg, *args):
         """Log an exception msg to file.."""
-        self.logger.exception(msg)
+        self.logger.exception(msg, *args)
 
-    def warning(self, msg):
+    def warning(self, msg, *args):
         """Log an warning msg to file.."""
-        self.logger.warning(msg)
-
-    def print_error(self, msg):
+        self.logger.warning(msg, *args)
+
+    def is_enabled(self, level):
+        """Verify if messages of the level would be logged."""
+        return self.logger.isEnabledFor(LOG_LEVELS[level])
+
+    def set_levels(self, level, module_levels=None):
+        """Set the log level, optionally overridden per module."""
+        level = LOG_LEVELS.get(level, logging.DEBUG)
+        modules = {}
+        for module, module_level in (module_levels or {}).items():
+            if module_level in LOG_LEVELS:
+                modules[module] = LOG_LEVELS[module_level]
+
+        for log_filter in list(self.logger.filters):
+            if isinstance(log_filter, ModuleLevelFilter):
+                self.logger.removeFilter(log_filter)
+        if modules != {}:
+            self.logger.addFilter(ModuleLevelFilter(level, modules))
+
+        # The logger lets through the most verbose level configured.
+        self.logger.setLevel(min([level] + list(modules.values())))
+
+    def print_error(self, msg, *args):
         """Log and print an error msg to file."""
-        print(msg)
-        self.logger.error(msg)
+        print(msg % args if args else msg)
+        self.logger.error(msg, *args)
 
-    def print_info(self, msg):
+    def print_info(self, msg, *args):
         """Log and print an info msg to file."""
-        print(msg)
-        self.logger.info(msg)
+        print(msg % args if args else msg)
+        self.logger.info(msg, *args)
 
-    def print_debug(self, msg):
+    def print_debug(self, msg, *args):
         """Log and print a debug msg to file.."""
-        print(msg)
-        self.logger.debug(msg)
+        print(msg % args if args else msg)
+        self.logger.debug(msg, *args)
 
-    def print_exception(self, msg):
+    def print_exception(self, msg, *args):
         """Log and print an exception msg to file.."""
-        print(msg)
-        self.logger.exception(msg)
+        print(msg % args if args else msg)
+        self.logger.exception(msg, *args)
 
-    def print_warning(self, msg):
+    def print_warning(self, msg, *args):
         """Log and print an warning msg to file.."""
-        print(msg)
-        self.logger.warning(msg)
+        print(msg % args if args else msg)
+        self.logger.warning(msg, *args)
 
     def _validate_log_folder(self, log_name):
         """Validate the folder provided, if does not exist, create it."""
@@ -111,25 +256,196 @@ class RbkcliLogger:
         formatted = logging.Formatter('%(asctime)-15s - [%(threadName)-12.12s]'
                                       ' %(levelname)-8s [%(module)s] - '
                                       '%(message)-s')
-        self.logger = logging.getLogger('rbkcli')
+        self.logger = get_logger()
         self.logger.status = 'creating'
 
         self._validate_log_folder(log_name)
 
-        file_handler = RotatingFileHandler(log_name, maxBytes=2000000,
-                                           backupCount=5)
-        file_handler.setFormatter(formatted)
-        console_handler = logging.StreamHandler(sys.stderr)
-        console_handler.setFormatter(formatted)
-
-        if mode == 'console':
+        # Handlers are registered once per process, loggers created again
+        # by long running processes (daemon, SDK) don't duplicate records.
+        log_file = os.path.abspath(log_name)
+        if log_file not in LOG_PIPELINE.handlers:
+            file_handler = RotatingFileHandler(log_name, maxBytes=2000000,
+                                               backupCount=5)
+            file_handler.setFormatter(formatted)
+            LOG_PIPELINE.register(self.logger, log_file, file_handler)
+
+        # Console records are written right away, next to the output.
+        if mode == 'console' and not getattr(self.logger, 'console', False):
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setFormatter(formatted)
             self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-        self.logger.setLevel(logging.DEBUG)
+            self.logger.console = True
+
+        # The configured level is kept, it is only defaulted once.
+        if self.logger.level == logging.NOTSET:
+            self.logger.setLevel(logging.DEBUG)
         self.logger.status = 'created'
         self.status = 'created'
 
 
+# Code of the RbkcliLogger methods, skipped when looking for the caller.
+LOGGER_CODES = set(method.__code__ for method in vars(RbkcliLogger).values()
+                   if hasattr(method, '__code__'))
+
+
+class ConfigProvider:
+    """
+    Process wide cache of the configuration and credentials.
+
+    Every RbkcliTools instance shares this provider, files are only read
+    again when their modification time or size changes, and the loaded
+    authentication is reused while its sources (files and environment
+    variables) stay the same.
+    """
+
+    def __init__(self):
+        """Initialize the empty cache."""
+        self.files = {}
+        self.auths = {}
+        self.verified = set()
+
+    @staticmethod
+    def signature(file):
+        """Return the modification time and size of the file."""
+        try:
+            stat = os.stat(file)
+            return [stat.st_mtime, stat.st_size]
+        except OSError:
+            return [0, 0]
+
+    def load_json(self, file, loader):
+        """Return a copy of the json file, loaded only if it changed."""
+        signature = self.signature(file)
+        if file not in self.files or self.files[file][0] != signature:
+            # Loader errors (missing or invalid file) are not cached.
+            self.files[file] = (signature, loader(file))
+
+        return copy.deepcopy(self.files[file][1])
+
+    def load_auth(self, key, loader):
+        """Return a copy of the authentication loaded for the key."""
+        if key not in self.auths:
+            self.auths[key] = loader()
+
+        return DotDict(self.auths[key])
+
+    def is_verified(self, auth):
+        """Verify if the authentication was already verified."""
+        return json.dumps(auth, sort_keys=True) in self.verified
+
+    def set_verified(self, auth):
+        """Mark the authentication as verified, it is not verified again."""
+        self.verified.add(json.dumps(auth, sort_keys=True))
+
+    def value(self, key, default=None):
+        """Return the value of a configuration key, or default if absent."""
+        file = CONSTANTS.CONF_FOLDER + '/rbkcli.conf'
+        try:
+            conf_dict = self.load_json(file, _load_json)
+            return conf_dict['config'][key]['value']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return default
+
+    def invalidate(self, file=None):
+        """Drop the cached file, or everything if no file is provided."""
+        if file is None:
+            self.files = {}
+        else:
+            self.files.pop(file, None)
+        self.auths = {}
+
+
+def _load_json(file):
+    """Load json file."""
+    with open(file, 'r') as json_file:
+        return json.load(json_file)
+
+
+CONFIG_PROVIDER = ConfigProvider()
+
+
+# Permissions of new files, temporary files are created with 0600.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def write_file(path, data, mode='w', perms=None):
+    """
+    Write the file atomically, replacing it with a complete temporary file.
+
+    Concurrent readers either get the previous or the new content, never a
+    partially written file. Permissions of the existing file are kept,
+    unless perms is provided.
+    """
+    if perms is None:
+        try:
+            perms = os.stat(path).st_mode & 0o777
+        except OSError:
+            perms = 0o666 & ~UMASK
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                        prefix='.' + os.path.basename(path),
+                                        suffix='.tmp')
+    try:
+        with os.fdopen(handle, mode) as file:
+            file.write(data)
+        os.chmod(tmp_path, perms)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold a advisory lock (<path>.lock) around a read-modify-write.
+
+    Processes writing the same file wait for each other, readers are not
+    blocked since files are always replaced atomically. Without fcntl (such
+    as on Windows) no lock is taken.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# Connection pool shared by all downloads, PoolManager is thread safe.
+HTTP_POOL = {}
+HTTP_POOL_LOCK = threading.Lock()
+
+
+def _http_pool():
+    """Return the shared connection pool, created on first use."""
+    with HTTP_POOL_LOCK:
+        if 'pool' not in HTTP_POOL:
+            import urllib3
+            timeout = []
+            for key, default in [('connectTimeout', 10), ('readTimeout', 300)]:
+                try:
+                    timeout.append(float(CONFIG_PROVIDER.value(key, default)))
+                except (TypeError, ValueError):
+                    timeout.append(default)
+            HTTP_POOL['pool'] = urllib3.PoolManager(
+                cert_reqs='CERT_NONE', maxsize=4,
+                timeout=urllib3.Timeout(connect=timeout[0], read=timeout[1]))
+        return HTTP_POOL['pool']
+
+
+def _yaml_loader(yaml):
+    """Return libyaml's loader when available, it is much faster."""
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
 class RbkcliTools:
     """Define tools to be widely available throughout the code."""
 
@@ -149,10 +465,12 @@ class RbkcliTools:
     def load_yaml_file(self, yaml_file):
         """Open file as read, load yaml, returns dict."""
         self.called_tools.append('load_yaml_file')
+        import yaml
 
         try:
             with open(yaml_file, 'r') as file:
-                dict_result = yaml.safe_load(file.read())
+                dict_result = yaml.load(file.read(),
+                                        Loader=_yaml_loader(yaml))
         except FileNotFoundError as error:
             raise RbkcliException.ToolsError(error)
 
@@ -175,9 +493,10 @@ class RbkcliTools:
     def create_yaml_file(self, yml_dict, yml_file):
         """Open file as write, dump yaml dict to file."""
         self.called_tools.append('create_yaml_file')
+        import yaml
         try:
-            with open(yml_file, 'w') as file:
-                yaml.dump(yml_dict, file, default_flow_style=False)
+            write_file(yml_file, yaml.dump(yml_dict,
+                                           default_flow_style=False))
             self.logger.debug('File created successfully: ' + yml_file)
 
             return True
@@ -193,12 +512,13 @@ class RbkcliTools:
             self.logger.error('IOToolsError # ' + msg)
             raise RbkcliException.ToolsError(error)
 
-    def create_json_file(self, json_dict, json_file):
-        """Open file as write, dump json dict to file."""
+    def create_json_file(self, json_dict, json_file, indent=2):
+        """Dump json dict to file, the file is replaced atomically."""
         self.called_tools.append('create_json_file')
         try:
-            with open(json_file, 'w') as file:
-                file.write(json.dumps(json_dict, indent=2, sort_keys=True))
+            write_file(json_file, json.dumps(json_dict, indent=indent,
+                                             sort_keys=True))
+            CONFIG_PROVIDER.invalidate(json_file)
             self.logger.debug('IOTools # File created successfully: ' +
                               json_file)
             return True
@@ -247,6 +567,7 @@ class RbkcliTools:
     def ssh_connection(self, server, username, password, port=22):
         """Create paramiko's SSH session with provided data."""
         self.called_tools.append('ssh_connection')
+        import paramiko
         self.ssh_conn = paramiko.SSHClient()
         self.ssh_conn.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.ssh_conn.connect(server,
@@ -340,7 +661,8 @@ class RbkcliTools:
             msg = '%s [%s]' % ('IOTools # Successfully loaded configuration'
                                ' file: ', file)
             if conf_dict == {} and self.conf_dict == {}:
-                self.conf_dict = self.load_json_file(file)
+                self.conf_dict = CONFIG_PROVIDER.load_json(file,
+                                                           self.load_json_file)
                 self.logger.debug(msg)
             elif isinstance(conf_dict, dict) and self.conf_dict == {}:
                 self.conf_dict = conf_dict
@@ -366,14 +688,96 @@ class RbkcliTools:
             "config": {
                 "storeToken": {
                     "value": "False",
-                    "description": str("Caches the last successful token "
-                                       "with environment data.")
+                    "description": str("Requests a session token with "
+                                       "username/password and caches it for "
+                                       "the following commands.")
                 },
                 "logLevel": {
-                    "value": "debug",
+                    "value": "info",
                     "description": str("Verbosity of the logs written to the"
                                        " file logs/rbkcli.log.")
                 },
+                "dnsCacheTtl": {
+                    "value": "300",
+                    "description": str("Seconds a resolved target FQDN is "
+                                       "reused before resolving it again.")
+                },
+                "syncCheckInterval": {
+                    "value": "3600",
+                    "description": str("Seconds between checks of the "
+                                       "target version, APIs changed by "
+                                       "upgrades are imported again. A "
+                                       "negative value disables the check.")
+                },
+                "httpPoolSize": {
+                    "value": "4",
+                    "description": str("Connections kept alive per target, "
+                                       "reused by all the API requests of "
+                                       "the process.")
+                },
+                "connectTimeout": {
+                    "value": "10",
+                    "description": str("Seconds to wait for the connection "
+                                       "to the target.")
+                },
+                "readTimeout": {
+                    "value": "300",
+                    "description": str("Seconds to wait for the target to "
+                                       "respond a request.")
+                },
+                "retryAttempts": {
+                    "value": "3",
+                    "description": str("Retries of idempotent requests that "
+                                       "failed with connection errors or "
+                                       "status 429, 502, 503 and 504.")
+                },
+                "retryBackoff": {
+                    "value": "1",
+                    "description": str("Base seconds of the exponential "
+                                       "backoff between retries, Retry-After"
+                                       " is honored when provided.")
+                },
+                "retryMaxDelay": {
+                    "value": "60",
+                    "description": str("Maximum seconds to wait before a "
+                                       "retry, including the Retry-After of"
+                                       " the target.")
+                },
+                "commandDeadline": {
+                    "value": "0",
+                    "description": str("Seconds a command (loops and scripts"
+                                       " included) can take, 0 is unlimited.")
+                },
+                "responseCache": {
+                    "value": "False",
+                    "description": str("Serves GET requests from the "
+                                       "response cache of the target, for "
+                                       "the endpoints with a cacheTtl.")
+                },
+                "cacheTtl": {
+                    "value": {
+                        "default": "0",
+                        "/sla_domain": "3600",
+                        "/vmware/vcenter": "3600",
+                        "/report": "600"
+                    },
+                    "description": str("Seconds responses are cached per "
+                                       "endpoint (longest prefix), or the "
+                                       "default.")
+                },
+                "cacheSize": {
+                    "value": "50",
+                    "description": str("Megabytes of the response cache of "
+                                       "each target, the least recently used"
+                                       " responses are evicted.")
+                },
+                "moduleLogLevel": {
+                    "value": {},
+                    "description": str("Verbosity per rbkcli module, "
+                                       "overrides logLevel for the modules "
+                                       "provided, such as {\"api\": "
+                                       "\"debug\"}.")
+                },
                 "useCredentialsFile": {
                     "value": "False",
                     "description": str("Tries to load credentials from auth"
@@ -438,7 +842,8 @@ class RbkcliTools:
                 self.load_conf_file()
             file = self.conf_dict['config']['credentialsFile']['value']
             file = CONSTANTS.CONF_FOLDER + '/' + file
-            self.auth_dict = self.load_json_file(file)
+            self.auth_dict = CONFIG_PROVIDER.load_json(file,
+                                                       self.load_json_file)
         except RbkcliException.ToolsError:
             msg = 'Unable to load auth file, [' + file + ']'
             self.logger.error('IOToolsError # ' + msg)
@@ -492,8 +897,28 @@ class RbkcliTools:
                 raise RbkcliException.ToolsError(msg)
 
     def load_auth(self):
-        """Load authentication."""
+        """Load authentication, reused while its sources don't change."""
         self.called_tools.append('load_auth')
+        if self.conf_dict == {}:
+            self.load_conf_file()
+
+        try:
+            file = self.conf_dict['config']['credentialsFile']['value']
+            file = CONSTANTS.CONF_FOLDER + '/' + file
+        except (KeyError, TypeError):
+            file = ''
+        env = [os.environ.get(key) for key in ['rubrik_cdm_node_ip',
+                                               'rubrik_cdm_username',
+                                               'rubrik_cdm_password',
+                                               'rubrik_cdm_token']]
+        key = json.dumps([self.conf_dict, CONFIG_PROVIDER.signature(file),
+                          env, self.workflow], sort_keys=True)
+
+        self.auth = CONFIG_PROVIDER.load_auth(key, self._load_auth)
+        return self.auth
+
+    def _load_auth(self):
+        """Load authentication from file or environment variables."""
         try:
             self.auth = self.load_file_auth()
         except RbkcliException.ToolsError:
@@ -611,7 +1036,8 @@ class RbkcliTools:
     def yaml_load(self, yaml_str):
         """Load yaml data."""
         self.called_tools.append('json_dump')
-        return yaml.safe_load(yaml_str)
+        import yaml
+        return yaml.load(yaml_str, Loader=_yaml_loader(yaml))
 
     def json_dump(self, json_dict):
         """Dump json data."""
@@ -625,7 +1051,9 @@ class RbkcliTools:
     def jsonfy(self, avar):
         """Load json data from string."""
         avar_dict = {}
-        if isinstance(avar, requests.models.Response):
+        # A Response can only be provided if requests was already imported.
+        requests = sys.modules.get('requests')
+        if requests and isinstance(avar, requests.models.Response):
             avar_dict = self.json_load(avar.text)
         elif isinstance(avar, dict) or isinstance(avar, list):
             avar_dict = avar
@@ -642,16 +1070,43 @@ class RbkcliTools:
     def download_file(self, url):
         """Download file from provided url."""
         self.called_tools.append('download_file')
-        pool = urllib3.PoolManager(cert_reqs='CERT_NONE')
+        return self.fetch_file(url).content
+
+    def fetch_file(self, url, validators=None):
+        """
+        Download file from provided url, with a conditional request.
+
+        The validators (etag, last_modified) of a previous download are sent
+        so the server can answer 304 if unchanged, in which case the content
+        returned is empty. Returns a dictionary with the status, content and
+        validators of the file downloaded.
+        """
+        self.called_tools.append('fetch_file')
+        import urllib3
+        if validators is None:
+            validators = {}
+        headers = {}
+        if validators.get('etag', '') != '':
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified', '') != '':
+            headers['If-Modified-Since'] = validators['last_modified']
+
         try:
-            with pool.request('GET', url, preload_content=False) as file:
+            with _http_pool().request('GET', url, headers=headers,
+                                      preload_content=False) as file:
                 content = file.read()
+                status = file.status
+                response_headers = file.headers
             if content == b'Route not defined.':
                 error = str('Wrong or nonexistent URL [' + url + '], route is '
                                                                  'not defined')
                 msg = 'IOToolsError # ' + error
                 self.logger.error(msg)
                 raise RbkcliException.ToolsError(error)
+            elif status == 304:
+                msg = str('IOTools # File not modified since last download '
+                          '[%s]' % url)
+                self.logger.debug(msg)
             else:
                 msg = str('IOTools # Successfully downloaded file [%s]' % url)
                 self.logger.debug(msg)
@@ -661,7 +1116,14 @@ class RbkcliTools:
             self.logger.error(msg)
             raise RbkcliException.ToolsError(str(error))
 
-        return content
+        return DotDict({
+            'status': status,
+            'content': content,
+            'validators': {
+                'etag': response_headers.get('ETag', ''),
+                'last_modified': response_headers.get('Last-Modified', '')
+            }
+        })
 
     def safe_create_folder(self, folder_path):
         """Create folders that don't exist in a path provided."""
@@ -751,15 +1213,75 @@ class RbkcliTools:
         else:
             port = ''
             target_ip = target_name
+
+        if target_ip == '' or self.is_valid_ip(target_ip):
+            try:
+                return str(socket.gethostbyname(target_ip)) + port
+            except socket.gaierror:
+                pass
+
+        return self._resolve_fqdn(target_ip) + port
+
+    def _resolve_fqdn(self, fqdn):
+        """
+        Resolve the fqdn with a cache of previous resolutions.
+
+        Cached IPs are reused for dnsCacheTtl seconds if they still belong
+        to a known environment (target registry). If the DNS is not
+        available, IPs are resolved from the nodes aliases or the cache.
+        """
+        cache_file = CONSTANTS.CONF_FOLDER + '/dns_cache.json'
         try:
-            target_ip = str(socket.gethostbyname(target_ip))
+            ttl = float(CONFIG_PROVIDER.value('dnsCacheTtl', '300'))
+        except (TypeError, ValueError):
+            ttl = 300
+        try:
+            cache = self.load_json_file(cache_file)
+        except RbkcliException.ToolsError:
+            cache = {}
+        registry = TargetRegistry(self)
+        try:
+            registry.load()
+        except RbkcliException.ToolsError:
+            pass
+
+        cached = cache.get(fqdn, {})
+        if (time.time() - cached.get('time', 0) < ttl and
+                registry.is_node_ip(cached.get('ip', ''))):
+            self.logger.debug('IOTools # Resolved FQDN [%s] from cache [%s].',
+                              fqdn, cached['ip'])
+            return cached['ip']
+
+        try:
+            target_ip = str(socket.gethostbyname(fqdn))
         except socket.gaierror:
-            msg = 'Unable to resolve FQDN [%s].' % target_ip
-            self.logger.error('ToolsError # ' + msg)
-            raise RbkcliException.ToolsError(msg)
+            target_ip = registry.alias_ip(fqdn) or cached.get('ip', '')
+            if target_ip == '':
+                msg = 'Unable to resolve FQDN [%s].' % fqdn
+                self.logger.error('ToolsError # ' + msg)
+                raise RbkcliException.ToolsError(msg)
+            self.logger.warning('IOTools # Unable to resolve FQDN [%s] with '
+                                'DNS, using known IP [%s].', fqdn, target_ip)
+            return target_ip
 
-        return target_ip + port
+        self._cache_resolution(cache_file, fqdn, target_ip)
 
+        return target_ip
+
+    def _cache_resolution(self, cache_file, fqdn, target_ip):
+        """Store the resolved IP, re-reading the cache under its lock."""
+        try:
+            with file_lock(cache_file):
+                try:
+                    cache = self.load_json_file(cache_file)
+                except RbkcliException.ToolsError:
+                    cache = {}
+                cache[fqdn] = {'ip': target_ip, 'time': time.time()}
+                write_file(cache_file, json.dumps(cache, indent=2,
+                                                  sort_keys=True))
+        except (IOError, OSError) as error:
+            self.logger.warning('IOTools # Unable to cache the resolution of '
+                                'FQDN [%s]: %s', fqdn, error)
 
     @staticmethod
     def is_not_empty_str(value):
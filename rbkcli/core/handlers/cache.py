@@ -0,0 +1,231 @@
+"""Response cache module for rbkcli."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from rbkcli.base.essentials import DotDict
+from rbkcli.base.tools import write_file
+
+
+class ResponseCache():
+    """
+    On disk cache of the GET responses of a target (targets/<envId>/cache).
+
+    Each response is stored in its own file, named after the hash of the
+    user profile, API version, endpoint and query requested. A response is
+    served while it is younger than the TTL of the request, the TTL is not
+    stored so commands with a shorter --cache-ttl do not get older data.
+    Serving a response updates its modification time, the least recently
+    used responses are evicted once the cache is larger than its budget.
+    """
+
+    FOLDER_NAME = 'cache'
+
+    def __init__(self, target_folder, logger):
+        """Initialize the cache of the target, created when used."""
+        self.folder = target_folder + '/' + self.FOLDER_NAME
+        self.logger = logger
+
+    @staticmethod
+    def key(profile, version, endpoint, all_pages=False):
+        """Return the file name of the request."""
+        request = json.dumps([profile, version, endpoint, bool(all_pages)])
+        return hashlib.sha256(request.encode()).hexdigest() + '.json'
+
+    def load(self, key, ttl):
+        """Return the response if younger than ttl seconds, or None."""
+        path = self.folder + '/' + key
+        try:
+            with open(path, 'r') as file:
+                entry = json.load(file)
+            age = time.time() - entry['stored']
+            if not 0 <= age < ttl:
+                return None
+            os.utime(path, None)
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+        self.logger.debug('ResponseCache # Serving [%s] from cache, stored '
+                          '%s seconds ago.', entry['request'], int(age))
+        return DotDict({
+            'text': entry['text'],
+            'status_code': entry['status_code']
+        })
+
+    def store(self, key, request, api_result, budget):
+        """Store a successful response, then evict over the budget."""
+        if not 200 <= api_result.status_code < 300:
+            return
+
+        entry = {
+            'request': request,
+            'stored': time.time(),
+            'status_code': api_result.status_code,
+            'text': api_result.text
+        }
+        try:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+            # Responses might be sensitive, only readable by the user.
+            write_file(self.folder + '/' + key, json.dumps(entry),
+                       perms=0o600)
+            self._evict(budget)
+        except (IOError, OSError) as error:
+            self.logger.warning('ResponseCache # Unable to cache [%s]: %s',
+                                request, error)
+
+    def _evict(self, budget):
+        """Remove the least recently used responses over the budget."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.folder):
+            if not name.endswith('.json'):
+                continue
+            path = self.folder + '/' + name
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total = total + stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total = total - size
+            self.logger.debug('ResponseCache # Evicted [%s].', path)
+
+
+class RequestMemo():
+    """
+    Memo of the GET responses of the command being run.
+
+    Identical GET requests of the same command (loops, cmdlets and scripts
+    included) get the response of the first one from memory. Identical
+    requests made at the same time are only sent once (single flight), the
+    other callers wait for that response. Only successful responses are
+    kept, and they are dropped when the command ends or changes data.
+    Scripts polling a status request it fresh (call_back(..., fresh=True)),
+    bypassing the memo.
+    """
+
+    def __init__(self, logger):
+        """Initialize the memo, only used while a command runs."""
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.responses = {}
+        self.flights = {}
+
+    @contextmanager
+    def run(self):
+        """Memoize the requests of the block, nested in a command or not."""
+        self.start()
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def start(self):
+        """Start a command run, nested runs share the memo."""
+        with self.lock:
+            if self.runs == 0:
+                self.responses = {}
+            self.runs = self.runs + 1
+
+    def end(self):
+        """End a command run, the memo is dropped with the last one."""
+        with self.lock:
+            self.runs = max(0, self.runs - 1)
+            if self.runs == 0:
+                self.responses = {}
+
+    def clear(self):
+        """Drop the memoized responses, after a request changed data."""
+        with self.lock:
+            self.responses = {}
+
+    def lookup(self, key):
+        """Return a copy of the memoized response, or None."""
+        with self.lock:
+            response = self.responses.get(key)
+        if response is None:
+            return None
+
+        self.logger.debug('RequestMemo # Reusing the response of [%s].', key)
+        return DotDict(response)
+
+    def store(self, key, api_result):
+        """Memoize the response, if successful and a command is running."""
+        with self.lock:
+            if self.runs > 0 and 200 <= api_result.status_code < 300:
+                self.responses[key] = {
+                    'text': api_result.text,
+                    'status_code': api_result.status_code
+                }
+
+    def request(self, key, request_fn):
+        """Return the memoized response, or request it only once."""
+        if self.runs == 0:
+            return request_fn()
+
+        with self.lock:
+            owner = key not in self.flights
+            if owner:
+                self.flights[key] = {'event': threading.Event()}
+            flight = self.flights[key]
+
+        if not owner:
+            # Identical request in flight, its response or error is shared.
+            flight['event'].wait()
+            if 'error' in flight:
+                raise flight['error']
+            return flight['response']
+
+        try:
+            response = self.lookup(key)
+            if response is None:
+                response = request_fn()
+                self.store(key, response)
+            flight['response'] = response
+            return response
+        except Exception as error:
+            flight['error'] = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight['event'].set()
+
+
+def endpoint_ttl(ttls, endpoint):
+    """
+    Return the TTL configured for the endpoint, in seconds.
+
+    The longest endpoint prefix configured is used ('/report' matches
+    '/report/{id}' but not '/report_table'), or the 'default' TTL.
+    """
+    if not isinstance(ttls, dict):
+        return 0
+    ttl = ttls.get('default', '0')
+    matched = ''
+    for prefix, value in ttls.items():
+        if prefix == 'default' or len(prefix) <= len(matched):
+            continue
+        if endpoint == prefix or endpoint.startswith(prefix.rstrip('/') +
+                                                     '/'):
+            ttl = value
+            matched = prefix
+
+    try:
+        return max(0, int(float(ttl)))
+    except (ValueError, TypeError):
+        return 0
@@ -72,8 +72,8 @@ class CallBack(ApiTargetTools):
 
         return self.stct_request
 
-    def callit(self, stct_request, args=None):
-        """Call endpoint provided with arguments."""
+    def callit(self, stct_request, args=None, fresh=False):
+        """Call endpoint provided with arguments, fresh skips the memo."""
         if 'structured' not in stct_request.keys():
             if args is None:
                 args = []
@@ -81,31 +81,85 @@ class CallBack(ApiTargetTools):
         self.stct_request = stct_request
 
         self.req = self.validator.validate(self.stct_request)
-        api_result = self.operations.execute(self.req)
+        api_result = self.operations.execute(self.req, fresh=fresh)
+        self.call_result = self._load_result(api_result)
 
+        return self.call_result
+
+    @staticmethod
+    def _load_result(api_result):
+        """Load the API result text as dict."""
         if '{' in api_result.text or '[' in api_result.text:
             try:
-                self.call_result = json.loads(api_result.text)
+                return json.loads(api_result.text)
             except:
-                self.call_result = { 'result_text': api_result.text}
-        else:
-            self.call_result = { 'result_text': api_result.text}
+                return { 'result_text': api_result.text}
+        return { 'result_text': api_result.text}
 
-        return self.call_result
+    def call_back(self, args, fresh=False):
+        """
+        Perform same level of parsing (even CLI) as any other request.
 
-    def call_back(self, args):
-        """Perform same level of parsing (even CLI) as any other request."""
+        GET responses are memoized while the command runs, scripts polling
+        a status use fresh=True to always get it from the target.
+        """
         self.request, self.args = self.parseit(args)
         self.stct_request = self.structreit(self.args, self.request)
 
         result = DotDict()
-        result.text = self.callit(self.stct_request)
+        result.text = self.callit(self.stct_request, fresh=fresh)
         result.status_code = 200
         result.text = json.dumps(result.text, indent=2)
 
         return self.formatter.outputfy(self.req, result)
 
-    def call_back_text(self, args):
+    def call_back_many(self, args_list, concurrency=None):
+        """
+        Perform several callbacks, requesting the APIs concurrently.
+
+        Commands are parsed and validated one at a time, each with its own
+        validator, then executed with execute_many. Returns the outputs in
+        the same order as the commands provided.
+        """
+        reqs = []
+        for args in args_list:
+            self.request, self.args = self.parseit(args)
+            stct_request = self.structreit(self.args, self.request)
+            validator = InputHandler(self.base_kit, self.operations)
+            reqs.append(validator.validate(stct_request))
+
+        # Identical GET requests of the batch share their responses, also
+        # when called outside of a command.
+        with self.operations.memo.run():
+            api_results = self.operations.execute_many(reqs, concurrency)
+
+        outputs = []
+        for req, api_result in zip(reqs, api_results):
+            result = DotDict()
+            result.text = json.dumps(self._load_result(api_result), indent=2)
+            result.status_code = 200
+            outputs.append(self.formatter.outputfy(req, result))
+
+        return outputs
+
+    def iter_pages(self, args):
+        """
+        Request all the pages of the command, yielding each page as dict.
+
+        The next page is already requested while the current one is being
+        processed, no output arguments are applied to the pages.
+        """
+        self.request, self.args = self.parseit(args)
+        stct_request = self.structreit(self.args, self.request)
+        req = self.validator.validate(stct_request)
+
+        for api_result in self.operations.iter_pages(req):
+            try:
+                yield json.loads(api_result.text)
+            except ValueError:
+                yield {'result_text': api_result.text}
+
+    def call_back_text(self, args, fresh=False):
         """Returns dict directly instead of API result."""
-        result = self.call_back(args)
+        result = self.call_back(args, fresh)
         return json.loads(result.text)
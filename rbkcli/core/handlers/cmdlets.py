@@ -2,8 +2,14 @@
 
 import os
 import json
-import copy
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
 from rbkcli.base import CONSTANTS, RbkcliException
+from rbkcli.base.tools import file_lock
 from rbkcli.core.handlers import ApiTargetTools, RbkcliResponse
 from rbkcli.core.handlers.callback import CallBack
 
@@ -75,6 +81,12 @@ class Cmdlets(ApiTargetTools):
 
         self.focus_list = self.filter_lists[self.user_profile]
 
+    def load_authorization_lists(self, filter_lists, focus_list):
+        """Load authorization lists previously generated for the profile."""
+        self.meta_api.doc = self.endpoints
+        self.filter_lists = filter_lists
+        self.focus_list = focus_list
+
     def import_api(self):
         """Return the generated API doc for the meta commands."""
         self._gen_docs()
@@ -100,10 +112,14 @@ class Cmdlets(ApiTargetTools):
         else:
             flag_several = False
 
-        for ops in enumerate(endpoint[method]['operation']):
-            opers = self._assign_parameters(ops[1], kwargs['data'], endpoint[method]['parameters'])
-            if flag_several:
-                this_result = self.cbacker.call_back(opers)
+        operations = [self._assign_parameters(oper, kwargs['data'], endpoint[method]['parameters'])
+                      for oper in endpoint[method]['operation']]
+
+        if flag_several:
+            # Several operations are requested concurrently, in order.
+            results = self.cbacker.call_back_many(operations)
+            for ops in enumerate(results):
+                this_result = ops[1]
                 if endpoint[method]['responses']['200']['multiple_output'] == 'segmented':
                     last_command['comand_'+str(ops[0])] = self._load_json(this_result)
                 elif endpoint[method]['responses']['200']['multiple_output'] == 'combined':
@@ -114,7 +130,8 @@ class Cmdlets(ApiTargetTools):
                     elif isinstance(my_result, list):
                         for item in my_result:
                             last_command_.append(item)
-            else:
+        else:
+            for opers in operations:
                 this_result = self.cbacker.call_back(opers)
                 last_command = self._load_json(this_result)
 
@@ -150,89 +167,14 @@ class Cmdlets(ApiTargetTools):
 
         return result
 
-    def _get_cmdlets_files(self):
-        """Get list of cmdlets profiles file.."""
-        cmdlets_files = []
-        self.cmdlets_folder = CONSTANTS.CONF_FOLDER + '/cmdlets'
-        try:
-            cmdlets_folder = list(os.listdir(self.cmdlets_folder))
-            for file in cmdlets_folder:
-                if file.endswith('cmdlets.json'):
-                    cmdlets_files.append(file)
-        except Exception as e:
-            return []
-        return cmdlets_files
-
-    def _load_cmdlets_files(self, cmdlets_files):
-        """Load the content of the cmdlet profile file."""
-        loaded_cmdlets = []
-        for file in cmdlets_files:
-            loaded_cmdlets = loaded_cmdlets + self.tools.load_json_file(self.cmdlets_folder+'/'+file)
-        return loaded_cmdlets
-    
-    def _get_usable_cmdlets(self, loaded_cmdlets):
-        """Confirm if cmdlet is uniq, return only usable/uniq."""
-        usable_cmdlets = []
-        usable_cmdlets_list = []
-        existing_cmdlets = copy.deepcopy(loaded_cmdlets)
-        for item in enumerate(existing_cmdlets):
-            if item[1]['name'] in usable_cmdlets_list:
-                pass
-            else:
-                usable_cmdlets_list.append(item[1]['name'])
-                usable_cmdlets.append(item[1])
-
-        return usable_cmdlets
-
     def _gen_docs(self):
         """Create static API documentation and store to class var."""
         # The static content defined here mimics and can easily be converted
         # to a swagger file documentation. Possibly converting the Rbkcli to
         # a API server.
-        self.meta_api.doc = {
-            'definitions': {},
-            'paths': {}
-            }
-
-        cmdlets_files = self._get_cmdlets_files()
-        loaded_cmdlets = self._load_cmdlets_files(cmdlets_files)
-        usable_cmdlets = self._get_usable_cmdlets(loaded_cmdlets)
-
-        for line in usable_cmdlets:
-            if line['name'] != '':
-                cmd_name = line['name'].replace(' ', '/')
-                cmd_name = '/' + cmd_name
-                parameters_found = line['param'].split(',')
-                self.meta_api.doc['paths'][cmd_name] = {
-                        'get': {
-                            'description': line['cmdlet_description'],
-                            'operationId': '',
-                            'operation': line['command'],
-                            'parameters': [],
-                            'responses': {
-                                '200': {
-                                    'description': line['response_description'],
-                                    'schema': {},
-                                    'table_order': [],
-                                    'multiple_output': line['multiple_output']
-                                }
-                            },
-                            'summary': line['cmdlet_summary'],
-                            'tags': '',
-                            'x-group': ''
-                        }
-                    }
-                for param in parameters_found:
-                    self.meta_api.doc['paths'][cmd_name]['get']['parameters'].append({
-                        "in": "body",
-                        "name": line['param'],
-                        "required": True,
-                        "type": "string"
-                        })
-
+        self.meta_api.doc = CmdletsRegistry(self.tools).gen_docs()
         self.endpoints = self.meta_api.doc
 
-
     def _create_all_methods_list(self, field='summary', string='TOKEN'):
         """Create a list of all defined methods for meta commands."""
         filter_list = []
@@ -266,6 +208,7 @@ class CmdletsControls():
         """Initialize Cmdlets control class."""
         self.tools = tools
         self.cmdlets_folder = CONSTANTS.CONF_FOLDER + '/cmdlets'
+        self.registry = CmdletsRegistry(tools)
 
     def list_cmdlets_profiles(self, kwargs):
         """List all cmdlets profiles."""
@@ -328,16 +271,13 @@ class CmdletsControls():
 
     def list_cmdlets(self, kwargs):
         """List all cmdlets in all profiles."""
-        cmdlets_files = self._get_cmdlets_files()
-        loaded_cmdlets = self._load_cmdlets_files(cmdlets_files)
-        usable_cmdlets = self._get_usable_cmdlets(loaded_cmdlets)
-
-        return json.dumps(usable_cmdlets, indent=2)
+        return json.dumps(self.registry.all_cmdlets(), indent=2)
 
     def sync_cmdlets(self, kwargs):
-        """Add any newly created cmdlet to me.json environment."""
-        target_folder = kwargs['target_folder']
-        self._update_env_file(target_folder+'/me.json')
+        """Apply changes made manually to the cmdlets profiles."""
+        # The environment loads the cmdlets from the registry, which is
+        # refreshed with the profiles changed on disk.
+        self.registry.load()
         result = {
             'result': 'Applied cmdlets profile to environment configuration.'
         }
@@ -375,9 +315,6 @@ class CmdletsControls():
 
     def add_cmdlet(self, kwargs):
         """Add a new cmdlet to a given profile."""
-        # Get target folder from operations.
-        target_folder = kwargs['target_folder']
-
         # Get parameters passed to the operation.
         parameters = kwargs['data']
         try:
@@ -410,19 +347,16 @@ class CmdletsControls():
         prov_prfile = new_cmdlet['profile']
         prov_prfile_file =  prov_prfile + '-cmdlets.json'
         if prov_prfile in cmdlets_files:
-            cmdlet_file = [prov_prfile]
-            loaded_cmdlets = self._load_cmdlets_files(cmdlet_file)
-        
+            cmdlet_file = prov_prfile
+
         # Validating the name of the profile, without sufix.
         elif prov_prfile_file in cmdlets_files:
-            cmdlet_file = [prov_prfile_file]
-            loaded_cmdlets = self._load_cmdlets_files(cmdlet_file)
-        
-        # If cmdlets.json file does not exist, then create it automatically.
+            cmdlet_file = prov_prfile_file
+
+        # If cmdlets.json file does not exist, then create it automatically,
+        # the registry creates it while locked.
         elif new_cmdlet['profile'] == 'cmdlets.json':
-            loaded_cmdlets = []
-            cmdlet_file = str(self.cmdlets_folder + '/' + 'cmdlets.json')
-            self.tools.safe_create_json_file([], cmdlet_file)
+            cmdlet_file = 'cmdlets.json'
         else:
             message.append('Error: Unable to add cmdlet, unrecognized '
                            'profile... (' + new_cmdlet['profile'] + ')')
@@ -439,82 +373,40 @@ class CmdletsControls():
 
         # If status is still succeeded then apply changes.
         if result['result'] == 'Succeeded':
-            loaded_cmdlets.append(new_cmdlet)
-            self.tools.create_json_file(loaded_cmdlets, 
-                                        str(self.cmdlets_folder +
-                                        '/' +
-                                        cmdlet_file[0]))
-            self._update_env_file(target_folder+'/me.json')
+            self.registry.add(cmdlet_file, new_cmdlet)
 
         result['message'] = message
         result['cmdlet_to_add'] = new_cmdlet
 
         return json.dumps(result, indent=2)
 
-    def _update_env_file(self, file):
-        """Update the me.json file for the target."""
-        file_dict = self.tools.load_json_file(file)
-        self._gen_docs()
-        file_dict['apis']['cmdlets'] = self.endpoints
-        self.tools.create_json_file(file_dict, file)
-
     def remove_cmdlet(self, kwargs):
         """Delete the cmdlet from a given profile."""
-        target_folder = kwargs['target_folder']
-        result = []
         data = kwargs['data']
         data = json.loads(data)
         cmdlet_id = data['id']
         if not isinstance(cmdlet_id, list):
             cmdlet_id = [cmdlet_id]
-        
-        for id_ in cmdlet_id:
-            result.append(self._remove_cmdlet_id(id_))
-
-        self._update_env_file(target_folder + '/me.json')
-
-        return json.dumps(result, indent=2)
-
-    def _remove_cmdlet_id(self, id_):
-        """Find the cmdlets with the provided id."""
-        result = {}
-        cmdlets_files = self._get_cmdlets_files()
-        loaded_cmdlets = self._load_cmdlets_files(cmdlets_files)
-
-        for cmdlet in loaded_cmdlets:
-            if id_ == cmdlet['id']:
-                result = self._remove_from_file(id_, cmdlets_files)
 
-        if result == {}:
-            result = {
-                'result': 'Failed.',
-                'message': 'No cmdlets found with the provided ID... (' +  id_ + ')'    
-            }
+        removed = self.registry.remove(cmdlet_id)
 
-        return result
+        result = []
+        for id_ in cmdlet_id:
+            if id_ in removed:
+                result.append({
+                    'result': 'Succeeded.',
+                    'message': str('Found the following cmdlets with the '
+                                   'provided ID(s).'),
+                    'data': removed[id_]
+                })
+            else:
+                result.append({
+                    'result': 'Failed.',
+                    'message': str('No cmdlets found with the provided '
+                                   'ID... (' + id_ + ')')
+                })
 
-    def _remove_from_file(self, id_, file):
-        """Remove the found cmdlet from given profile."""
-        data = []
-        result = {}
-        for fil in file:
-            profile = self.cmdlets_folder + '/' + fil
-            cmdltes_profile = self.tools.load_json_file(profile)
-            result_profile = copy.copy(cmdltes_profile)
-
-            for cmd in enumerate(cmdltes_profile):
-                if id_ == cmd[1]['id']:
-                   result_profile.pop(cmd[0])
-                   removed_cmdlet = cmd[1]
-                   data.append(removed_cmdlet)
-            self.tools.create_json_file(result_profile, profile)
-        if data != []:
-            result = {
-                'result': 'Succeeded.',
-                'message': 'Found the following cmdlets with the provided ID(s).',
-                'data': data     
-            }
-        return result
+        return json.dumps(result, indent=2)
 
     def patch_cmdlet(self):
         """Adjust cmdlet with given id."""
@@ -533,81 +425,237 @@ class CmdletsControls():
             return []
         return cmdlets_files
 
-    def _load_cmdlets_files(self, cmdlets_files):
-        """Load cmdlet profile file."""
 
-        loaded_cmdlets = []
+class CmdletsRegistry():
+    """
+    Compiled registry of the cmdlets in all the profiles.
+
+    The registry (conf/cmdlets_registry.json) keeps the cmdlets of each
+    profile with the signature of the profile file, plus an index of the
+    usable cmdlets by name (name -> [profile, position]). When names are
+    duplicated, the first profile (sorted by file name) wins.
+    Profiles changed on disk are reloaded when the registry is loaded, and
+    the changes made by rbkcli (add/remove) only update the affected
+    profile, without reloading the others.
+    """
 
-        for file in cmdlets_files:
-            profile = self.tools.load_json_file(self.cmdlets_folder + '/' + file)
-            profile_final = []
-            for cmdleto in profile:
-                cmdleto['profile'] = file
-                profile_final.append(cmdleto)
-            loaded_cmdlets = loaded_cmdlets + profile_final
-        return loaded_cmdlets
-    
-    def _get_usable_cmdlets(self, loaded_cmdlets):
-        """Verify if cmdlet is uniq, return only uniq cmdlets."""
-
-        usable_cmdlets = []
-        usable_cmdlets_list = []
-        existing_cmdlets = loaded_cmdlets
-        for item in enumerate(existing_cmdlets):
-            if item[1]['name'] in usable_cmdlets_list:
-                
-                item[1]['status'] = 'duplicated'
-            else:
-                item[1]['status'] = 'usable'
-                usable_cmdlets_list.append(item[1]['name'])
-            usable_cmdlets.append(item[1])
+    FILE_NAME = 'cmdlets_registry.json'
 
-        return usable_cmdlets
+    def __init__(self, tools):
+        """Initialize the registry, it is loaded when first used."""
+        self.tools = tools
+        self.cmdlets_folder = CONSTANTS.CONF_FOLDER + '/cmdlets'
+        self.file_path = CONSTANTS.CONF_FOLDER + '/' + self.FILE_NAME
+        self.data = None
 
-    def _gen_docs(self):
-        """Create static API documentation and store to class var."""
-        # The static content defined here mimics and can easily be converted
-        # to a swagger file documentation. Possibly converting the Rbkcli to
-        # a API server.
+    def load(self):
+        """Load the registry, refreshing the profiles changed on disk."""
+        try:
+            data = self.tools.load_json_file(self.file_path)
+            profiles = data['profiles']
+            data['names'] = dict(data['names'])
+        except (RbkcliException.ToolsError, KeyError, TypeError):
+            data = {'profiles': {}, 'names': {}}
+            profiles = {}
+
+        files = self._get_cmdlets_files()
+        changed = sorted(files) != sorted(profiles)
+        data['profiles'] = {}
+        for file in files:
+            entry = profiles.get(file, {})
+            signature = self._signature(file)
+            if entry.get('signature') != signature:
+                entry = {
+                    'signature': signature,
+                    'cmdlets': self._load_profile(file)
+                }
+                changed = True
+            data['profiles'][file] = entry
+
+        self.data = data
+        if changed:
+            self._index()
+            self._save()
+
+        return self.data
+
+    def all_cmdlets(self):
+        """Return the cmdlets of all profiles, flagging duplicated names."""
+        if self.data is None:
+            self.load()
+
+        cmdlets = []
+        for file in sorted(self.data['profiles']):
+            for position, cmdlet in enumerate(
+                    self.data['profiles'][file]['cmdlets']):
+                cmdlet = dict(cmdlet)
+                cmdlet['status'] = 'duplicated'
+                if self.data['names'].get(cmdlet['name']) == [file, position]:
+                    cmdlet['status'] = 'usable'
+                cmdlets.append(cmdlet)
+
+        return cmdlets
+
+    def usable_cmdlets(self):
+        """Return the cmdlets with uniq names."""
+        if self.data is None:
+            self.load()
+
+        profiles = self.data['profiles']
+        return [profiles[file]['cmdlets'][position]
+                for file, position in self.data['names'].values()]
+
+    def gen_docs(self):
+        """Create the API documentation of the usable cmdlets."""
         doc = {
             'definitions': {},
             'paths': {}
-            }
+        }
 
-        cmdlets_files = self._get_cmdlets_files()
-        loaded_cmdlets = self._load_cmdlets_files(cmdlets_files)
-        usable_cmdlets = self._get_usable_cmdlets(loaded_cmdlets)
-
-        for line in usable_cmdlets:
-            if line['name'] != '':
-                cmd_name = line['name'].replace(' ', '/')
-                cmd_name = '/' + cmd_name
-                parameters_found = line['param'].split(',')
-                doc['paths'][cmd_name] = {
-                        'get': {
-                            'description': line['cmdlet_description'],
-                            'operationId': '',
-                            'operation': line['command'],
-                            'parameters': [],
-                            'responses': {
-                                '200': {
-                                    'description': line['response_description'],
-                                    'schema': {},
-                                    'table_order': line['table_order'],
-                                    'multiple_output': line['multiple_output']
-                                }
-                            },
-                            'summary': line['cmdlet_summary'],
-                            'tags': '',
-                            'x-group': ''
+        for line in self.usable_cmdlets():
+            if line['name'] == '':
+                continue
+            cmd_name = '/' + line['name'].replace(' ', '/')
+            doc['paths'][cmd_name] = {
+                'get': {
+                    'description': line['cmdlet_description'],
+                    'operationId': '',
+                    'operation': line['command'],
+                    'parameters': [],
+                    'responses': {
+                        '200': {
+                            'description': line['response_description'],
+                            'schema': {},
+                            'table_order': line.get('table_order', []),
+                            'multiple_output': line['multiple_output']
                         }
-                    }
-                for param in parameters_found:
-                    doc['paths'][cmd_name]['get']['parameters'].append({
-                        "in": "body",
-                        "name": line['param'],
-                        "required": True,
-                        "type": "string"
-                        })
-
-        self.endpoints = doc
+                    },
+                    'summary': line['cmdlet_summary'],
+                    'tags': '',
+                    'x-group': ''
+                }
+            }
+            for _ in line['param'].split(','):
+                doc['paths'][cmd_name]['get']['parameters'].append({
+                    'in': 'body',
+                    'name': line['param'],
+                    'required': True,
+                    'type': 'string'
+                })
+
+        return doc
+
+    def add(self, file, cmdlet):
+        """Add the cmdlet to the profile, only the profile is rewritten."""
+        # Profiles are loaded again while locked, other processes might
+        # have changed them.
+        with file_lock(self.file_path):
+            self.load()
+            cmdlet['profile'] = file
+            entry = self.data['profiles'].setdefault(file, {'cmdlets': []})
+            entry['cmdlets'].append(cmdlet)
+            self._write_profile(file)
+            # A cmdlet added to a earlier profile takes over its name.
+            self._index()
+            self._save()
+
+    def remove(self, ids):
+        """Remove the cmdlets with the ids, returns the removed per id."""
+        with file_lock(self.file_path):
+            self.load()
+            return self._remove(ids)
+
+    def _remove(self, ids):
+        """Remove the cmdlets with the ids from the loaded profiles."""
+        removed = {}
+        for file, entry in self.data['profiles'].items():
+            kept = []
+            for cmdlet in entry['cmdlets']:
+                if cmdlet['id'] in ids:
+                    removed.setdefault(cmdlet['id'], []).append(cmdlet)
+                else:
+                    kept.append(cmdlet)
+            if len(kept) != len(entry['cmdlets']):
+                entry['cmdlets'] = kept
+                self._write_profile(file)
+
+        if removed != {}:
+            self._index()
+            self._save()
+
+        return removed
+
+    def _get_cmdlets_files(self):
+        """Get list of cmdlet profile file."""
+        try:
+            return [file for file in os.listdir(self.cmdlets_folder)
+                    if file.endswith('cmdlets.json')]
+        except OSError:
+            return []
+
+    def _signature(self, file):
+        """Return the modification time and size of the profile."""
+        try:
+            stat = os.stat(self.cmdlets_folder + '/' + file)
+            return [stat.st_mtime, stat.st_size]
+        except OSError:
+            return [0, 0]
+
+    def _load_profile(self, file):
+        """Load the cmdlets of the profile, tagged with the profile."""
+        profile = self.tools.load_json_file(self.cmdlets_folder + '/' + file)
+        for cmdlet in profile:
+            cmdlet['profile'] = file
+        return profile
+
+    def _write_profile(self, file):
+        """Write the profile file and record its new signature."""
+        entry = self.data['profiles'][file]
+        self.tools.create_json_file(entry['cmdlets'],
+                                    self.cmdlets_folder + '/' + file)
+        entry['signature'] = self._signature(file)
+
+    def _index(self):
+        """Index the usable cmdlets by name, first profile wins."""
+        names = {}
+        for file in sorted(self.data['profiles']):
+            for position, cmdlet in enumerate(
+                    self.data['profiles'][file]['cmdlets']):
+                names.setdefault(cmdlet['name'], [file, position])
+        self.data['names'] = names
+
+    def _save(self):
+        """Store the registry file."""
+        try:
+            self.tools.create_json_file(self.data, self.file_path,
+                                        indent=None)
+        except RbkcliException.ToolsError as error:
+            self.tools.logger.error('CmdletsError # Unable to store cmdlets '
+                                    'registry [%s].', error)
+
+
+class CmdletsApiDoc(Mapping):
+    """Cmdlets API documentation, generated from the registry when used."""
+
+    def __init__(self, tools):
+        """Initialize the documentation, the registry is not loaded yet."""
+        self.tools = tools
+        self.doc = None
+
+    def _load_doc(self):
+        """Generate the documentation from the registry."""
+        if self.doc is None:
+            self.doc = CmdletsRegistry(self.tools).gen_docs()
+        return self.doc
+
+    def __getitem__(self, section):
+        """Return the section of the documentation."""
+        return self._load_doc()[section]
+
+    def __iter__(self):
+        """Iterate the sections of the documentation."""
+        return iter(self._load_doc())
+
+    def __len__(self):
+        """Return the amount of sections."""
+        return len(self._load_doc())
@@ -0,0 +1,270 @@
+"""Completion index module for rbkcli."""
+
+import json
+import os
+import re
+import socket
+
+from rbkcli.base.essentials import CONSTANTS
+
+
+# Endpoint segments that are path parameters, which accept any value.
+WILDCARD = re.compile(r'^{.*}$')
+
+
+class CompletionIndex():
+    """
+    Compact index of the available endpoints, used for tab completion.
+
+    The index is a trie of endpoint segments, generated with the operations
+    of the environment, so completion does not need to build a target:
+        {
+            "ops": {"vmware": {"vm": {"{id}": {"snapshot": {}}}}},
+            "versions": {"v1": {"vmware": {"vm": {...}}}}
+        }
+    """
+
+    FILE_NAME = 'completion.json'
+    SCRIPT_NAME = 'rbkcli-completion.bash'
+
+    def __init__(self, folder):
+        """Initialize the index for the provided target folder."""
+        self.folder = folder
+        self.file_path = folder + '/' + self.FILE_NAME
+        self.script_path = folder + '/' + self.SCRIPT_NAME
+
+    @staticmethod
+    def gen_trie(ops):
+        """Generate the trie from operations (version:endpoint:method...)."""
+        trie = {'ops': {}, 'versions': {}}
+        for opr in ops:
+            opr = opr.split(':')
+            segments = list(filter(None, opr[1].split('/')))
+            version_node = trie['versions'].setdefault(opr[0], {})
+            for node in [trie['ops'], version_node]:
+                for segment in segments:
+                    node = node.setdefault(segment, {})
+
+        return trie
+
+    def update(self, fingerprint, profile, ops):
+        """Store the trie of the profile, keeping other valid profiles."""
+        # Only the process updating the index loads the rbkcli tools.
+        from rbkcli.base.tools import file_lock, write_file
+
+        with file_lock(self.file_path):
+            try:
+                with open(self.file_path, 'r') as file:
+                    data = json.load(file)
+                if data['fingerprint'] != fingerprint:
+                    raise KeyError('fingerprint')
+            except (IOError, OSError, ValueError, KeyError, TypeError):
+                data = {
+                    'fingerprint': fingerprint,
+                    'profiles': {}
+                }
+
+            data['profiles'][profile] = self.gen_trie(ops)
+            write_file(self.file_path, json.dumps(data, sort_keys=True))
+
+        self._create_script(data['profiles'][profile], profile, write_file)
+
+    def load(self, profile):
+        """Load the trie of the profile, if the index is still current."""
+        try:
+            with open(self.file_path, 'r') as file:
+                data = json.load(file)
+            if gen_fingerprint(data['fingerprint']) != data['fingerprint']:
+                return {}
+            return data['profiles'][profile]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _create_script(self, trie, profile, write_file):
+        """Create a static bash completion script, for hosts without
+        argcomplete (such as the portable .pex)."""
+        lines = []
+        for version, version_trie in sorted(trie['versions'].items()):
+            lines = lines + flatten(version_trie, [version])
+        lines = flatten(trie['ops']) + lines
+
+        script = BASH_SCRIPT % {
+            'folder': self.folder,
+            'profile': profile,
+            'endpoints': '\n'.join(lines)
+        }
+        write_file(self.script_path, script)
+
+
+def complete(trie, args, incomplete):
+    """Return the next endpoint segments, matching the args provided."""
+    if args and args[0] in trie['versions']:
+        nodes = [trie['versions'][args[0]]]
+        args = args[1:]
+    else:
+        nodes = [trie['ops']]
+
+    for position, arg in enumerate(args):
+        exact = [node[arg] for node in nodes if arg in node]
+        flex = [child for node in nodes for key, child in node.items()
+                if WILDCARD.match(key) and key != arg]
+
+        # An exact match on the last argument is preferred over parameters.
+        if position == len(args) - 1 and exact != []:
+            nodes = exact
+        else:
+            nodes = exact + flex
+
+    candidates = set()
+    for node in nodes:
+        candidates.update(node.keys())
+
+    return sorted([cand for cand in candidates if cand.startswith(incomplete)])
+
+
+def complete_from_index(parsed_args, incomplete, profile='config'):
+    """
+    Complete the endpoint only reading the completion index.
+
+    Returns None if the target or its index can not be resolved from the
+    files, in which case the target has to be loaded.
+    """
+    conf = _load_json(CONSTANTS.CONF_FOLDER + '/rbkcli.conf')['config']
+    if profile == 'config':
+        profile = conf['userProfile']['value']
+        if profile not in CONSTANTS.USERS_PROFILE:
+            profile = 'admin'
+
+    env_id = _resolve_env_id(_load_server(parsed_args, conf))
+    if env_id == '':
+        return None
+
+    index = CompletionIndex(CONSTANTS.TARGETS_FOLDER + '/' + env_id)
+    trie = index.load(profile)
+    if trie == {}:
+        return None
+
+    args = getattr(parsed_args, 'api_endpoint', None) or []
+    return complete(trie, args, incomplete)
+
+
+def _load_server(parsed_args, conf):
+    """Load the target server the same way the command would."""
+    credentials = getattr(parsed_args, 'credentials', None)
+    if credentials:
+        creds = credentials[0][0].split(':')
+        if len(creds) == 4:
+            return '%s:%s' % (creds[0], creds[1])
+        return creds[0]
+
+    if conf['useCredentialsFile']['value'] == 'True':
+        file = CONSTANTS.CONF_FOLDER + '/' + conf['credentialsFile']['value']
+        try:
+            return _load_json(file)['server']
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+
+    return os.environ.get('rubrik_cdm_node_ip', '')
+
+
+def _resolve_env_id(server):
+    """Resolve the server to a environment ID with the resolution file."""
+    target = server.split(':')[0]
+    if target == '':
+        return ''
+
+    try:
+        resolution = _load_json(CONSTANTS.CONF_FOLDER +
+                                '/target_resolution.json')
+    except (IOError, OSError, ValueError):
+        return ''
+
+    def _match(name):
+        for node in resolution:
+            if node['ip'] == name or name in node.get('aliases', []):
+                return node['envId']
+        return ''
+
+    # Names are resolved with the DNS cache first, then the DNS itself.
+    env_id = _match(target)
+    if env_id == '':
+        try:
+            cache = _load_json(CONSTANTS.CONF_FOLDER + '/dns_cache.json')
+            env_id = _match(cache[target]['ip'])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            pass
+    if env_id == '':
+        try:
+            env_id = _match(str(socket.gethostbyname(target)))
+        except socket.error:
+            pass
+
+    return env_id
+
+
+def _load_json(file):
+    """Load json file."""
+    with open(file, 'r') as json_file:
+        return json.load(json_file)
+
+
+def gen_fingerprint(fingerprint):
+    """Generate the current signature of the files in a fingerprint."""
+    current = []
+    for file, _, _ in fingerprint:
+        try:
+            stat = os.stat(file)
+            current.append([file, stat.st_mtime, stat.st_size])
+        except OSError:
+            current.append([file, 0, 0])
+
+    return current
+
+
+def flatten(trie, prefix=None):
+    """Flatten the trie into the list of its endpoints."""
+    if prefix is None:
+        prefix = []
+    lines = []
+    for segment, node in sorted(trie.items()):
+        lines.append(' '.join(prefix + [segment]))
+        lines = lines + flatten(node, prefix + [segment])
+
+    return lines
+
+
+BASH_SCRIPT = r"""# rbkcli static bash completion, generated for the target in:
+# %(folder)s (user profile: %(profile)s).
+# Usage: source this file in the shell to complete rbkcli endpoints.
+
+_rbkcli_endpoints='%(endpoints)s'
+
+_rbkcli_complete() {
+    local cur="${COMP_WORDS[COMP_CWORD]}"
+    local words=("${COMP_WORDS[@]:1:COMP_CWORD-1}")
+    local line segs candidates="" i match
+
+    # Only the endpoint is completed, not the options.
+    for i in "${words[@]}"; do
+        [[ "$i" == -* ]] && return 0
+    done
+
+    while IFS= read -r line; do
+        read -ra segs <<< "$line"
+        [ ${#segs[@]} -eq $((${#words[@]} + 1)) ] || continue
+        match=1
+        for i in "${!words[@]}"; do
+            if [ "${segs[$i]}" != "${words[$i]}" ] &&
+                    [[ "${segs[$i]}" != \{*\} ]]; then
+                match=0
+                break
+            fi
+        done
+        [ $match -eq 1 ] && candidates="$candidates ${segs[${#words[@]}]}"
+    done <<< "$_rbkcli_endpoints"
+
+    COMPREPLY=($(compgen -W "$candidates" -- "$cur"))
+}
+
+complete -F _rbkcli_complete rbkcli rbkcli.pex
+"""
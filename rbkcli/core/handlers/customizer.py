@@ -4,13 +4,21 @@ from __future__ import print_function
 import os
 import json
 import sys
+import hashlib
 import pkgutil
 import importlib
+import importlib.util
 import inspect
+import signal
+import threading
+import types
+from contextlib import contextmanager
 from rbkcli.base import CONSTANTS, RbkcliException
 from rbkcli.base.essentials import DotDict
+from rbkcli.base.tools import file_lock
 from rbkcli.core.handlers import ApiTargetTools, RbkcliResponse
 from rbkcli.core.handlers.callback import CallBack
+from rbkcli.core.handlers.docstore import ApiDocStore
 
 
 class AnyApiHandler(ApiTargetTools):
@@ -57,6 +65,12 @@ class AnyApiHandler(ApiTargetTools):
 
         self.focus_list = self.filter_lists[self.user_profile]
 
+    def load_authorization_lists(self, filter_lists, focus_list):
+        """Load authorization lists previously generated for the profile."""
+        self.meta_api.doc = self.endpoints
+        self.filter_lists = filter_lists
+        self.focus_list = focus_list
+
     def import_api(self):
         """Return the generated API doc for the meta commands."""
         self._gen_docs()
@@ -107,106 +121,25 @@ class Customizer(AnyApiHandler):
         """Initialize scripts API class."""
         AnyApiHandler.__init__(self, user_profile, base_kit, 'scripts')
 
+        # Script instances reused by the calls of this run.
+        self.instances = {}
+
+    def initialize_callbacker(self, operations):
+        """Initialize call back, instances are bound to a call backer."""
+        AnyApiHandler.initialize_callbacker(self, operations)
+        self.instances = {}
+
     def _gen_docs(self):
         """Create static API documentation and store to class var."""
 
         # The static content defined here mimics and can easily be converted
         # to a swagger file documentation. Possibly converting the Rbkcli to
         # a API server.
+        manifest = ScriptsManifest(self.tools, self.scripts_folder)
+        self.meta_api.doc, self.scripts_list = manifest.gen_docs()
 
-        self.meta_api.doc = {
-            'definitions': {},
-            'paths': {}
-            }
-        self.scripts_list = []
-
-        # Define classes that are instantiable:
-
-        # intantiable_class = '(<class \'rbkcli.core.handlers.customizer.RbkCliBlackOps'
-        intantiable_class = 'rbkcli.core.handlers.customizer.RbkCliBlackOps'
-        # Get liat of folders in the path.
-        scripts_paths = [x[0] for x in os.walk(self.scripts_folder)]
-        # Iterate each folder.
-        for path in scripts_paths:
-            # print path
-            # Get a list of modules inside the folder.
-            module_path = [x[1] for x in pkgutil.iter_modules(path=[path])]
-            # print module_path
-            # Iterate each module.
-            for script in module_path:
-                # Make path tangible
-                sys.path.append(path)
-                # Import module in the path.
-                script_module = importlib.import_module(script)
-                # Get objects from the module.
-                script_members = inspect.getmembers(script_module)
-
-
-                # Iterate members of module.
-
-                for member in script_members:
-                    try:
-                        member_desc = member[1].__name__
-                        myoperation = getattr(script_module, member_desc)
-                        class_base = str(myoperation.__bases__)
-
-                    except AttributeError:
-                        continue
-
-                    # If the parent of th e class is a instantiable class
-                    if intantiable_class in str(class_base):
-                        # Create dictionary from script members
-                        script_dict = {}
-                        # Attribute values to dict
-                        for line in script_members:
-                            key, value = line
-                            script_dict[key] = value
-                        #(script_dict)
-                        # Instantiate a object of the class.
-                        instance = myoperation('', self.tools.logger)
-
-                        # Attribute values to the instance for doc gen.
-                        script = {}
-                        instance.module = script_dict['__name__']
-                        script['module'] = instance.module
-                        instance.file = script_dict['__file__']
-                        script['file'] = instance.file
-                        instance.class_name = member[0]
-                        script['class_name'] = instance.class_name
-                        script['endpoint'] = instance.endpoint
-                        script['method'] = instance.method
-
-                        self.scripts_list.append(script)
-
-                        # Generate documentation
-                        self._gen_doc_script(instance)
-                        #print(instance)
-                #exit()
         # Attribute all documentation generated to endpoints.
         self.endpoints = self.meta_api.doc
-    
-    def _gen_doc_script(self, instance):
-        """Generate the documentation for scripts found."""
-        self.meta_api.doc['paths'][instance.endpoint] = {
-        instance.method: {
-            'description': instance.description,
-            'operationId': instance.class_name,
-            'source': instance.file,
-            'operation': instance.module,
-            'parameters': instance.parameters,
-            'responses': {
-                '200': {
-                    'description': '',
-                    'schema': {},
-                    'table_order': [],
-                    'multiple_output': ''
-                }
-            },
-            'summary': instance.summary,
-            'tags': '',
-            'x-group': ''
-            }
-        }
 
     def _execute_api(self, *args):
         """Instantiate and execute script called by API."""
@@ -226,14 +159,16 @@ class Customizer(AnyApiHandler):
         api = self.meta_api.doc['paths'][endpoint_key][method]
         source = api['source'].replace('\\', '/')
 
-        sys.path.append(os.path.dirname(source))
-        mio_commando = importlib.import_module(api['operation'])
+        mio_commando = load_script_module(source)
+
+        # Instanciate the Class, once per loaded module.
+        key = (source, id(mio_commando), api['operationId'])
+        if key not in self.instances:
+            myoperation = getattr(mio_commando, api['operationId'])
+            self.instances[key] = myoperation(self.cbacker,
+                                              self.rbkcli_logger)
+        myoperation_inst = self.instances[key]
 
-        # Instanciate the Class.
-        myoperation = getattr(mio_commando, api['operationId'])
-        myoperation_inst = myoperation(self.cbacker, self.rbkcli_logger)
-        #myoperation_inst = myoperation(self.cbacker)
-        
         # Attribute the parameters to be passed to script.
         if kwargs['data'] == {}:
             data = {}
@@ -293,10 +228,14 @@ class CustomizerControls():
 
     def _update_env_file(self, file):
         """Update me.json file with newl added scripts."""
-        file_dict = self.tools.load_json_file(file)
         self._gen_docs()
-        file_dict['apis']['scripts'] = self.endpoints
-        self.tools.create_json_file(file_dict, file)
+        store = ApiDocStore(self.tools, os.path.dirname(file))
+        # Other commands might update the env file meanwhile (resync).
+        with file_lock(file):
+            file_dict = self.tools.load_json_file(file)
+            file_dict['apis']['scripts'] = store.save_version('scripts',
+                                                              self.endpoints)
+            self.tools.create_json_file(file_dict, file)
 
     def sync_scripts(self, kwargs):
         """Search for available scripts and add them as available operations."""
@@ -311,100 +250,240 @@ class CustomizerControls():
 
     def _gen_docs(self):
         """Create static API documentation and store to class var."""
-
-        # The static content defined here mimics and can easily be converted
-        # to a swagger file documentation. Possibly converting the Rbkcli to
-        # a API server.
-
-        self.meta_api.doc = {
-            'definitions': {},
-            'paths': {}
-            }
-        self.scripts_list = []
-
-        # Define classes that are instantiable:
-
-        # intantiable_class = '(<class \'rbkcli.core.handlers.customizer.RbkCliBlackOps'
-        intantiable_class = 'rbkcli.core.handlers.customizer.RbkCliBlackOps'
-        # Get liat of folders in the path.
-        scripts_paths = [x[0] for x in os.walk(self.scripts_folder)]
-        # Iterate each folder.
-        for path in scripts_paths:
-            # print path
-            # Get a list of modules inside the folder.
-            module_path = [x[1] for x in pkgutil.iter_modules(path=[path])]
-            # print module_path
-            # Iterate each module.
-            for script in module_path:
-                # Make path tangible
-                sys.path.append(path)
-                # Import module in the path.
-                script_module = importlib.import_module(script)
-                # Get objects from the module. 
-                script_members = inspect.getmembers(script_module)
-
-                # Iterate members of module.
-
-                for member in script_members:
-                    try:
-                        member_desc = member[1].__name__
-                        myoperation = getattr(script_module, member_desc)
-                        class_base = str(myoperation.__bases__)
-
-                    except AttributeError:
-                        continue
-
-                    # If the parent of th e class is a instantiable class
-                    if intantiable_class in str(class_base):
-
-                        # Create dictionary from script members
-                        script_dict = {}
-                        # Attribute values to dict
-                        for line in script_members:
-                            key, value = line
-                            script_dict[key] = value
-
-                        # Instantiate a object of the class.
-                        instance = myoperation('', self.tools.logger)
-
-                        # Attribute values to the instance for doc gen.
-                        script = {}
-                        instance.module = script_dict['__name__']
-                        script['module'] = instance.module
-                        instance.file = script_dict['__file__']
-                        script['file'] = instance.file
-                        instance.class_name = member[0]
-                        script['class_name'] = instance.class_name
-                        script['endpoint'] = instance.endpoint
-                        script['method'] = instance.method
-
-                        self.scripts_list.append(script)
-
-                        # Generate documentation
-                        self._gen_doc_script(instance)
+        manifest = ScriptsManifest(self.tools, self.scripts_folder)
+        self.meta_api.doc, self.scripts_list = manifest.gen_docs()
 
         # Attribute all documentation generated to endpoints.
         self.endpoints = self.meta_api.doc
 
-    def _gen_doc_script(self, instance):
-        """Generate documentation for the script operations."""
-        self.meta_api.doc['paths'][instance.endpoint] = {
-        instance.method: {
-            'description': instance.description,
-            'operationId': instance.class_name,
-            'source': instance.file,
-            'operation': instance.module,
-            'parameters': instance.parameters,
-            'responses': {
-                '200': {
-                    'description': '',
-                    'schema': {},
-                    'table_order': [],
-                    'multiple_output': ''
-                }
-            },
-            'summary': instance.summary,
-            'tags': '',
-            'x-group': ''
+
+class ScriptsManifest():
+    """
+    Manifest of the scripts found in the scripts folder.
+
+    Each script file is recorded with its modification time, size and hash,
+    plus the documentation of the operations (RbkCliBlackOps classes) it
+    defines. Only new or changed files are imported again, and files that
+    fail or take too long to import are recorded with the error and skipped
+    until they change.
+    """
+
+    FILE_NAME = 'scripts_manifest.json'
+    IMPORT_TIMEOUT = 10
+
+    def __init__(self, tools, scripts_folder):
+        """Initialize the manifest of the scripts folder."""
+        self.tools = tools
+        self.scripts_folder = scripts_folder
+        self.file_path = CONSTANTS.CONF_FOLDER + '/' + self.FILE_NAME
+
+    def gen_docs(self):
+        """Return the documentation and the list of the scripts found."""
+        doc = {
+            'definitions': {},
+            'paths': {}
+        }
+        scripts_list = []
+        for script in self.scan():
+            doc['paths'][script['endpoint']] = {
+                script['method']: script['doc']
             }
+            scripts_list.append({
+                'module': script['module'],
+                'file': script['file'],
+                'class_name': script['class_name'],
+                'endpoint': script['endpoint'],
+                'method': script['method']
+            })
+
+        return doc, scripts_list
+
+    def scan(self):
+        """Update the manifest with the scripts folder, returns scripts."""
+        try:
+            manifest = self.tools.load_json_file(self.file_path)
+        except RbkcliException.ToolsError:
+            manifest = {}
+        files = manifest.get('files', {})
+
+        updated = {}
+        changed = False
+        for file, module in self._find_modules():
+            stat = os.stat(file)
+            entry = files.get(file, {})
+            if (entry.get('mtime') != stat.st_mtime or
+                    entry.get('size') != stat.st_size):
+                digest = self._hash(file)
+                if entry.get('hash') != digest:
+                    entry = self._import_scripts(file, module)
+                    entry['hash'] = digest
+                entry['mtime'] = stat.st_mtime
+                entry['size'] = stat.st_size
+                changed = True
+            updated[file] = entry
+
+        # Removed scripts are dropped from the manifest.
+        if changed or set(updated) != set(files):
+            self.tools.create_json_file({'files': updated}, self.file_path)
+
+        scripts = []
+        for entry in updated.values():
+            scripts.extend(entry['scripts'])
+        return scripts
+
+    def _find_modules(self):
+        """Return the file and module name of each script found."""
+        modules = []
+        for path, _, _ in os.walk(self.scripts_folder):
+            for _, module, is_pkg in pkgutil.iter_modules(path=[path]):
+                file = path + '/' + module + '.py'
+                if is_pkg:
+                    file = path + '/' + module + '/__init__.py'
+                if os.path.isfile(file):
+                    modules.append((file, module))
+
+        return modules
+
+    @staticmethod
+    def _hash(file):
+        """Return the hash of the file content."""
+        with open(file, 'rb') as script_file:
+            return hashlib.sha1(script_file.read()).hexdigest()
+
+    def _import_scripts(self, file, module):
+        """Import the script file, returns its manifest entry."""
+        entry = {
+            'scripts': [],
+            'error': ''
         }
+        try:
+            with import_timeout(self.IMPORT_TIMEOUT):
+                script_module = load_script_module(file)
+            entry['scripts'] = self._gen_scripts(script_module, module)
+        except (Exception, SystemExit) as error:
+            entry['error'] = '%s: %s' % (type(error).__name__, error)
+            self.tools.logger.error('CustomizerError # Unable to load script'
+                                    ' [%s], skipping it. %s', file,
+                                    entry['error'])
+
+        return entry
+
+    def _gen_scripts(self, script_module, module):
+        """Document the operations defined in the script module."""
+        scripts = []
+        for class_name, member in inspect.getmembers(script_module,
+                                                     inspect.isclass):
+            # Only direct children of RbkCliBlackOps are operations.
+            if RbkCliBlackOps not in member.__bases__:
+                continue
+
+            # Instantiate a object of the class.
+            instance = member('', self.tools.logger)
+            script = {
+                'module': module,
+                'file': script_module.__file__,
+                'class_name': class_name,
+                'endpoint': instance.endpoint,
+                'method': instance.method
+            }
+            script['doc'] = {
+                'description': instance.description,
+                'operationId': class_name,
+                'source': script['file'],
+                'operation': script['module'],
+                'parameters': instance.parameters,
+                'responses': {
+                    '200': {
+                        'description': '',
+                        'schema': {},
+                        'table_order': [],
+                        'multiple_output': ''
+                    }
+                },
+                'summary': instance.summary,
+                'tags': '',
+                'x-group': ''
+            }
+            scripts.append(script)
+
+        return scripts
+
+
+# Script modules loaded by this process, per source file.
+SCRIPT_MODULES = {}
+
+# Package holding the script modules, apart from the importable modules.
+SCRIPTS_PACKAGE = 'rbkcli_scripts'
+
+
+def script_module_name(file):
+    """Return the module name of the script, unique per file path."""
+    path = os.path.abspath(file).encode()
+    return SCRIPTS_PACKAGE + '.' + hashlib.sha1(path).hexdigest()
+
+
+def load_script_module(file):
+    """
+    Load the script module, reused while the source doesn't change.
+
+    Scripts are registered under the rbkcli_scripts package, so they never
+    shadow importable modules or each other. Each script is loaded as a
+    package of its folder, modules next to it are imported relatively
+    (from . import my_helper). Scripts importing them absolutely (import
+    my_helper) still work, the folder is in sys.path while loading.
+    """
+    mtime = os.stat(file).st_mtime
+    if file in SCRIPT_MODULES and SCRIPT_MODULES[file][0] == mtime:
+        return SCRIPT_MODULES[file][1]
+
+    if SCRIPTS_PACKAGE not in sys.modules:
+        package = types.ModuleType(SCRIPTS_PACKAGE)
+        package.__path__ = []
+        sys.modules[SCRIPTS_PACKAGE] = package
+
+    name = script_module_name(file)
+    # Modules of the previous load, imported relatively, are loaded again.
+    for loaded in [key for key in sys.modules
+                   if key == name or key.startswith(name + '.')]:
+        del sys.modules[loaded]
+
+    spec = importlib.util.spec_from_file_location(
+        name, file, submodule_search_locations=[os.path.dirname(file)])
+    script_module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = script_module
+
+    path = os.path.dirname(file)
+    if file.endswith('/__init__.py'):
+        path = os.path.dirname(path)
+    sys.path.insert(0, path)
+    try:
+        spec.loader.exec_module(script_module)
+    except BaseException:
+        sys.modules.pop(name, None)
+        raise
+    finally:
+        sys.path.remove(path)
+
+    SCRIPT_MODULES[file] = (mtime, script_module)
+    return script_module
+
+
+@contextmanager
+def import_timeout(seconds):
+    """Interrupt the block after the seconds provided, where supported."""
+    if (not hasattr(signal, 'SIGALRM') or
+            threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def _interrupt(signum, frame):
+        raise RbkcliException.ApiHandlerError('Import took more than %s '
+                                              'seconds.' % seconds)
+
+    previous = signal.signal(signal.SIGALRM, _interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -0,0 +1,288 @@
+"""Documentation store module for rbkcli."""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import zlib
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from rbkcli.base import CONSTANTS, RbkcliException
+from rbkcli.base.tools import file_lock
+
+
+class ShardedSection(Mapping):
+    """
+    Read only dictionary of one documentation section (paths/definitions).
+
+    Values are spread in shard files and each shard is only loaded from disk
+    the first time one of its keys is requested.
+    """
+
+    def __init__(self, tools, folder, section, index):
+        """Initialize the section with its keys and number of shards."""
+        self.tools = tools
+        self.folder = folder
+        self.section = section
+        self.keys_list = index['keys']
+        self.keys_set = set(self.keys_list)
+        self.shards = index['shards']
+        self.loaded = {}
+
+    def __getitem__(self, key):
+        """Load the shard that holds the key and return its value."""
+        if key not in self.keys_set:
+            raise KeyError(key)
+        shard = shard_of(key, self.shards)
+        if shard not in self.loaded:
+            shard_file = '%s/%s-%s.json' % (self.folder, self.section, shard)
+            self.loaded[shard] = self.tools.load_json_file(shard_file)
+
+        return self.loaded[shard][key]
+
+    def __contains__(self, key):
+        """Verify key existence without loading any shard."""
+        return key in self.keys_set
+
+    def __iter__(self):
+        """Iterate the keys in the order they were documented."""
+        return iter(self.keys_list)
+
+    def __len__(self):
+        """Return the amount of keys in the section."""
+        return len(self.keys_list)
+
+
+class ShardedApiDoc(Mapping):
+    """Read only swagger like dictionary ('paths', 'definitions') of a API."""
+
+    def __init__(self, tools, folder):
+        """Initialize the API documentation, nothing is loaded yet."""
+        self.tools = tools
+        self.folder = folder
+        self.index = None
+        self.sections = {}
+
+    def _load_index(self):
+        """Load the index with the keys of each section."""
+        if self.index is None:
+            self.index = self.tools.load_json_file(self.folder + '/index.json')
+        return self.index
+
+    def __getitem__(self, section):
+        """Return the lazy section requested."""
+        if section not in self.sections:
+            index = self._load_index()[section]
+            self.sections[section] = ShardedSection(self.tools, self.folder,
+                                                    section, index)
+        return self.sections[section]
+
+    def __iter__(self):
+        """Iterate the available sections."""
+        return iter(self._load_index())
+
+    def __len__(self):
+        """Return the amount of sections."""
+        return len(self._load_index())
+
+
+class ApiDocStore():
+    """
+    Store the imported API documentation as a routing index plus shards.
+
+    Each API version is written to its own folder, with an index of the
+    paths and definitions it contains and shard files with ~SHARD_SIZE
+    entries each. The environment file (me.json) only keeps the routing to
+    those folders, so loading it is cheap no matter the size of the APIs.
+
+    Documentation downloaded from the targets is stored once, in a folder
+    named after its digest (~/rbkcli/apis/<digest>), and shared by all the
+    targets that route to it. A manifest per CDM version lists the digest
+    of each API version, so targets on a known version reuse it:
+        ~/rbkcli/apis/versions/5.1.2-p1.json -> {"v1": "<digest>", ...}
+    """
+
+    SHARD_SIZE = 32
+    STALE_AGE = 86400
+    SECTIONS = ['paths', 'definitions']
+
+    def __init__(self, tools, folder):
+        """Initialize the store for the provided target folder."""
+        self.tools = tools
+        self.folder = folder
+
+    @staticmethod
+    def is_routing(apis):
+        """Verify if the provided apis are routing entries or legacy docs."""
+        for version_doc in apis.values():
+            if 'shards' not in version_doc:
+                return False
+        return True
+
+    def save(self, apis, digests=None):
+        """Write all the provided API versions, returns the routing dict."""
+        if digests is None:
+            digests = {}
+        routing = {}
+        for version, version_doc in apis.items():
+            if digests.get(version, '') != '':
+                routing[version] = self.save_shared(digests[version],
+                                                    version_doc)
+            else:
+                routing[version] = self.save_version(version, version_doc)
+        return routing
+
+    def save_version(self, version, version_doc):
+        """
+        Write the shards of one API version, returns its routing entry.
+
+        Each documentation is written to its own folder, named after the
+        version and digest (apis/<version>-<digest>), aside first and moved
+        in place once complete. Commands still reading the previous folder
+        never miss a shard, previous folders are removed once older than
+        STALE_AGE seconds.
+        """
+        content = json.dumps(version_doc, sort_keys=True, default=dict)
+        name = '%s-%s' % (version,
+                          hashlib.sha1(content.encode('utf-8')).hexdigest())
+        apis_folder = self.folder + '/apis'
+        folder = apis_folder + '/' + name
+        if not os.path.isfile(folder + '/index.json'):
+            tmp_folder = '%s.%s.tmp' % (folder, os.getpid())
+            self._create_folder(tmp_folder)
+            self._write_shards(tmp_folder, version_doc)
+            try:
+                os.rename(tmp_folder, folder)
+            except OSError:
+                # Another process stored the same documentation meanwhile.
+                shutil.rmtree(tmp_folder, ignore_errors=True)
+
+        self._remove_stale(apis_folder, version, name)
+        return {'shards': 'apis/' + name}
+
+    def _remove_stale(self, apis_folder, version, current):
+        """Remove the previous folders of the version, once stale."""
+        for name in os.listdir(apis_folder):
+            if name == current or (name != version and
+                                   not name.startswith(version + '-')):
+                continue
+            folder = apis_folder + '/' + name
+            try:
+                if time.time() - os.stat(folder).st_mtime > self.STALE_AGE:
+                    shutil.rmtree(folder)
+            except OSError:
+                pass
+
+    def save_shared(self, digest, version_doc):
+        """Write the shared shards of a API documentation, if not stored."""
+        folder = CONSTANTS.APIS_FOLDER + '/' + digest
+        if not self.is_shared(digest):
+            # Shards are written aside and moved in place once complete, so
+            # other targets never route to a partial documentation.
+            tmp_folder = '%s.%s.tmp' % (folder, os.getpid())
+            self._create_folder(tmp_folder)
+            self._write_shards(tmp_folder, version_doc)
+            try:
+                os.rename(tmp_folder, folder)
+            except OSError:
+                # Another process stored the same documentation meanwhile.
+                shutil.rmtree(tmp_folder, ignore_errors=True)
+
+        return {'shards': os.path.relpath(folder, self.folder)}
+
+    @staticmethod
+    def is_shared(digest):
+        """Verify if the documentation with the digest is already stored."""
+        return os.path.isfile(CONSTANTS.APIS_FOLDER + '/' + digest +
+                              '/index.json')
+
+    def load_shared(self, digest):
+        """Return the lazy shared documentation with the digest."""
+        return ShardedApiDoc(self.tools, CONSTANTS.APIS_FOLDER + '/' + digest)
+
+    def load_imported(self, digest):
+        """Return the shared documentation with the digest, or None."""
+        if not self.is_shared(digest):
+            return None
+        return self.load_shared(digest)
+
+    @staticmethod
+    def shared_digests(apis):
+        """Return the digest of each loaded API version that is shared."""
+        shared = os.path.abspath(CONSTANTS.APIS_FOLDER)
+        digests = {}
+        for version, version_doc in apis.items():
+            folder = os.path.abspath(getattr(version_doc, 'folder', ''))
+            if os.path.dirname(folder) == shared:
+                digests[version] = os.path.basename(folder)
+        return digests
+
+    def load_manifest(self, cdm_version):
+        """Return the digest per API version known for the CDM version."""
+        if cdm_version == '':
+            return {}
+        try:
+            return self.tools.load_json_file(manifest_of(cdm_version))
+        except RbkcliException.ToolsError:
+            return {}
+
+    def update_manifest(self, cdm_version, digests):
+        """Add the digests of the API versions to the CDM version manifest."""
+        if cdm_version == '' or digests == {}:
+            return
+        self._create_folder(CONSTANTS.APIS_FOLDER + '/versions')
+        with file_lock(manifest_of(cdm_version)):
+            manifest = self.load_manifest(cdm_version)
+            manifest.update(digests)
+            self.tools.create_json_file(manifest, manifest_of(cdm_version))
+
+    def _create_folder(self, folder):
+        """Create the folder or raise a error."""
+        if not self.tools.safe_create_folder(folder):
+            msg = 'Unable to create API documentation folder [%s].' % folder
+            raise RbkcliException.ToolsError(msg)
+
+    def _write_shards(self, folder, version_doc):
+        """Write the shards and index of one API documentation."""
+        index = {}
+        for section in self.SECTIONS:
+            section_doc = version_doc.get(section, {})
+            keys = list(section_doc.keys())
+            shards = max(1, -(-len(keys) // self.SHARD_SIZE))
+            shard_docs = [{} for _ in range(shards)]
+            for key in keys:
+                shard_docs[shard_of(key, shards)][key] = section_doc[key]
+            for shard, shard_doc in enumerate(shard_docs):
+                shard_file = '%s/%s-%s.json' % (folder, section, shard)
+                self.tools.create_json_file(shard_doc, shard_file, indent=None)
+            index[section] = {
+                'keys': keys,
+                'shards': shards
+            }
+
+        # The index is written last, so it only points to complete shards.
+        self.tools.create_json_file(index, folder + '/index.json', indent=None)
+
+    def load(self, routing):
+        """Return the lazy documentation of each API version routed."""
+        apis = {}
+        for version, entry in routing.items():
+            apis[version] = ShardedApiDoc(self.tools,
+                                          self.folder + '/' + entry['shards'])
+        return apis
+
+
+def shard_of(key, shards):
+    """Return the shard number where a key is stored."""
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+def manifest_of(cdm_version):
+    """Return the path of the manifest of a CDM version."""
+    return '%s/versions/%s.json' % (CONSTANTS.APIS_FOLDER,
+                                    cdm_version.replace('/', '_'))
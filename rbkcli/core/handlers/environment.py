@@ -1,10 +1,22 @@
 """Environment handler module for rbkcli."""
 
 import os
+import time
 
 from rbkcli.base import CONSTANTS, RbkcliException
+from rbkcli.base.registry import TargetRegistry
+from rbkcli.base.tools import file_lock
 from rbkcli.core.handlers import ApiTargetTools
-from rbkcli.core.handlers.operations import OperationsHandler
+from rbkcli.core.handlers import meta
+from rbkcli.core.handlers.cmdlets import CmdletsApiDoc
+from rbkcli.core.handlers.completion import CompletionIndex
+from rbkcli.core.handlers.docstore import ApiDocStore
+from rbkcli.core.handlers.operations import (OperationsHandler,
+                                              prefetch_api_docs)
+
+# Seconds before a failed check of the target version is retried, doubled
+# at every failure up to the check interval.
+SYNC_RETRY = 60
 
 
 class EnvironmentHandler(ApiTargetTools):
@@ -22,6 +34,14 @@ class EnvironmentHandler(ApiTargetTools):
         self.env = self.dot_dict()
         self.env.file_name = 'me.json'
 
+        # Dictionary of the compiled operations index, stored next to env.
+        self.index = self.dot_dict()
+        self.index.file_name = 'ops_index.json'
+
+        # Dictionary of the target version and API docs last synced.
+        self.sync = self.dot_dict()
+        self.sync.file_name = 'sync.json'
+
         # Dictionary of loading resolution file.
         self.resolution = self.dot_dict()
         self.resolution.file_name = 'target_resolution.json'
@@ -49,7 +69,8 @@ class EnvironmentHandler(ApiTargetTools):
         swagger.yaml previously acquired.
 
         -cache/
-        # Folder that contains cached commands, when requestd.
+        # Optional folder that contains the cached GET responses, created
+        when the response cache is used (see ResponseCache).
 
         After loaded the environment needs to pass the synch check, which
         confirms that the current version is the same as the one the env was
@@ -75,8 +96,10 @@ class EnvironmentHandler(ApiTargetTools):
                 raise Exception
 
         # Once the environment is successfully loaded the available -
-        # operations are generated.
-        self.operations.generate_ops()
+        # operations are generated, unless they came from a compiled index.
+        if not self.operations.compiled:
+            self.operations.generate_ops()
+            self._update_ops_index()
 
         return self.operations
 
@@ -90,8 +113,9 @@ class EnvironmentHandler(ApiTargetTools):
         if not self._is_loadable():
             return False
 
-        # if not self._is_current():
-        #    return False
+        # Re-import the APIs changed by a upgrade, checked periodically.
+        if not self._is_current():
+            return False
 
         # Will get the APIs from the file and instantiate a Operation.
         if not self._is_exportable():
@@ -100,11 +124,12 @@ class EnvironmentHandler(ApiTargetTools):
         return True
 
     def _is_resolvable(self):
-        """Check if resolution file exists and returns valid results."""
-        # Attempts to load the resolution file.
+        """Check if resolution registry loads and returns valid results."""
+        # Attempts to load the registry, synchronized with resolution file.
+        self.resolution.registry = TargetRegistry(self.tools)
         try:
-            self.resolution.data = self.tools.load_json_file(
-                self.resolution.file_path)
+            if not self.resolution.registry.load():
+                raise RbkcliException.ToolsError('No targets registered.')
         except RbkcliException.ToolsError as error:
 
             # If fails log and error, attempts to recreate file.
@@ -117,14 +142,10 @@ class EnvironmentHandler(ApiTargetTools):
                        self.resolution.file_name,
                        self.resolution.file_name))
             self.rbkcli_logger.error(msg)
-            self._recreate_resolution_file()
 
-            # After recreation tries to load again.
+            # Recreates the registry and tries to load it again.
             try:
-                self.resolution.data = self.tools.load_json_file(
-                    self.resolution.file_path)
-
-            # If it fails, return false.
+                self._recreate_resolution_file()
             except RbkcliException.ToolsError as error:
                 msg = str('%s %s.' % ('EnvironmentHandlerError # Unable to '
                                       'resolve target.', error))
@@ -142,38 +163,20 @@ class EnvironmentHandler(ApiTargetTools):
         known environment ID.
         """
         # If target is resolved, env_id will be loaded with a UUID.
-        self.env.id = ''
         target_ip = self.target.split(':')
         target_ip = target_ip[0]
 
-        # Go through resoltuion data and match the target with registry.
-        if self.resolution.data != '' and self.resolution.data != []:
-            for node in self.resolution.data:
-                if node['ip'] == target_ip:
-                    # First resolution found is returned.
-                    self.env.id = node['envId']
-
-                    # Logs successfull target-environment resolution.
-                    msg = str('Target # Successfully resolved target [' +
-                              self.target + '] into environment ID [' +
-                              self.env.id + ']')
-                    self.rbkcli_logger.debug(msg)
-
-                    # Return success.
-                    return True
-                for alias in node['aliases']:
-                    if alias == target_ip:
-                        # First resolution found is returned.
-                        self.env.id = node['envId']
-
-                        # Logs successfull target-environment resolution.
-                        msg = str('Target # Successfully resolved target [' +
-                                  self.target + '] into environment ID [' +
-                                  self.env.id + ']')
-                        self.rbkcli_logger.debug(msg)
+        # Node IPs and aliases are indexed, first registered node wins.
+        self.env.id = self.resolution.registry.resolve(target_ip)
+        if self.env.id != '':
+            # Logs successfull target-environment resolution.
+            msg = str('Target # Successfully resolved target [' +
+                      self.target + '] into environment ID [' +
+                      self.env.id + ']')
+            self.rbkcli_logger.debug(msg)
 
-                        # Return success.
-                        return True
+            # Return success.
+            return True
 
         # Logs unsuccessfull target-environment resolution.
         msg = str('TargetError # Failed to resolve the target IP into a'
@@ -217,9 +220,39 @@ class EnvironmentHandler(ApiTargetTools):
                   self.env.file_name + ']')
         self.rbkcli_logger.debug(msg)
 
+        # Route the API documentation to its shards, only for own target.
+        if file_path == '':
+            self._load_env_apis(file_dict)
+
         # Assuming it succeeds, return if what is loaded is valid.
         return self._is_valid()
 
+    def _load_env_apis(self, file_dict):
+        """Replace the routing of the API documentation with lazy docs."""
+        store = ApiDocStore(self.tools, self.env.folder)
+
+        # Environment files created by previous versions contain the whole
+        # documentation, migrate them to the sharded store.
+        # Another command might have migrated it meanwhile, the file is
+        # read again while locked.
+        if not store.is_routing(self.env.apis):
+            with file_lock(self.env.file_path):
+                file_dict = self.tools.load_json_file(self.env.file_path)
+                if not store.is_routing(file_dict['apis']):
+                    msg = str('Target # Migrating API documentation in [' +
+                              self.env.file_name + '] to sharded store.')
+                    self.rbkcli_logger.debug(msg)
+                    file_dict['apis'] = store.save(file_dict['apis'])
+                    self.tools.create_json_file(file_dict,
+                                                self.env.file_path)
+
+        self.env.apis = store.load(file_dict['apis'])
+
+        # Cmdlets are documented from the cmdlets registry, which follows the
+        # changes to the profiles without rewriting the environment file.
+        if 'cmdlets' in self.env.apis:
+            self.env.apis['cmdlets'] = CmdletsApiDoc(self.tools)
+
     def _is_valid(self):
         """Verify bare minimun requirements for a env file."""
         # Checks if env file contains the needed keys.
@@ -231,25 +264,279 @@ class EnvironmentHandler(ApiTargetTools):
 
     def _is_current(self):
         """Discover target and confirm if loaded version is current."""
-        # Check this out.
-        if not self._is_discoverable():
-            raise Exception('Connection error')
+        # The target is only requested once per check interval, not at every
+        # command, and never while completing a command.
+        self.sync.file_path = self.env.folder + '/' + self.sync.file_name
+        try:
+            self.sync.data = self.tools.load_json_file(self.sync.file_path)
+        except RbkcliException.ToolsError:
+            self._seed_sync_file()
+
+        interval = self.conf_dict['config'].get('syncCheckInterval', {})
+        try:
+            interval = int(interval.get('value', '3600'))
+        except ValueError:
+            interval = 3600
+        checked = self.sync.data.get('checked', 0)
+        failures = self.sync.data.get('failures', 0)
+        if failures > 0:
+            interval = min(interval, SYNC_RETRY * 2 ** (failures - 1))
+        if (interval < 0 or self.base_kit.workflow == 'complete' or
+                time.time() - checked < interval):
+            return True
+
+        try:
+            discovery = self.discovery.action()
+            version = discovery[0].get('version', '')
+        except (RbkcliException.ApiRequesterError,
+                RbkcliException.ApiHandlerError, IndexError, KeyError,
+                TypeError) as error:
+            msg = str('TargetError # Unable to verify target version, using '
+                      'cached APIs [%s].' % error)
+            self.rbkcli_logger.warning(msg)
+            self._update_sync_file(failed=True)
+            return True
 
-        # Verify discovered data versus loaded data.
-        # THIS CANNOT BE PERFORMED AT EVERY COMMAND.
+        if version != self.sync.data.get('version'):
+            msg = str('Target # Target version changed from [%s] to [%s], '
+                      'importing changed APIs.' %
+                      (self.sync.data.get('version', ''), version))
+            self.rbkcli_logger.info(msg)
+            try:
+                self._resync(discovery)
+            except (RbkcliException.ApiRequesterError,
+                    RbkcliException.ApiHandlerError,
+                    RbkcliException.ToolsError) as error:
+                msg = str('TargetError # Unable to import changed APIs, '
+                          'using cached APIs [%s].' % error)
+                self.rbkcli_logger.error(msg)
+                self._update_sync_file(failed=True)
+                return True
+
+        self.sync.data['version'] = version
+        self._update_sync_file()
 
         return True
 
+    def _seed_sync_file(self):
+        """
+        Create the sync file from the APIs already imported.
+
+        Environments created before the sync file existed are checked from
+        the version they were discovered with, instead of importing all the
+        APIs again at the next command.
+        """
+        self.sync.data = {
+            'digests': ApiDocStore.shared_digests(self.env.apis)
+        }
+        try:
+            self.sync.data['version'] = self.env.discovery[0]['version']
+        except (AttributeError, IndexError, KeyError, TypeError):
+            pass
+        self._update_sync_file()
+
+    def _resync(self, discovery):
+        """Re-import only the API versions whose documentation changed."""
+        handlers = []
+        for version in CONSTANTS.SUPPORTED_API_VERSIONS:
+            handler = self.api_handler(self.auth, version)
+            if handler.remote:
+                handlers.append(handler)
+        self._load_shared_apis(handlers, discovery[0].get('version', ''))
+        store = ApiDocStore(self.tools, self.env.folder)
+        prefetch_api_docs(handlers, self.env.folder + '/api_docs',
+                          store.load_imported)
+
+        with file_lock(self.env.file_path):
+            self._resync_apis(discovery, handlers)
+
+    def _resync_apis(self, discovery, handlers):
+        """Store the changed API versions, with the env file locked."""
+        store = ApiDocStore(self.tools, self.env.folder)
+        file_dict = self.tools.load_json_file(self.env.file_path)
+        digests = self.sync.data.setdefault('digests', {})
+        changed = []
+        for handler in handlers:
+            version = handler.version
+            endpoints = handler.import_api()
+            if endpoints == {} or digests.get(version) == handler.doc_digest:
+                continue
+
+            # Log the difference of endpoints, the previous keys only require
+            # the index of the version.
+            old_paths = set(self.env.apis.get(version, {}).get('paths', {}))
+            new_paths = set(endpoints['paths'])
+            msg = str('Target # Imported API [%s], endpoints added [%s], '
+                      'removed [%s].' % (version, len(new_paths - old_paths),
+                                         len(old_paths - new_paths)))
+            self.rbkcli_logger.debug(msg)
+
+            file_dict['apis'][version] = store.save_shared(
+                handler.doc_digest, endpoints)
+            if version not in file_dict['imported_api_v']:
+                file_dict['imported_api_v'].append(version)
+            digests[version] = handler.doc_digest
+            changed.append(version)
+
+        # Only a changed environment file regenerates the operations index
+        # and completion data, unchanged versions keep their shards.
+        if changed != []:
+            file_dict['discovery'] = discovery
+            self.tools.create_json_file(file_dict, self.env.file_path)
+            self._is_loadable()
+
+        store.update_manifest(discovery[0].get('version', ''),
+                              self._gen_digests(handlers))
+
+    def _load_shared_apis(self, handlers, cdm_version):
+        """Reuse the API docs already imported for the same CDM version."""
+        store = ApiDocStore(self.tools, self.env.folder)
+        manifest = store.load_manifest(cdm_version)
+        for handler in handlers:
+            if not getattr(handler, 'remote', False):
+                continue
+            digest = manifest.get(handler.version, '')
+            if digest == '' or not store.is_shared(digest):
+                continue
+            handler.endpoints = store.load_shared(digest)
+            handler.doc_digest = digest
+            handler.doc_imported = True
+            msg = str('Target # Reusing API [%s] imported for CDM version '
+                      '[%s].' % (handler.version, cdm_version))
+            self.rbkcli_logger.debug(msg)
+
+    @staticmethod
+    def _gen_digests(handlers):
+        """Return the digest of the API docs imported by each handler."""
+        digests = {}
+        for handler in handlers:
+            if getattr(handler, 'doc_digest', '') != '':
+                digests[handler.version] = handler.doc_digest
+        return digests
+
+    def _update_sync_file(self, handlers=None, failed=False):
+        """
+        Store the time of the check, version and API docs digests.
+
+        Failed checks are counted, to retry them sooner than the interval.
+        """
+        self.sync.data['checked'] = time.time()
+        if failed:
+            self.sync.data['failures'] = self.sync.data.get('failures', 0) + 1
+        else:
+            self.sync.data.pop('failures', None)
+        if handlers is not None:
+            self.sync.data['digests'] = self._gen_digests(handlers)
+
+        try:
+            self.tools.create_json_file(self.sync.data, self.sync.file_path)
+        except RbkcliException.ToolsError as error:
+            msg = str('TargetError # Unable to store sync file [%s].' % error)
+            self.rbkcli_logger.error(msg)
+
     def _is_exportable(self):
         """Export the loaded Api data to Operations Handler."""
         self.operations = OperationsHandler(self.base_kit,
                                             self.env.imported_api_v)
-        self.operations.export_apis(self.env.apis)
+
+        # Reuse the compiled ops if environment and config are unchanged.
+        compiled = self._load_ops_index()
+        if compiled:
+            self.operations.export_compiled_ops(self.env.apis, compiled)
+        else:
+            self.operations.export_apis(self.env.apis)
 
         # Provide APIs to metacommands for.
         self.operations.handler.rbkcli.all_apis = self.env.apis
         return True
 
+    def _gen_index_fingerprint(self):
+        """Generate the signature of the files the ops index derives from."""
+        files = [self.env.file_path,
+                 CONSTANTS.CONF_FOLDER + '/rbkcli.conf',
+                 meta.__file__]
+
+        # Cmdlets profiles also change the available operations.
+        cmdlets_folder = CONSTANTS.CONF_FOLDER + '/cmdlets'
+        if os.path.isdir(cmdlets_folder):
+            for file in sorted(os.listdir(cmdlets_folder)):
+                if file.endswith('cmdlets.json'):
+                    files.append(cmdlets_folder + '/' + file)
+
+        fingerprint = []
+        for file in files:
+            try:
+                stat = os.stat(file)
+                fingerprint.append([file, stat.st_mtime, stat.st_size])
+            except OSError:
+                fingerprint.append([file, 0, 0])
+
+        return fingerprint
+
+    def _load_ops_index(self):
+        """Load the compiled ops for the user profile, if still valid."""
+        self.index.file_path = self.env.folder + '/' + self.index.file_name
+        try:
+            self.index.data = self.tools.load_json_file(self.index.file_path)
+            if self.index.data['fingerprint'] != self._gen_index_fingerprint():
+                raise KeyError('fingerprint')
+            compiled = self.index.data['profiles'][self.user_profile]
+
+        except (RbkcliException.ToolsError, KeyError, TypeError) as error:
+            msg = str('Target # Compiled ops index not usable [%s], '
+                      'generating list of operations.' % error)
+            self.rbkcli_logger.debug(msg)
+            return {}
+
+        msg = str('Target # Successfully loaded compiled ops index: [' +
+                  self.index.file_name + ']')
+        self.rbkcli_logger.debug(msg)
+        return compiled
+
+    def _update_ops_index(self):
+        """Store the generated ops for the user profile in the index file."""
+        self.index.file_path = self.env.folder + '/' + self.index.file_name
+        fingerprint = self._gen_index_fingerprint()
+
+        # Keep compiled profiles only if they derive from the same files.
+        if ('data' not in self.index.keys() or
+                not isinstance(self.index.data, dict) or
+                self.index.data.get('fingerprint') != fingerprint):
+            self.index.data = {
+                'fingerprint': fingerprint,
+                'profiles': {}
+            }
+
+        compiled = self.operations.compile_ops()
+
+        # Other processes might have compiled other profiles meanwhile, the
+        # index is read again while holding the lock.
+        try:
+            with file_lock(self.index.file_path):
+                try:
+                    data = self.tools.load_json_file(self.index.file_path)
+                    if data.get('fingerprint') == fingerprint:
+                        self.index.data = data
+                except (RbkcliException.ToolsError, AttributeError):
+                    pass
+                self.index.data['profiles'][self.user_profile] = compiled
+                self.tools.create_json_file(self.index.data,
+                                            self.index.file_path, indent=None)
+        except (RbkcliException.ToolsError, IOError, OSError) as error:
+            msg = str('TargetError # Unable to store compiled ops index '
+                      '[%s].' % error)
+            self.rbkcli_logger.error(msg)
+
+        # Completion only reads its own index, it never builds the target.
+        try:
+            CompletionIndex(self.env.folder).update(fingerprint,
+                                                    self.user_profile,
+                                                    self.operations.ops)
+        except (IOError, OSError) as error:
+            msg = str('TargetError # Unable to store completion index '
+                      '[%s].' % error)
+            self.rbkcli_logger.error(msg)
+
     def create(self):
         """Create environmental file by getting uniq identifier."""
         # Based in the pre-loaded discovery dictionary:
@@ -267,8 +554,26 @@ class EnvironmentHandler(ApiTargetTools):
             msg = 'Unable to create new target folder.'
             raise RbkcliException.ClusterError(msg)
 
-        # Assuming the imports worked fine, we create the env file
-        self.tools.create_json_file(self.env, self.env.file_path)
+        # Assuming the imports worked fine, we store the API documentation
+        # and create the env file routing to it.
+        # Documentation downloaded from the target is shared by its digest
+        # with the targets on the same CDM version.
+        handlers = list(self.operations.handler.values())
+        digests = self._gen_digests(handlers)
+        cdm_version = self.env.discovery[0].get('version', '')
+        store = ApiDocStore(self.tools, self.env.folder)
+        env_file = dict(self.env)
+        with file_lock(self.env.file_path):
+            env_file['apis'] = store.save(self.env.apis, digests)
+            self.tools.create_json_file(env_file, self.env.file_path)
+        store.update_manifest(cdm_version, digests)
+
+        # Record the target version the APIs were imported from.
+        self.sync.file_path = self.env.folder + '/' + self.sync.file_name
+        self.sync.data = {
+            'version': cdm_version
+        }
+        self._update_sync_file(handlers)
 
         # Assuming the creation of the environment completed successfully we
         # update/create the target resolution file.
@@ -333,7 +638,11 @@ class EnvironmentHandler(ApiTargetTools):
         try:
             spt_api_v = CONSTANTS.SUPPORTED_API_VERSIONS
             self.operations = OperationsHandler(self.base_kit, spt_api_v)
-            self.env.apis = self.operations.import_apis()
+            self._load_shared_apis(self.operations.handler.values(),
+                                   self.env.discovery[0].get('version', ''))
+            store = ApiDocStore(self.tools, self.env.folder)
+            self.env.apis = self.operations.import_apis(
+                self.env.folder + '/api_docs', store.load_imported)
             self.env.imported_api_v = self.operations.instantiated_api_versions
 
             # Provide APIs to metacommands for listing commands.
@@ -352,40 +661,31 @@ class EnvironmentHandler(ApiTargetTools):
 
 
     def _update_resolution_file(self):
-        """Update target_resolution file with newly discovered nodes."""
-        # Run is resolvable to load/recreate existing resolution data.
-        # Attempts to load the resolution file.
-        try:
-            self.resolution.data = self.tools.load_json_file(
-                self.resolution.file_path)
-        except RbkcliException.ToolsError:
-            self.resolution.data = []
-
-        # Loop through targets returned during discovery.
-        for target in self.env.discovery:
-            target_resolution = self.dot_dict()
-            target_resolution.id = target['id']
-            target_resolution.ip = target['ip']
-            target_resolution.envId = target['envId']
-            target_resolution.envName = target['envName']
-            target_resolution.aliases = []
-            self.resolution.data.append(target_resolution)
-
-        # Remove any duplicated entry:
-        data = self.resolution.data
-        self.resolution.data = [
-            i for n,
-            i in enumerate(data) if i not in data[n + 1:]
-        ]
-
-        # Recreate resolution file with the validated uniq values
-        self.tools.create_json_file(self.resolution.data,
-                                    self.resolution.file_path)
+        """Update target registry with newly discovered nodes."""
+        if 'registry' not in self.resolution.keys():
+            self.resolution.registry = TargetRegistry(self.tools)
+            self.resolution.registry.load()
+
+        # Nodes already registered are kept, with their aliases.
+        self.resolution.registry.add(self._gen_resolution(self.env.discovery))
+
+    @staticmethod
+    def _gen_resolution(discovery):
+        """Return the resolution entries of the discovered nodes."""
+        nodes = []
+        for target in discovery:
+            nodes.append({
+                'id': target['id'],
+                'ip': target['ip'],
+                'envId': target['envId'],
+                'envName': target['envName'],
+                'aliases': []
+            })
+        return nodes
 
     def _recreate_resolution_file(self):
-        """Load all cached environments and recreates the resolution file."""
-        # If recreation was asked, resolution data will be reloaded.
-        self.resolution.data = []
+        """Load all cached environments and recreates the registry."""
+        nodes = []
 
         # Verify if target folders exists.
         if os.path.isdir(CONSTANTS.TARGETS_FOLDER):
@@ -401,8 +701,13 @@ class EnvironmentHandler(ApiTargetTools):
                         self.tools.is_valid_uuid(directories) and
                         os.path.isfile(me_file)):
                     try:
-                        # Will try to load and update the resolution file.
-                        self._is_loadable(me_file)
-                        self._update_resolution_file()
-                    except Exception:
-                        raise Exception
+                        # Only the discovery is needed, not the APIs.
+                        env = self.tools.load_json_file(me_file)
+                        nodes = nodes + self._gen_resolution(env['discovery'])
+                    except (RbkcliException.ToolsError, KeyError) as error:
+                        msg = str('TargetError # Unable to load [%s] %s' %
+                                  (me_file, error))
+                        self.rbkcli_logger.error(msg)
+
+        # All nodes are registered in one transaction.
+        self.resolution.registry.add(nodes)
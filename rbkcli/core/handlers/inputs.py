@@ -87,9 +87,10 @@ class InputHandler(ApiTargetTools):
             raise RbkcliException.RbkcliError(error)
 
         # Assuming validation was completed successfully, logging n returning.
-        msg = str('Rbkcli # Validation succeeded for provided arguments [%s]'
-                  % self.req_ops.simple_dict_natural())
-        self.rbkcli_logger.debug(msg)
+        if self.rbkcli_logger.is_enabled('debug'):
+            self.rbkcli_logger.debug('Rbkcli # Validation succeeded for '
+                                     'provided arguments [%s]',
+                                     self.req_ops.simple_dict_natural())
         return self.req
 
     def _is_valid_endpoint(self):
@@ -300,6 +301,4 @@ class InputHandler(ApiTargetTools):
         """Create instance request as dot dict."""
         for key in req.keys():
             self.req[key] = req[key]
-            if key == 'documentation_objct':
-                req[key] = ''
         self.req_ops = self.json_ops(req)
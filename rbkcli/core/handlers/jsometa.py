@@ -617,6 +617,7 @@ class JsonLooper(JsonEditor):
         if content == {}:
             return []
 
+        apis_to_run = []
         for i in enumerate(content[self.loop_key[0]]):
             # For each provided key replace them in the next API to run.
             api_to_run1 = api_to_run
@@ -629,9 +630,10 @@ class JsonLooper(JsonEditor):
             # If any signs are let move them to new level.
             api_to_run1 = api_to_run1.replace('{', start_sign)
             api_to_run1 = api_to_run1.replace('}', end_sign)
+            apis_to_run.append(api_to_run1)
 
-            # Call the API
-            result_dict = self.cbacker.call_back(api_to_run1)
+        # Call the APIs concurrently, results come in the same order.
+        for result_dict in self.cbacker.call_back_many(apis_to_run):
             result_dict = json.loads(result_dict.text)
 
             # Recreate the result adding the loop keys.
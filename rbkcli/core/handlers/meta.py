@@ -74,6 +74,12 @@ class MetaCmds(ApiTargetTools):
 
         self.focus_list = self.filter_lists[self.user_profile]
 
+    def load_authorization_lists(self, filter_lists, focus_list):
+        """Load authorization lists previously generated for the profile."""
+        self.endpoints = self.meta_api.doc
+        self.filter_lists = filter_lists
+        self.focus_list = focus_list
+
     def import_api(self):
         """Return the generated API doc for the meta commands."""
         return self.meta_api.doc
@@ -1,6 +1,14 @@
 """Operations Handler module for rbkcli."""
 
+import json
+
+from rbkcli.base.api import conf_number
+from rbkcli.base.engine import execute_many
+from rbkcli.base.essentials import DotDict
+from rbkcli.base.tools import CONFIG_PROVIDER
 from rbkcli.core.handlers import ApiTargetTools, RbkcliResponse
+from rbkcli.core.handlers.cache import (RequestMemo, ResponseCache,
+                                        endpoint_ttl)
 from rbkcli.core.handlers.meta import MetaCmds
 from rbkcli.core.handlers.cmdlets import Cmdlets
 from rbkcli.core.handlers.customizer import Customizer
@@ -52,6 +60,18 @@ class OperationsHandler(ApiTargetTools):
         self.apis_to_instantiate = apis_to_instantiate
         self.instantiated_api_versions = []
 
+        # Flag if the ops were exported from a previously compiled index.
+        self.compiled = False
+
+        # Memoized documentation per version, endpoint and method.
+        self.resolved_docs = {}
+
+        # Cache of GET responses, created when first used.
+        self.response_cache = None
+
+        # Memo of the GET responses of the command being run.
+        self.memo = RequestMemo(self.rbkcli_logger)
+
         # Perform the instantiation.
         self._instantiate_api_handlers()
 
@@ -96,9 +116,63 @@ class OperationsHandler(ApiTargetTools):
         # Create list of successfully instantiated API.
         self.instantiated_api_versions.append(version)
 
-    @Decorators.version_looper
-    def import_apis(self, *version):
+    def export_compiled_ops(self, loaded_apis, compiled):
+        """Export to handlers the apis and ops from a compiled index."""
+        for version in self.apis_to_instantiate:
+            # Get loaded API as external dict argument and load to handler.
+            self.handler[version].endpoints = loaded_apis[version]
+
+            # Reuse the endpoints lists compiled for this user profile.
+            self.handler[version].load_authorization_lists(
+                compiled['filter_lists'][version],
+                compiled['focus_lists'][version])
+
+            # Create list of successfully instantiated API.
+            self.instantiated_api_versions.append(version)
+
+        self.raw_ops = compiled['raw_ops']
+        self.ops = compiled['ops']
+        self.compiled = True
+
+        # Passing all available cmds to meta cmds handler.
+        self.handler['rbkcli'].store_all_ops(self.ops)
+
+        # Log Successfull action.
+        msg = str('Target # Successfully loaded compiled list of authorized '
+                  'endpoints for user profile: [' + self.user_profile + ']')
+        self.rbkcli_logger.debug(msg)
+
+    def compile_ops(self):
+        """Return the generated ops state, so it can be stored as index."""
+        compiled = {
+            'filter_lists': {},
+            'focus_lists': {},
+            'raw_ops': self.raw_ops,
+            'ops': self.ops
+        }
+        for version in self.instantiated_api_versions:
+            compiled['filter_lists'][version] = dict(
+                self.handler[version].filter_lists)
+            compiled['focus_lists'][version] = self.handler[version].focus_list
+
+        return compiled
+
+    def import_apis(self, docs_folder='', doc_loader=None):
         """Import the Apis that were instantiated."""
+        # Documentation downloaded from the target is fetched concurrently,
+        # then all versions are imported in order as before.
+        self._prefetch_api_docs(docs_folder, doc_loader)
+        return self._import_apis()
+
+    def _prefetch_api_docs(self, docs_folder, doc_loader=None):
+        """Download the documentation of the remote versions in parallel."""
+        prefetch_api_docs([self.handler[version]
+                           for version in self.apis_to_instantiate],
+                          docs_folder, doc_loader)
+
+    @Decorators.version_looper
+    def _import_apis(self, *version):
+        """Import the Apis that were instantiated, per version."""
         # Avoid linting issues
         version = version[0]
 
@@ -182,53 +256,231 @@ class OperationsHandler(ApiTargetTools):
                         self.handler[version[0]].focus_list.remove(operation)
                         self.ops.remove(operation)
 
-    def execute(self, req):
-        """Request execution of operation to ApiHandler."""
+    def execute(self, req, fresh=False):
+        """
+        Request execution of operation to ApiHandler.
+
+        Identical GET requests of the command are only sent once, unless
+        fresh is requested (polling a status), which always reaches the
+        target and memoizes the new response.
+        """
         # Attribute request dictionary.
         self.req = req
 
+        memo_key = self._memo_key(req)
+        if memo_key is not None and not fresh:
+            return self.memo.request(memo_key, lambda: self._execute(req))
+
+        api_result = self._execute(req, fresh)
+
+        if memo_key is not None:
+            self.memo.store(memo_key, api_result)
+        elif getattr(self.handler[req.version], 'remote', False):
+            # Requests changing data invalidate the responses memoized.
+            self.memo.clear()
+
+        return api_result
+
+    def _execute(self, req, fresh=False):
+        """Request the operation, or serve it from the response cache."""
         # Simplify variables to pass to handler.
-        final_endpoint = str(self.req.endpoint + self.req.inline_query +
-                             self.req.param)
-        version = self.req.version
-        end_k = self.req.endpoint_key[0]
-
-        # Call handler execute_api method for the request provided.
-        api_result = self.handler[version].execute_api(self.req.method,
-                                                       final_endpoint,
-                                                       endpoint_key=end_k,
-                                                       params=self.req.param,
-                                                       data=self.req.data)
+        final_endpoint = str(req.endpoint + req.inline_query + req.param)
+        version = req.version
+        end_k = req.endpoint_key[0]
+
+        # GET responses can be served from the response cache.
+        if not fresh:
+            api_result = self._load_cached(req)
+            if api_result is not None:
+                return api_result
+
+        # All the pages are requested and merged in one result.
+        if req.get('all_pages') and self._paging_style(req) != '':
+            api_result = merge_pages(list(self.iter_pages(req)))
+        else:
+            # Call handler execute_api method for the request provided.
+            api_result = self.handler[version].execute_api(
+                req.method, final_endpoint, endpoint_key=end_k,
+                params=req.param, data=req.data)
+
+        self._store_cached(req, api_result)
 
         # Return the result of API request.
         return api_result
 
+    def execute_many(self, reqs, concurrency=None):
+        """
+        Request execution of several operations, returns results in order.
+
+        Requests to the target APIs run concurrently, up to concurrency
+        (httpPoolSize by default) at once. Operations of the rbkcli, cmdlets
+        and scripts handlers run one at a time, before the API requests.
+        Identical GET requests are only sent once.
+        """
+        if concurrency is None:
+            concurrency = int(conf_number('httpPoolSize', 4))
+
+        results = [None] * len(reqs)
+        jobs = []
+        positions = []
+        flights = {}
+        duplicates = {}
+        for position, req in enumerate(reqs):
+            handler = self.handler[req.version]
+            if not getattr(handler, 'remote', False) or req.get('all_pages'):
+                results[position] = self.execute(req)
+                continue
+
+            memo_key = self._memo_key(req)
+            if memo_key in flights:
+                duplicates[position] = flights[memo_key]
+                continue
+            if memo_key is not None:
+                results[position] = self.memo.lookup(memo_key)
+            if results[position] is None:
+                results[position] = self._load_cached(req)
+                if results[position] is not None and memo_key is not None:
+                    self.memo.store(memo_key, results[position])
+            if results[position] is not None:
+                continue
+
+            if memo_key is not None:
+                flights[memo_key] = position
+            final_endpoint = str(req.endpoint + req.inline_query + req.param)
+            jobs.append(handler.request_job(req.method, final_endpoint,
+                                            req.endpoint_key[0], req.data))
+            positions.append(position)
+
+        for position, result in zip(positions,
+                                    execute_many(jobs, concurrency)):
+            results[position] = result
+            self._store_cached(reqs[position], result)
+            memo_key = self._memo_key(reqs[position])
+            if memo_key is None:
+                self.memo.clear()
+            else:
+                self.memo.store(memo_key, result)
+
+        # Duplicates get the response itself, with its headers and url.
+        for position, original in duplicates.items():
+            results[position] = results[original]
+
+        return results
+
+    def _memo_key(self, req):
+        """Return the memo key of GET requests to the target, or None."""
+        if (req.method.lower() != 'get' or
+                not getattr(self.handler[req.version], 'remote', False)):
+            return None
+        key = self._request_name(req)
+        if req.get('all_pages'):
+            key = key + ' --all-pages'
+        return key
+
+    @staticmethod
+    def _request_name(req):
+        """Return the version, endpoint and query of the request."""
+        return '%s:/%s%s' % (req.version, req.endpoint, req.inline_query +
+                             req.param)
+
+    def _cache_ttl(self, req):
+        """
+        Return the seconds the response of the request can be cached.
+
+        Only GET requests to the target are cached, with the TTL of
+        --cache-ttl or the cacheTtl of the endpoint when responseCache is
+        enabled. Returns 0 if the request is not cached (--no-cache).
+        """
+        if (req.get('no_cache') or req.method.lower() != 'get' or
+                not getattr(self.handler[req.version], 'remote', False)):
+            return 0
+        if req.get('cache_ttl') is not None:
+            return max(0, req.cache_ttl)
+        if CONFIG_PROVIDER.value('responseCache', 'False') != 'True':
+            return 0
+        return endpoint_ttl(CONFIG_PROVIDER.value('cacheTtl', {}),
+                            req.endpoint_matched)
+
+    def _cache_key(self, req):
+        """Return the response cache key of the request."""
+        final_endpoint = str(req.endpoint + req.inline_query + req.param)
+        return ResponseCache.key(self.user_profile, req.version,
+                                 final_endpoint, req.get('all_pages'))
+
+    def _load_cached(self, req):
+        """Return the cached response of the request, or None."""
+        ttl = self._cache_ttl(req)
+        if ttl == 0 or req.get('refresh'):
+            return None
+        return self._response_cache().load(self._cache_key(req), ttl)
+
+    def _store_cached(self, req, api_result):
+        """Store the response of the request, if it can be cached."""
+        if self._cache_ttl(req) == 0:
+            return
+        budget = conf_number('cacheSize', 50) * 1024 * 1024
+        self._response_cache().store(self._cache_key(req),
+                                     self._request_name(req), api_result,
+                                     budget)
+
+    def _response_cache(self):
+        """Return the response cache of the target, created once."""
+        if self.response_cache is None:
+            self.response_cache = ResponseCache(self.base_kit.target_folder,
+                                                self.rbkcli_logger)
+        return self.response_cache
+
+    def iter_pages(self, req):
+        """
+        Request the operation page by page, yielding each API result.
+
+        Operations that are not paged yield a single result.
+        """
+        self.req = req
+        style = self._paging_style(req)
+        if style == '':
+            yield self.execute(req)
+            return
+
+        final_endpoint = str(req.endpoint + req.inline_query + req.param)
+        handler = self.handler[req.version]
+        for result in handler.paginate(req.method, final_endpoint,
+                                       req.endpoint_key[0], req.data, style):
+            yield result
+
+    def stream(self, req, write):
+        """
+        Request all the pages of the operation, writing them as they arrive.
+
+        The text written is the merged result, only the page being written is
+        kept in memory. Returns the result of the operation to be output
+        after it: the end of the merged result, a failed page, or the whole
+        result if it is not paged (or served from the response cache).
+        """
+        self.req = req
+        api_result = self._load_cached(req)
+        if api_result is not None:
+            return api_result
+        if self._paging_style(req) == '':
+            return self.execute(req)
+
+        # Streamed results are not memoized or cached, they are not kept.
+        return stream_pages(self.iter_pages(req), write)
+
+    def _paging_style(self, req):
+        """Return the paging style of the requested operation, or ''."""
+        handler = self.handler[req.version]
+        if not hasattr(handler, 'paging_style'):
+            return ''
+        return handler.paging_style(req.endpoint_matched, req.method)
+
     @RbkcliResponse.successfull_response
     def documentation(self, req):
         """Request execution of documentation to ApiHandler."""
         # Attribute request dictionary.
         self.req = req
 
-        # Retrieving the documentation information from API handler.
-        endpoint_paths = self.handler[self.req.version].endpoints['paths']
-        doc_result = endpoint_paths[self.req.endpoint_matched][self.req.method]
-
-        # Instantiating json_ops object.
-        my_json = self.json_ops(doc_result)
-        definitions = self.handler[self.req.version].endpoints['definitions']
-
-        # Using json ops to resolve references in the documentation.
-        doc_result = my_json.resolve_ref(definitions, doc_result)
-
-        # Generating a result dictionary
-        api = '/%s%s -%s' % (self.req.version, self.req.endpoint_matched,
-                             self.req.method)
-        result = {
-            'request': api,
-            'doc': doc_result
-        }
-
-        return self.tools.json_dump(result)
+        return self._resolve_doc()['text']
 
     @RbkcliResponse.successfull_response
     def information(self, req):
@@ -236,20 +488,45 @@ class OperationsHandler(ApiTargetTools):
         # Attribute request dictionary.
         self.req = req
 
+        return self._gen_info_output(self._resolve_doc()['doc'])
+
+    def _resolve_doc(self):
+        """Resolve the documentation of the request, once per process."""
+        key = (self.req.version, self.req.endpoint_matched, self.req.method)
+        endpoints = self.handler[self.req.version].endpoints
+
+        # Reuse the resolved doc while the handler keeps the same endpoints.
+        resolved = self.resolved_docs.get(key)
+        if resolved is not None and resolved['endpoints'] is endpoints:
+            return resolved
+
         # Retrieving the documentation information from API handler.
-        endpoint_paths = self.handler[self.req.version].endpoints['paths']
+        endpoint_paths = endpoints['paths']
         doc_result = endpoint_paths[self.req.endpoint_matched][self.req.method]
 
         # Instantiating json_ops object.
         my_json = self.json_ops(doc_result)
-        definitions = self.handler[self.req.version].endpoints['definitions']
+        definitions = endpoints['definitions']
 
         # Using json ops to resolve references in the documentation.
         doc_result = my_json.resolve_ref(definitions, doc_result)
 
         # Generating a result dictionary
+        api = '/%s%s -%s' % (self.req.version, self.req.endpoint_matched,
+                             self.req.method)
+        result = {
+            'request': api,
+            'doc': doc_result
+        }
+
+        resolved = {
+            'endpoints': endpoints,
+            'doc': doc_result,
+            'text': self.tools.json_dump(result)
+        }
+        self.resolved_docs[key] = resolved
 
-        return self._gen_info_output(doc_result)
+        return resolved
 
     def _gen_info_output(self, doc_result):
         """Create the information output for the CLI."""
@@ -320,3 +597,110 @@ class OperationsHandler(ApiTargetTools):
                      'endpoints for user profile: [' + self.user_profile + ']')
             self.rbkcli_logger.error(msg)
             raise
+
+
+def merge_pages(results):
+    """Merge the data of the paged results into the first result."""
+    first = results[0]
+    try:
+        merged = json.loads(first.text)
+        for result in results[1:]:
+            if not 200 <= result.status_code < 300:
+                # Failed page, return the error instead of partial data.
+                return result
+            merged['data'] = merged['data'] + json.loads(result.text)['data']
+    except (ValueError, KeyError, TypeError):
+        return results[-1]
+
+    if 'hasMore' in merged:
+        merged['hasMore'] = False
+    merged.pop('nextCursor', None)
+
+    return DotDict({
+        'text': json.dumps(merged),
+        'status_code': first.status_code
+    })
+
+
+def stream_pages(results, write):
+    """
+    Write the merged data of the paged results (a generator), page by page.
+
+    The text written, followed by the text returned, is the result
+    merge_pages would return, indented. Returns the first page if it has no
+    data to merge, or the failed page after the data already written.
+    """
+    try:
+        first = next(results)
+        try:
+            merged = json.loads(first.text)
+            data = merged['data']
+        except (ValueError, KeyError, TypeError):
+            return first
+        if not isinstance(data, list):
+            return first
+
+        if 'hasMore' in merged:
+            merged['hasMore'] = False
+        merged.pop('nextCursor', None)
+
+        # Split the merged result where its data goes.
+        marker = '\x00data\x00'
+        merged['data'] = marker
+        head, tail = json.dumps(merged, indent=2).split(json.dumps(marker), 1)
+
+        write(head + '[')
+        written = write_items(data, 0, write)
+        for result in results:
+            if not 200 <= result.status_code < 300:
+                # Failed page, the error follows the data already written.
+                return result
+            try:
+                data = json.loads(result.text)['data']
+            except (ValueError, KeyError, TypeError):
+                return result
+            written = write_items(data, written, write)
+    finally:
+        # Stopped early, the next page is not requested.
+        results.close()
+
+    if written > 0:
+        tail = '\n  ]' + tail
+    else:
+        tail = ']' + tail
+
+    return DotDict({
+        'text': tail,
+        'status_code': first.status_code
+    })
+
+
+def write_items(data, written, write):
+    """Write the items of the merged data, returns the amount written."""
+    for item in data:
+        if written > 0:
+            write(',')
+        write('\n    ' + json.dumps(item, indent=2).replace('\n', '\n    '))
+        written = written + 1
+    return written
+
+
+def prefetch_api_docs(handlers, docs_folder, doc_loader=None):
+    """
+    Download the documentation of the remote API handlers in parallel.
+
+    Documentation not modified since it was downloaded is returned by the
+    doc_loader, if already imported, instead of being parsed again.
+    """
+    remote = [handler for handler in handlers
+              if getattr(handler, 'remote', False)]
+    for handler in remote:
+        handler.docs_folder = docs_folder
+        handler.doc_loader = doc_loader
+    if len(remote) < 2:
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=len(remote)) as executor:
+        for _ in executor.map(lambda handler: handler.import_api(), remote):
+            pass
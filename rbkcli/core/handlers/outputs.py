@@ -51,7 +51,8 @@ class OutputHandler(ApiTargetTools):
     def _is_response_documented(self):
         """Validate if json response is documented and can be used."""
         # Try to load as json, if possible create json output.
-        json_document = json.loads(self.req.documentation_objct)
+        documentation = self.operations.documentation(self.req).text
+        json_document = json.loads(documentation)
 
         self.json_iter = MapResponseDoc(json_data=json_document)
         self.json_iter.iterit()
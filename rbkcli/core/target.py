@@ -27,6 +27,8 @@ class ApiTarget(RbkcliBase):
         # req is a dict created from te raw input of API request.
         self.req = {}
         self.ini_req = {}
+        self.last_req = {}
+        self.last_text = ''
 
         # Set workflow to instance variable
         # Load the API target from tools.
@@ -95,8 +97,27 @@ class ApiTarget(RbkcliBase):
         # Once input is normalize pass it on to request the operation.
         return self.operations.information(self.req)
 
-    def command(self, **kwargs):
-        """Call the information method for the provided request."""
+    def command(self, stream=None, **kwargs):
+        """
+        Call the information method for the provided request.
+
+        If stream is provided, all the pages requested without output
+        arguments are written with it as they arrive, instead of merged.
+        """
+        # GET responses are memoized while the command runs, including its
+        # loops, cmdlets and scripts (which call back the operations).
+        self.operations.memo.start()
+        try:
+            return self._command(stream, **kwargs)
+        finally:
+            self.operations.memo.end()
+
+    def _command(self, stream, **kwargs):
+        """Run the command, validating the request once."""
+        # Start from a clean request, the target might be reused (daemon).
+        self.req = {}
+        self.ini_req = {}
+
         # Generate a dictionary of the data passed for request
         self._gen_req_dict(kwargs)
         result = self.dot_dict()
@@ -114,29 +135,43 @@ class ApiTarget(RbkcliBase):
 
         for key, value in self.req.items():
             self.ini_req[key] = value
-        # Get the documentation string for every API run.
-        self.req.documentation_objct = self.documentation(args=self.req).text
 
-        ## FIX
+        # Validate the request once, all the actions below reuse it.
+        self.req = self.validator.validate(self.ini_req)
 
         # If info requested, only print info.
         if self.req.info:
-            result = self.information(args=self.req)
+            result = self.operations.information(self.req)
         # If documentation requested, only print documentation.
         elif self.req.documentation:
-            result.text = self.req.documentation_objct
+            result.text = self.operations.documentation(self.req).text
         # If available keys requested get the available keys.
         elif self.req.output_workflow != []:
             if '?' in self.req.output_workflow[0]['value']:
                 result.text = self.formatter.available_fields(self.req)
                 self.req.output_workflow.pop(0)
             else:
-                result = self.execute(args=self.req)
+                result = self.operations.execute(self.req)
+        # All the pages are only merged if the output needs the whole result.
+        elif stream is not None and self._streams(self.req):
+            result = self.operations.stream(self.req, stream)
         else:
-            result = self.execute(args=self.req)
+            result = self.operations.execute(self.req)
+
+        # Keep the request and unformatted result, so the output workflow can
+        # be applied again later, without requesting (rbkcli shell).
+        self.last_req = self.dot_dict(self.req)
+        self.last_text = result.text
 
         return self.formatter.outputfy(self.req, result)
 
+    @staticmethod
+    def _streams(req):
+        """Return True if the pages requested can be output as they arrive."""
+        return bool(req.get('all_pages') and not (req.table or req.list or
+                                                  req.pretty_print or
+                                                  req.html))
+
     def _gen_req_dict(self, kwargs):
         """Generate the request dictionary to be passed."""
         # Create the dictionary as a dot ddict for easy access.
@@ -223,6 +258,7 @@ class RubrikCluster(ApiTarget):
             target_resolution.envName = cluster_dict['name']
             target_resolution.id = node['id']
             target_resolution.ip = node['ipAddress']
+            target_resolution.version = cluster_dict.get('version', '')
             resolution_data.append(target_resolution)
             target_resolution = self.dot_dict()
 
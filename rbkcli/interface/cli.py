@@ -3,16 +3,18 @@
 import json
 import re
 import copy
+import sys
 
 from rbkcli.base import RbkcliException
+from rbkcli.base.api import start_deadline
 from rbkcli.base.essentials import DotDict
-from rbkcli.core.target import RbkcliTarget
 
 
 class Rbkcli():
     """Class that provides the connection from any CLI to the Rbkcli."""
 
-    def __init__(self, user_profile='config', base_folder='', auth=None):
+    def __init__(self, user_profile='config', base_folder='', auth=None,
+                 keep_targets=False):
         """Initialize CLI helper."""
         # Instantiate CLI target
         self.ops = []
@@ -26,56 +28,68 @@ class Rbkcli():
         self.ctx.base_folder = base_folder
         self.auth = auth
 
+        # Warm targets per auth, kept by long running processes (daemon).
+        self.keep_targets = keep_targets
+        self.targets = {}
+
+        # Pages requested with --all-pages are written as they arrive, unless
+        # the whole result is kept (rbkcli shell).
+        self.stream_pages = True
+
     def provide_autocomplete(self, ctx, args, incomplete):
         """Provide the autocomplete functionality, with click standard fn.."""
         # Getting list of operations with and without version attached to it.
         self.ctx.workflow = 'complete'
-        self.rbk_target = RbkcliTarget(self.ctx, auth=self.auth)
+        self.rbk_target = self._new_target()
         if self.rbk_target.target.operations == []:
             return []
-        self._normalize_ops()
-        self.args = args
-        self.incomplete = incomplete
-        api_vs = self.rbk_target.target.operations.instantiated_api_versions
 
-        # Dividing the workflow between empty args and not empty.
-        if args != []:
-            if args[0] in api_vs:
-                comp = self._selective_autocomplete_without_version(self.ops_v)
-            else:
-                comp = self._selective_autocomplete_without_version(self.ops)
-        else:
-            comp = self._full_autocomplete_without_version(self.ops)
-        
         # Return auto complete process.
         del ctx
-        return comp
+        return self.complete_endpoint(args, incomplete)
 
     def provide_autocomplete_argparse(self, **ctx):
         """Provide the autocomplete functionality, with click standard fn.."""
+        # Read the completion index of the target, without building it.
+        try:
+            from rbkcli.core.handlers.completion import complete_from_index
+            comp = complete_from_index(ctx['parsed_args'], ctx['prefix'],
+                                       self.ctx.user_profile)
+            if comp is not None:
+                return comp
+        except Exception:
+            pass
+
         # Getting list of operations with and without version attached to it.
         self.ctx.workflow = 'complete'
         self.ctx.parser = ''
-        self.rbk_target = RbkcliTarget(self.ctx, auth=self.auth)
+        self.rbk_target = self._new_target()
         if self.rbk_target.target.operations == []:
             return []
+        args = vars(ctx['parsed_args'])['api_endpoint']
+
+        # Return auto complete process.
+        return self.complete_endpoint(args, ctx['prefix'])
+
+    def complete_endpoint(self, args, incomplete):
+        """Complete the endpoint provided with the loaded target ops."""
+        self.ops = []
+        self.ops_v = []
         self._normalize_ops()
-        self.args = vars(ctx['parsed_args'])
-        self.args = self.args['api_endpoint']
-        self.incomplete = ctx['prefix']
+        self.args = args
+        self.incomplete = incomplete
 
         api_vs = self.rbk_target.target.operations.instantiated_api_versions
 
         # Dividing the workflow between empty args and not empty.
-        if self.args is not None:
+        if self.args:
             if self.args[0] in api_vs:
                 comp = self._selective_autocomplete_without_version(self.ops_v)
             else:
                 comp = self._selective_autocomplete_without_version(self.ops)
         else:
             comp = self._full_autocomplete_without_version(self.ops)
-        # Return auto complete process.
-        del ctx
+
         return comp
 
     def _normalize_ops(self):
@@ -245,17 +259,59 @@ class Rbkcli():
         -execute() # For API requests
         -info() # For summarized info about the provided API
         """
-        self.ctx.workflow = 'command'
-        parser.create_request_structure = self._create_request_structure
-        self.ctx.parser = parser
-        self.rbk_target = RbkcliTarget(self.ctx, auth=self.auth)
+        # Every request of the command (loops and scripts) shares it.
+        start_deadline()
+        self.prepare_target(parser)
 
         ## FIX
         kwargs = self._create_request_structure(kwargs, raw_args)
-        self.result = self.rbk_target.target.command(args=kwargs)
+        stream = None
+        if self.stream_pages:
+            stream = self._write
+        self.result = self.rbk_target.target.command(stream=stream,
+                                                     args=kwargs)
 
         return self.format_response()
 
+    @staticmethod
+    def _write(text):
+        """Write part of the output, before the command returns."""
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def prepare_target(self, parser):
+        """Load the target that will run commands parsed by the parser."""
+        self.ctx.workflow = 'command'
+        parser.create_request_structure = self._create_request_structure
+        self.ctx.parser = parser
+        self.rbk_target = self._load_target()
+
+        return self.rbk_target
+
+    def _load_target(self):
+        """Instantiate the target, reusing a warm one if targets are kept."""
+        if not self.keep_targets:
+            return self._new_target()
+
+        key = json.dumps([self.ctx.user_profile, self.auth], sort_keys=True)
+        if key in self.targets:
+            rbk_target, fingerprint = self.targets[key]
+            environment = rbk_target.target.environment
+            # Files changed on disk (sync, config), the target is reloaded.
+            if environment._gen_index_fingerprint() == fingerprint:
+                return rbk_target
+
+        rbk_target = self._new_target()
+        fingerprint = rbk_target.target.environment._gen_index_fingerprint()
+        self.targets[key] = (rbk_target, fingerprint)
+
+        return rbk_target
+
+    def _new_target(self):
+        """Instantiate the target, the core is only loaded when needed."""
+        from rbkcli.core.target import RbkcliTarget
+        return RbkcliTarget(self.ctx, auth=self.auth)
+
     def format_response(self):
         """
         Format the output of the API command.
@@ -0,0 +1,386 @@
+"""Daemon module for rbkcli, keeps targets warm between commands."""
+from __future__ import print_function
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+
+# Paths are built here instead of importing CONSTANTS, so the client side of
+# this module does not load the rbkcli base package.
+RUN_FOLDER = os.path.expanduser('~/rbkcli/run')
+SOCKET_FILE = RUN_FOLDER + '/rbkcli.sock'
+
+# Environment variables forwarded by the client to the daemon.
+FORWARDED_ENV = ['rubrik_cdm_node_ip',
+                 'rubrik_cdm_username',
+                 'rubrik_cdm_password',
+                 'rubrik_cdm_token']
+
+
+class DaemonStream():
+    """File like object that streams written data to the daemon client."""
+
+    def __init__(self, conn, name):
+        """Initialize the stream with the client connection."""
+        self.conn = conn
+        self.name = name
+
+    def write(self, data):
+        """Send the data written to the client."""
+        if data:
+            send_message(self.conn, {'stream': self.name, 'data': data})
+        return len(data)
+
+    def flush(self):
+        """Nothing is buffered, provided for compatibility."""
+
+    def isatty(self):
+        """Output is never a terminal on the daemon side."""
+        return False
+
+
+class RbkcliDaemon():
+    """
+    Serve rbkcli commands received over a Unix domain socket.
+
+    The daemon keeps the CLI targets (environment, handlers and operations)
+    loaded per cluster, so commands sent by the client only pay the cost of
+    the request itself.
+
+    Commands run one at a time in a worker thread, while the main thread
+    keeps accepting connections. If a command is already running, other
+    clients are told to run their command in process instead of waiting
+    for it (a long report would otherwise block every cron job). As only
+    one command runs at a time, the process state it changes (working
+    directory, environment, output streams and command deadline) belongs
+    to that command, and is restored once it finishes.
+    """
+
+    def __init__(self):
+        """Initialize the daemon and its warm CLI."""
+        # Loaded here, only the daemon process needs the full CLI.
+        from rbkcli.base import RbkcliLogger, RbkcliTools, CONSTANTS
+        from rbkcli.interface import rbk_cli
+
+        self.rbk_cli = rbk_cli
+        self.rbk_cli.load_rbk()
+        self.rbk_cli.RBK.keep_targets = True
+        self.cli = self.rbk_cli.RbkCli()
+
+        self.logger = RbkcliLogger(CONSTANTS.LOGS_FOLDER + '/rbkcli.log',
+                                   'daemon')
+        self.tools_class = RbkcliTools
+        self.server = None
+        self.running = False
+        # Held by the worker while a command runs. The command swaps the
+        # process wide sys.stdout/sys.stderr, working directory, environment
+        # and deadline from the worker thread, which is only safe because
+        # this lock lets one command run at a time: never run two commands
+        # concurrently without making that state per command first. The
+        # main thread only accepts connections and writes to the sockets.
+        self.busy = threading.Lock()
+        self.worker = None
+
+    def serve(self):
+        """Listen on the socket and serve commands until stopped."""
+        if not os.path.isdir(RUN_FOLDER):
+            os.makedirs(RUN_FOLDER)
+        os.chmod(RUN_FOLDER, 0o700)
+        if os.path.exists(SOCKET_FILE):
+            os.remove(SOCKET_FILE)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(SOCKET_FILE)
+        os.chmod(SOCKET_FILE, 0o600)
+        self.server.listen(16)
+        self.running = True
+        self.logger.info('Daemon # Serving rbkcli commands on [%s], pid [%s]',
+                         SOCKET_FILE, os.getpid())
+
+        # Prompts can not reach the client, make them fail instead of hang.
+        sys.stdin = open(os.devnull, 'r')
+
+        try:
+            while self.running:
+                conn, _ = self.server.accept()
+                self._dispatch(conn)
+        finally:
+            # The running command is completed before stopping.
+            if self.worker is not None:
+                self.worker.join()
+            self.server.close()
+            if os.path.exists(SOCKET_FILE):
+                os.remove(SOCKET_FILE)
+            self.logger.info('Daemon # Stopped serving rbkcli commands.')
+
+    def _dispatch(self, conn):
+        """Read one message from the client and act on it."""
+        try:
+            request = receive_message(conn)
+            action = request.get('action', 'command')
+
+            if action == 'status':
+                send_message(conn, {'pid': os.getpid(),
+                                    'targets': len(self.rbk_cli.RBK.targets),
+                                    'busy': self.busy.locked()})
+            elif action == 'stop':
+                self.running = False
+                send_message(conn, {'exit': 0})
+            elif not self.busy.acquire(False):
+                send_message(conn, {'fallback': 'daemon busy'})
+            else:
+                # The connection is closed by the worker.
+                self.worker = threading.Thread(target=self._serve_command,
+                                               args=(conn, request),
+                                               name='DaemonCommand')
+                self.worker.daemon = True
+                self.worker.start()
+                return
+        except (OSError, ValueError) as error:
+            self.logger.error('DaemonError # %s', error)
+        conn.close()
+
+    def _serve_command(self, conn, request):
+        """Run the command in the worker thread and reply its status."""
+        try:
+            send_message(conn, self._command(conn, request))
+        except (OSError, ValueError) as error:
+            self.logger.error('DaemonError # %s', error)
+        finally:
+            conn.close()
+            self.busy.release()
+
+    def _command(self, conn, request):
+        """Execute the command in the client context, returns exit status."""
+        with client_context(request):
+            return self._run_command(conn, request)
+
+    def _run_command(self, conn, request):
+        """
+        Execute the command, with its output streamed to the client.
+
+        Only called with self.busy held, the output streams are swapped for
+        the whole process.
+        """
+        # Only serve commands that can authenticate without prompting.
+        auth = self._load_auth()
+        credentials = set(['-C', '--credentials']) & set(request['argv'])
+        if not credentials and not self._is_auth_complete(auth):
+            return {'fallback': 'incomplete authentication'}
+
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = DaemonStream(conn, 'out')
+        sys.stderr = DaemonStream(conn, 'err')
+        exit_code = 0
+        try:
+            self.rbk_cli.RBK.auth = auth
+            print(self.cli.execute(request['argv']))
+        except SystemExit as error:
+            exit_code = error.code
+            if exit_code is None:
+                exit_code = 0
+            elif not isinstance(exit_code, int):
+                print(exit_code, file=sys.stderr)
+                exit_code = 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+        return {'exit': exit_code}
+
+    def _load_auth(self):
+        """Load the authentication, as the in process command would."""
+        tools = self.tools_class(self.logger, workflow='daemon')
+        try:
+            tools.load_conf_file()
+            auth = tools.load_auth()
+        except Exception:
+            return {}
+        return dict(auth)
+
+    @staticmethod
+    def _is_auth_complete(auth):
+        """Verify if the auth is usable without user input."""
+        if auth.get('server', '') == '':
+            return False
+        if auth.get('token', '') != '':
+            return True
+        return (auth.get('username', '') != '' and
+                auth.get('password', '') != '')
+
+
+@contextmanager
+def client_context(request):
+    """
+    Apply the directory and environment of the client, then restore them.
+
+    The command deadline is cleared as well, so it does not outlive the
+    command that started it.
+    """
+    # Only the daemon process runs commands, the client does not load it.
+    from rbkcli.base.api import DEADLINE
+
+    cwd = os.getcwd()
+    env = dict((key, os.environ[key]) for key in FORWARDED_ENV
+               if key in os.environ)
+
+    os.chdir(request['cwd'])
+    for key in FORWARDED_ENV:
+        os.environ.pop(key, None)
+    os.environ.update(request['env'])
+    try:
+        yield
+    finally:
+        DEADLINE.update({'time': 0, 'seconds': 0})
+        os.chdir(cwd)
+        for key in FORWARDED_ENV:
+            os.environ.pop(key, None)
+        os.environ.update(env)
+
+
+def send_message(conn, message):
+    """Send one json message, delimited by a new line."""
+    conn.sendall((json.dumps(message) + '\n').encode('utf-8'))
+
+
+def receive_message(conn, reader=None):
+    """Receive one json message, delimited by a new line."""
+    if reader is None:
+        reader = conn.makefile('rb')
+    line = reader.readline()
+    if not line:
+        raise ValueError('Connection closed without message.')
+    return json.loads(line.decode('utf-8'))
+
+
+def connect():
+    """Connect to the daemon socket, returns None if not available."""
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(SOCKET_FILE):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(SOCKET_FILE)
+    except (OSError, socket.error):
+        conn.close()
+        return None
+    return conn
+
+
+def forward(arg_list):
+    """
+    Forward the command to the daemon and stream its output back.
+
+    Returns the exit code of the command, or None when the daemon is not
+    running or can not serve the command, so it has to run in process.
+    """
+    conn = connect()
+    if conn is None:
+        return None
+
+    env = {}
+    for key in FORWARDED_ENV:
+        if key in os.environ:
+            env[key] = os.environ[key]
+    request = {
+        'action': 'command',
+        'argv': arg_list,
+        'cwd': os.getcwd(),
+        'env': env
+    }
+
+    try:
+        send_message(conn, request)
+    except (OSError, socket.error):
+        conn.close()
+        return None
+
+    # Once the command was sent it might have run, so it is never repeated.
+    try:
+        reader = conn.makefile('rb')
+        while True:
+            message = receive_message(conn, reader)
+            if 'stream' in message:
+                stream = sys.stderr
+                if message['stream'] == 'out':
+                    stream = sys.stdout
+                stream.write(message['data'])
+                stream.flush()
+            elif 'fallback' in message:
+                return None
+            else:
+                return message['exit']
+    except (OSError, ValueError, socket.error) as error:
+        sys.stderr.write('DaemonError # Lost connection to rbkcli daemon '
+                         '[%s].\n' % error)
+        return 1
+    finally:
+        conn.close()
+
+
+def request_action(action):
+    """Send a control action to the daemon, returns its reply or None."""
+    conn = connect()
+    if conn is None:
+        return None
+    try:
+        send_message(conn, {'action': action})
+        return receive_message(conn)
+    except (OSError, ValueError, socket.error):
+        return None
+    finally:
+        conn.close()
+
+
+def start():
+    """Start the daemon as a detached background process."""
+    if request_action('status') is not None:
+        print('Daemon # rbkcli daemon is already running.')
+        return 0
+    with open(os.devnull, 'r+') as devnull:
+        subprocess.Popen([sys.executable, '-m', 'rbkcli.interface.daemon',
+                          'run'],
+                         stdin=devnull, stdout=devnull, stderr=devnull,
+                         close_fds=True, start_new_session=True)
+    print('Daemon # Started rbkcli daemon, listening on [%s].' % SOCKET_FILE)
+    return 0
+
+
+def main():
+    """Manage the rbkcli daemon: start, stop, status or run."""
+    usage = 'Usage: rbkcli-daemon start|stop|status|run'
+    if len(sys.argv) != 2:
+        print(usage)
+        sys.exit(2)
+
+    action = sys.argv[1]
+    if action == 'start':
+        sys.exit(start())
+    elif action == 'run':
+        RbkcliDaemon().serve()
+    elif action == 'stop':
+        if request_action('stop') is None:
+            print('Daemon # rbkcli daemon is not running.')
+            sys.exit(1)
+        print('Daemon # Stopped rbkcli daemon.')
+    elif action == 'status':
+        status = request_action('status')
+        if status is None:
+            print('Daemon # rbkcli daemon is not running.')
+            sys.exit(1)
+        print('Daemon # rbkcli daemon is running, pid [%s], warm targets '
+              '[%s], running a command [%s].' %
+              (status['pid'], status['targets'], status.get('busy', False)))
+    else:
+        print(usage)
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
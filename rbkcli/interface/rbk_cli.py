@@ -1,23 +1,32 @@
 """Command Line Interface module with autocomplete."""
 from __future__ import print_function
 
+import os
 import sys
 import argparse
-import argcomplete
 
-from rbkcli.base.essentials import RbkcliException
-from rbkcli.interface.cli import Rbkcli
 
+# Global target for the CLI, only instantiated when a command is run in
+# process, so forwarding commands to the daemon does not load the CLI.
+RBK = None
 
-# Instantiating the target for the CLI as global var.
-try:
-    RBK = Rbkcli()
-except RbkcliException.ApiRequesterError as error:
-    print('ImportApis # ' + str(error))
-    exit()
-except KeyboardInterrupt:
-    print('\nUserError # Operation Aborted!\n')
-    exit()
+
+def load_rbk(auth=None):
+    """Instantiate the target for the CLI as global var."""
+    global RBK
+    from rbkcli.base.essentials import RbkcliException
+    from rbkcli.interface.cli import Rbkcli
+
+    try:
+        RBK = Rbkcli(auth=auth)
+    except RbkcliException.ApiRequesterError as error:
+        print('ImportApis # ' + str(error))
+        exit()
+    except KeyboardInterrupt:
+        print('\nUserError # Operation Aborted!\n')
+        exit()
+
+    return RBK
 
 
 class CustomizedHelpFormatter(argparse.HelpFormatter):
@@ -73,11 +82,10 @@ class CustomParser(argparse.ArgumentParser):
 class RbkCli():
     def __init__(self, auth=None):
         # Definninf the CLI.
-        global RBK
+        if RBK is None or auth is not None:
+            load_rbk(auth=auth)
         self.operation = self._define_cli()
         self.auth = auth
-        if auth is not None:
-            RBK = Rbkcli(auth=self.auth)
 
     def execute(self, arg_list):
         # Parsing the CLI.
@@ -94,13 +102,13 @@ class RbkCli():
         self.operation.un_list = self._un_list
 
         self._auth_parameters()
+        from rbkcli.base.essentials import RbkcliException
         try:
             return self._execute(self.args_dict, self.arg_list, self.operation)
         except RbkcliException as msg:
             self.operation.general_error(str(msg))
 
     def _auth_parameters(self, ):
-        global RBK
         if self.args_dict['credentials'] is not None:
             creds = self.args_dict['credentials'][0][0].split(':')
             if len(creds) == 3:
@@ -119,7 +127,7 @@ class RbkCli():
                 raise self.operation.error('CLI # Wrong Credentials parameter provided. '
                                            'Please provide <node_ip>:<port>:<username>:<password>')
                 exit()
-            RBK = Rbkcli(auth=self.auth)
+            RBK.auth = self.auth
 
     def _define_cli(self):
         prog = 'rbkcli'
@@ -251,6 +259,37 @@ class RbkCli():
                                nargs=2,
                                help=help_msg)
 
+        # Request all the pages of results, instead of only the first one.
+        help_msg = str('Request all the pages of results, if the endpoint is'
+                       ' paged (cursor, after_id or offset). Pages are output'
+                       ' as they arrive, or merged if output arguments are '
+                       'provided.')
+        operation.add_argument('--all-pages',
+                               action='store_true',
+                               help=help_msg)
+
+        # Serve GET requests from the response cache of the target.
+        help_msg = str('Serve GET requests from the response cache if cached'
+                       ' less than the provided seconds ago, otherwise cache'
+                       ' the response.')
+        operation.add_argument('--cache-ttl',
+                               metavar=('<seconds>'),
+                               type=int,
+                               help=help_msg)
+
+        # Ignore the response cache for this request.
+        help_msg = 'Do not read or write the response cache.'
+        operation.add_argument('--no-cache',
+                               action='store_true',
+                               help=help_msg)
+
+        # Request the API and replace the cached response.
+        help_msg = str('Request the API even if the response is cached, and '
+                       'cache the new response.')
+        operation.add_argument('--refresh',
+                               action='store_true',
+                               help=help_msg)
+
         # Loop resulting json values into another API request.
         help_msg = 'Pass credentials as arguments to run the agains.'
         operation.add_argument('-C',
@@ -289,7 +328,10 @@ class RbkCli():
                                action='store_true',
                                help=help_msg)
 
-        argcomplete.autocomplete(operation)
+        # Only load argcomplete when the shell is requesting completion.
+        if '_ARGCOMPLETE' in os.environ:
+            import argcomplete
+            argcomplete.autocomplete(operation)
 
         return operation
 
@@ -302,6 +344,7 @@ class RbkCli():
         return args_dict
 
     def _execute(self, args_dict, arg_list, operation):
+        from rbkcli.base.essentials import RbkcliException
         try:
             return RBK.cli_execute(args_dict, arg_list, operation)
         except RbkcliException.ApiRequesterError as error:
@@ -328,6 +371,21 @@ def main():
     """Gather args and call cli function."""
     # Getting provided arguments
     arg_list = sys.argv[1:]
+
+    # Interactive shell, runs in process with a single authentication.
+    if arg_list == ['shell']:
+        from rbkcli.interface import shell
+        shell.run()
+        return
+
+    # Try the daemon first, if running, and fall back to run in process.
+    # Completion is always resolved in process.
+    if '_ARGCOMPLETE' not in os.environ:
+        from rbkcli.interface import daemon
+        exit_code = daemon.forward(arg_list)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
     rbk_cli = RbkCli()
     print(rbk_cli.execute(arg_list))
 
@@ -0,0 +1,177 @@
+"""Interactive shell module for rbkcli."""
+from __future__ import print_function
+
+import cmd
+import shlex
+
+from rbkcli.base.essentials import DotDict
+from rbkcli.interface import rbk_cli
+
+
+class RbkcliShell(cmd.Cmd):
+    """
+    Interactive rbkcli shell, with a single authentication.
+
+    Every line is parsed with the same arguments as the rbkcli command and
+    executed with one warm target, which is only loaded (and authenticated)
+    once per session. The unformatted result of each command is stored as a
+    session variable ($1, $2, ... and $_ for the last one), which accepts
+    the output arguments (-s, -f, -c, -l, -T, ...) without requesting the
+    API again:
+        rbkcli:1> vmware vm
+        rbkcli:2> $1 -s name,id -T
+        rbkcli:3> $1 -l id "/vmware/vm/{id}/snapshot"
+    """
+
+    intro = str('Interactive rbkcli shell, results are stored as $<number> '
+                'and $_.\nType "help" for arguments, "$" to list results and '
+                '"exit" to leave.')
+
+    def __init__(self):
+        """Initialize the shell with the CLI parser and a warm target."""
+        cmd.Cmd.__init__(self)
+        self.cli = rbk_cli.RbkCli()
+        self.rbk = rbk_cli.RBK
+        self.rbk.keep_targets = True
+        # Results are kept to be formatted again, pages are merged.
+        self.rbk.stream_pages = False
+        self.auth = self.rbk.auth
+        self.results = []
+
+        # Load and authenticate the target once, also used for completion.
+        self.rbk.prepare_target(self.cli.operation)
+        self._update_prompt()
+
+    def preloop(self):
+        """Complete whole segments, such as {id}, when readline is used."""
+        try:
+            import readline
+            readline.set_completer_delims(' \t\n')
+        except ImportError:
+            pass
+
+    def _update_prompt(self):
+        """Show the number the next result will be stored as."""
+        self.prompt = 'rbkcli:%s> ' % (len(self.results) + 1)
+
+    def emptyline(self):
+        """Do nothing, instead of repeating the last command."""
+
+    def default(self, line):
+        """Execute the line as a rbkcli command."""
+        try:
+            args = shlex.split(line)
+        except ValueError as error:
+            print('ArgumentError # ' + str(error))
+            return
+
+        try:
+            if args[0] == '$':
+                self._list_results()
+            elif args[0].startswith('$'):
+                print(self._reformat(args))
+            else:
+                print(self._execute(args))
+        except SystemExit:
+            # Argument and command errors are already printed by the parser.
+            pass
+        except Exception as error:
+            # Any other error only interrupts the current line.
+            print('%s # %s' % (type(error).__name__, error))
+
+        self._update_prompt()
+
+    def _execute(self, args):
+        """Run the command with the warm target, store its result."""
+        # Credentials passed with -C are only used by that command.
+        self.rbk.auth = self.auth
+        response = self.cli.execute(args)
+
+        target = self.rbk.rbk_target.target
+        endpoint = self.cli.args_dict['api_endpoint']
+        if isinstance(endpoint, str):
+            endpoint = [endpoint]
+        self.results.append(DotDict({
+            'target': target,
+            'endpoint': endpoint,
+            'req': target.last_req,
+            'text': target.last_text
+        }))
+
+        return response
+
+    def _reformat(self, args):
+        """Apply the output arguments to a stored result."""
+        stored = self._get_result(args[0])
+
+        # Parse the output arguments as if they were in the original command.
+        args = stored.endpoint + args[1:]
+        args_dict = vars(self.cli.operation.parse_args(args))
+        args_dict = self.cli._un_list(args_dict)
+        args_dict = self.rbk._create_request_structure(args_dict, args)
+
+        req = DotDict(stored.req)
+        req.output_workflow = args_dict['output_workflow']
+        for key in ['table', 'list', 'pretty_print', 'html']:
+            req[key] = args_dict[key]
+
+        result = DotDict({'text': stored.text, 'status_code': 200})
+        self.rbk.result = stored.target.formatter.outputfy(req, result)
+
+        return self.rbk.format_response()
+
+    def _get_result(self, variable):
+        """Return the stored result for the provided variable."""
+        if variable == '$_' and self.results != []:
+            return self.results[-1]
+        try:
+            number = int(variable[1:])
+            if number < 1:
+                raise IndexError(variable)
+            return self.results[number - 1]
+        except (ValueError, IndexError):
+            raise KeyError('No result stored as [%s].' % variable)
+
+    def _list_results(self):
+        """Print the stored results and the command that generated them."""
+        for number, stored in enumerate(self.results, 1):
+            print('$%s: %s' % (number, ' '.join(stored.endpoint)))
+
+    def completenames(self, text, *ignored):
+        """Complete the first segment of the endpoint."""
+        return self.rbk.complete_endpoint([], text)
+
+    def completedefault(self, text, line, begidx, endidx):
+        """Complete the following segments of the endpoint."""
+        args = line[:begidx].split()
+        if args == [] or args[0].startswith('$') or args[-1].startswith('-'):
+            return []
+        return self.rbk.complete_endpoint(args, text)
+
+    def do_help(self, arg):
+        """Print the arguments accepted by each command."""
+        self.cli.operation.print_help()
+
+    def do_exit(self, arg):
+        """Leave the shell."""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg):
+        """Leave the shell with Ctrl-D."""
+        print()
+        return True
+
+
+def run():
+    """Run the interactive shell until the user leaves."""
+    shell = RbkcliShell()
+    while True:
+        try:
+            shell.cmdloop()
+            break
+        except KeyboardInterrupt:
+            # Ctrl-C only discards the current line.
+            print('^C')
+            shell.intro = ''
@@ -3,7 +3,7 @@ import os
 from rbkcli import RbkCliBlackOps, RbkcliException
 
 try:
-    from gmailer import Gmailer
+    from .gmailer import Gmailer
 except Exception as error:
     print('Could not import Gmailer libraries. Make sure you have installed'
           ' gmail packages: \n$ pip install google-api-python-client '
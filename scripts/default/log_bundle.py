@@ -86,7 +86,7 @@ class LogBundle(RbkCliBlackOps):
 
         # 3- Verify log generation status:
         job_status = self.rbkcli.call_back('support support_bundle -q id=' +
-                                           log_job_id)
+                                           log_job_id, fresh=True)
 
         # Treat api response as json.
         job_status = json.loads(job_status.text)
@@ -100,9 +100,9 @@ class LogBundle(RbkCliBlackOps):
             # wait the amount of seconds provided.
             sleep(30)
 
-            # Call log generation job API again.
+            # Call log generation job API again, fresh (not memoized).
             job_status = self.rbkcli.call_back('support support_bundle -q id='
-                                               + log_job_id)
+                                               + log_job_id, fresh=True)
 
             # Treat api response as json.
             job_status = json.loads(job_status.text)
@@ -334,27 +334,15 @@ class MissedBackups(RbkCliBlackOps):
             anlys_end_epoch += freq_epoch
 
 
-    def loop_more_results(self, cmd, pager=['id', 'after_id']):
+    def loop_more_results(self, cmd):
         all_results = []
-        more = True
-        new_cmd = cmd
-
-        while more:
-            try:
-                # print('    - fetching new batch of events')
-                result = get_dicted(self.rbkcli.call_back(new_cmd))
-                if 'hasMore' not in result:
-                    break
-                more = result['hasMore']
-                data = result['data']
-                if more:
-                    # Get the id of the last object
-                    last_objct = data[-1][pager[0]]
-                    new_cmd = '%s,%s=%s' % (cmd, pager[1], last_objct)
-                all_results += data
+
+        try:
+            for result in self.rbkcli.iter_pages(cmd):
+                all_results += result.get('data', [])
                 # print('    - fetched batch of events')
-            except KeyboardInterrupt:
-                more = False
+        except KeyboardInterrupt:
+            pass
 
         return all_results
 
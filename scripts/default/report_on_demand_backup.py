@@ -61,30 +61,23 @@ class OnDemandBackups(RbkCliBlackOps):
 
         setit = False
         results = []
-        more = True
-        after_id = ''
         on_d_str = "${onDemandBackupString}"
         end_date = ''
         event_counter = 0
 
-        # Loop through the events and only store on-demand
-        while more:
-            cmd = str('event -q event_type=Backup,limit=%s,'
-                      'after_date=%s' % (parameters['batch_size'],
-                                         parameters['after_date']))
-            if 'before_date' in parameters:
-                cmd += ',before_date=%s' % parameters['before_date']
-                end_date = parameters['before_date']
-                setit = True
+        cmd = str('event -q event_type=Backup,limit=%s,'
+                  'after_date=%s' % (parameters['batch_size'],
+                                     parameters['after_date']))
+        if 'before_date' in parameters:
+            cmd += ',before_date=%s' % parameters['before_date']
+            end_date = parameters['before_date']
+            setit = True
 
-
-            if after_id:
-                cmd += ',after_id=%s' % after_id
-
-            backup_events = get_dicted(self.rbkcli.call_back(cmd))
+        # Loop through the pages of events and only store on-demand, the
+        # next page is fetched while the current one is processed.
+        for backup_events in self.rbkcli.iter_pages(cmd):
 
             try:
-                more = backup_events['hasMore']
                 data = backup_events['data']
             except KeyError:
                 print(json.dumps(backup_events, indent=2))
@@ -127,7 +120,6 @@ class OnDemandBackups(RbkCliBlackOps):
 
                                     results.append(event)
 
-                after_id = backup_events['data'][-1]['id']
                 last_date = backup_events['data'][-1]['time']
                 if not end_date:
                     end_date = convert_current(last_date) + 'Z'
@@ -138,7 +130,7 @@ class OnDemandBackups(RbkCliBlackOps):
                                  setit=setit)
             else:
                 RbkcliException(json.dumps(backup_events, indent=2))
-                more = False
+                break
         
         if not end_date:
             end_date = parameters['after_date']
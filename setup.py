@@ -43,7 +43,8 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type='text/markdown',
     url='https://github.com/rubrikinc/rbkcli',
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=['tests']),
+    python_requires='>=3.7',
     install_requires=[
         'requests',
         'Paramiko',
@@ -61,6 +62,7 @@ setuptools.setup(
     entry_points="""
       [console_scripts]
       rbkcli = rbkcli.interface.rbk_cli:main
+      rbkcli-daemon = rbkcli.interface.daemon:main
       """,
 )
 
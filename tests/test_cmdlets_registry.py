@@ -0,0 +1,61 @@
+"""Cmdlets registry tests for rbkcli."""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from rbkcli.base.tools import RbkcliTools
+from rbkcli.core.handlers.cmdlets import CmdletsRegistry
+
+
+class CmdletsRegistryTest(unittest.TestCase):
+    """Verify duplicated names are resolved in profile order."""
+
+    def setUp(self):
+        """Create the registry and its profiles in a temporary folder."""
+        self.folder = tempfile.mkdtemp()
+        self.registry = CmdletsRegistry(RbkcliTools(logging.getLogger('test')))
+        self.registry.cmdlets_folder = self.folder
+        self.registry.file_path = os.path.join(self.folder, 'registry.json')
+        self._write('b-cmdlets.json', [self._cmdlet('B1', 'report')])
+        self._write('a-cmdlets.json', [])
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.folder)
+
+    def _write(self, file, cmdlets):
+        """Write the cmdlets of the profile."""
+        with open(os.path.join(self.folder, file), 'w') as profile:
+            json.dump(cmdlets, profile)
+
+    @staticmethod
+    def _cmdlet(cmdlet_id, name):
+        """Return a cmdlet with the id and name."""
+        return {'id': cmdlet_id, 'name': name, 'command': ['cluster/me']}
+
+    def _usable_ids(self):
+        """Return the ids of the usable cmdlets."""
+        return sorted(cmdlet['id']
+                      for cmdlet in self.registry.usable_cmdlets())
+
+    def test_add_to_first_profile(self):
+        """A cmdlet added to the first profile takes over the name."""
+        self.registry.add('a-cmdlets.json', self._cmdlet('A1', 'report'))
+        self.assertEqual(self._usable_ids(), ['A1'])
+
+        # Loaded again from disk, the same cmdlet is usable.
+        self.registry.data = None
+        self.assertEqual(self._usable_ids(), ['A1'])
+
+    def test_add_to_last_profile(self):
+        """A cmdlet added to a later profile is duplicated."""
+        self.registry.add('b-cmdlets.json', self._cmdlet('B2', 'report'))
+        self.assertEqual(self._usable_ids(), ['B1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Import budget tests for rbkcli."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Third-party modules only the paths that use them are allowed to import.
+HEAVY_MODULES = ['paramiko', 'yaml', 'jinja2', 'argcomplete', 'requests']
+
+# Importing any heavy module fails, so the check does not depend on which
+# of them are installed.
+CHECK = """
+import sys
+
+HEAVY = %r
+
+class Blocker(object):
+    def find_spec(self, name, path=None, target=None):
+        if name.split('.')[0] in HEAVY:
+            raise ImportError('Heavy module imported: ' + name)
+        return None
+
+    find_module = find_spec
+
+sys.meta_path.insert(0, Blocker())
+import rbkcli.interface.rbk_cli
+loaded = [name for name in HEAVY if name in sys.modules]
+if loaded:
+    raise SystemExit('Heavy modules loaded: %%s' %% loaded)
+"""
+
+
+class ImportBudgetTest(unittest.TestCase):
+    """Verify the CLI entry point does not load third-party modules."""
+
+    def test_cli_import_skips_heavy_modules(self):
+        """Import rbkcli.interface.rbk_cli in a new interpreter."""
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        result = subprocess.run([sys.executable, '-c',
+                                 CHECK % HEAVY_MODULES],
+                                cwd=ROOT, env=env, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT,
+                                universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Logging tests for rbkcli."""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from rbkcli.base.tools import RbkcliLogger
+
+
+class RecordCollector(logging.Handler):
+    """Keep the records handled, instead of writing them."""
+
+    def __init__(self):
+        """Initialize the empty list of records."""
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        """Keep the record."""
+        self.records.append(record)
+
+
+class CallerTest(unittest.TestCase):
+    """Verify records are attributed to the caller of RbkcliLogger."""
+
+    def setUp(self):
+        """Create the logger in a temporary folder."""
+        self.folder = tempfile.mkdtemp()
+        self.logger = RbkcliLogger(os.path.join(self.folder, 'rbkcli.log'),
+                                   'test')
+        self.collector = RecordCollector()
+        self.logger.logger.addHandler(self.collector)
+
+    def tearDown(self):
+        """Remove the collector and the temporary folder."""
+        self.logger.logger.removeHandler(self.collector)
+        shutil.rmtree(self.folder)
+
+    def test_record_module_is_caller(self):
+        """The module of the record is the one calling the logger."""
+        self.logger.error('Test # Caller %s', 'check')
+        record = self.collector.records[-1]
+        self.assertEqual(record.module, 'test_logging')
+        self.assertEqual(record.funcName, 'test_record_module_is_caller')
+        self.assertEqual(record.getMessage(), 'Test # Caller check')
+
+
+if __name__ == '__main__':
+    unittest.main()
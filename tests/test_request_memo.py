@@ -0,0 +1,98 @@
+"""Request memo tests for rbkcli."""
+
+import logging
+import unittest
+
+from rbkcli.base.essentials import DotDict
+from rbkcli.core.handlers.cache import RequestMemo
+from rbkcli.core.handlers.callback import CallBack
+from rbkcli.core.handlers.operations import OperationsHandler
+
+
+class StatusTarget():
+    """Remote API handler whose status changes at every request."""
+
+    remote = True
+
+    def __init__(self):
+        """Initialize the amount of requests received."""
+        self.requests = 0
+
+    def request(self):
+        """Return the next status, as a response of the target."""
+        self.requests = self.requests + 1
+        return DotDict({
+            'text': '{"status": "%s"}' % self.requests,
+            'status_code': 200
+        })
+
+
+class PassThroughValidator():
+    """Validator of requests already validated."""
+
+    @staticmethod
+    def validate(req):
+        """Return the request as it is."""
+        return req
+
+
+class RequestMemoTest(unittest.TestCase):
+    """Verify GET responses are memoized while a command runs."""
+
+    def setUp(self):
+        """Create the operations of a target, without loading APIs."""
+        self.target = StatusTarget()
+        self.operations = OperationsHandler.__new__(OperationsHandler)
+        self.operations.handler = {'v1': self.target}
+        self.operations.memo = RequestMemo(logging.getLogger('test'))
+        self.operations._execute = lambda req, fresh=False: (
+            self.target.request())
+        self.callback = CallBack.__new__(CallBack)
+        self.callback.operations = self.operations
+        self.callback.validator = PassThroughValidator()
+        self.req = DotDict({
+            'structured': True,
+            'method': 'get',
+            'version': 'v1',
+            'endpoint': 'support/support_bundle',
+            'inline_query': '?id=1',
+            'param': ''
+        })
+
+    def test_repeated_get_in_command_is_memoized(self):
+        """A GET repeated by a script of the command is sent once."""
+        with self.operations.memo.run():
+            first = self.callback.callit(self.req)
+            second = self.callback.callit(self.req)
+        self.assertEqual(first, second)
+        self.assertEqual(self.target.requests, 1)
+
+        # The next command starts with a empty memo.
+        with self.operations.memo.run():
+            third = self.callback.callit(self.req)
+        self.assertEqual(third, {'status': '2'})
+
+    def test_fresh_get_reaches_target(self):
+        """A status polled by a script (fresh) is always requested."""
+        with self.operations.memo.run():
+            first = self.callback.callit(self.req)
+            second = self.callback.callit(self.req, fresh=True)
+            third = self.callback.callit(self.req)
+        self.assertEqual(first, {'status': '1'})
+        self.assertEqual(second, {'status': '2'})
+        # The fresh response replaces the memoized one.
+        self.assertEqual(third, {'status': '2'})
+        self.assertEqual(self.target.requests, 2)
+
+    def test_change_drops_memo(self):
+        """A request changing data drops the responses memoized."""
+        change = DotDict(self.req, method='post')
+        with self.operations.memo.run():
+            self.operations.execute(self.req)
+            self.operations.execute(change)
+            last = self.operations.execute(self.req)
+        self.assertEqual(last.text, '{"status": "3"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Script module loading tests for rbkcli."""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from rbkcli.core.handlers.customizer import load_script_module
+
+
+class ScriptModuleTest(unittest.TestCase):
+    """Verify scripts are loaded apart from the importable modules."""
+
+    def setUp(self):
+        """Create the temporary scripts folder."""
+        self.folder = tempfile.mkdtemp()
+        self.path = list(sys.path)
+
+    def tearDown(self):
+        """Remove the temporary scripts folder."""
+        shutil.rmtree(self.folder)
+
+    def _write(self, name, source):
+        """Write the script to the scripts folder, return its path."""
+        file = os.path.join(self.folder, name)
+        if not os.path.isdir(os.path.dirname(file)):
+            os.makedirs(os.path.dirname(file))
+        with open(file, 'w') as script:
+            script.write(source)
+        return file
+
+    def test_script_does_not_shadow_modules(self):
+        """A script named after a module leaves the module importable."""
+        module = load_script_module(self._write('json.py', 'VALUE = 1\n'))
+        self.assertEqual(module.VALUE, 1)
+        self.assertIs(sys.modules['json'], json)
+        self.assertTrue(module.__name__.startswith('rbkcli_scripts.'))
+        self.assertEqual(sys.path, self.path)
+
+    def test_scripts_with_the_same_name(self):
+        """Scripts with the same file name are different modules."""
+        first = load_script_module(self._write('a/report.py', 'VALUE = 1\n'))
+        second = load_script_module(self._write('b/report.py',
+                                                'VALUE = 2\n'))
+        self.assertNotEqual(first.__name__, second.__name__)
+        self.assertEqual((first.VALUE, second.VALUE), (1, 2))
+
+    def test_relative_import(self):
+        """Scripts import the modules next to them relatively."""
+        self._write('helper.py', 'VALUE = 3\n')
+        module = load_script_module(self._write(
+            'script.py', 'from . import helper\nVALUE = helper.VALUE\n'))
+        self.assertEqual(module.VALUE, 3)
+        self.assertNotIn('helper', sys.modules)
+        self.assertEqual(sys.path, self.path)
+
+    def test_absolute_import(self):
+        """Scripts written for previous versions import siblings as well."""
+        self._write('legacy_helper.py', 'VALUE = 4\n')
+        self.addCleanup(sys.modules.pop, 'legacy_helper', None)
+        module = load_script_module(self._write(
+            'legacy.py',
+            'import legacy_helper\nVALUE = legacy_helper.VALUE\n'))
+        self.assertEqual(module.VALUE, 4)
+        self.assertEqual(sys.path, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Streamed pages tests for rbkcli."""
+
+import json
+import unittest
+
+from rbkcli.base.essentials import DotDict
+from rbkcli.core.handlers.operations import merge_pages, stream_pages
+
+
+def page(data, has_more, status_code=200):
+    """Return the API result of a page."""
+    return DotDict({
+        'text': json.dumps({'hasMore': has_more, 'data': data, 'total': 3}),
+        'status_code': status_code
+    })
+
+
+class StreamPagesTest(unittest.TestCase):
+    """Verify pages are written as they arrive, as if merged."""
+
+    def setUp(self):
+        """Collect the text written."""
+        self.written = []
+        self.requested = []
+
+    def _pages(self, pages):
+        """Yield the pages, recording the ones requested."""
+        for result in pages:
+            self.requested.append(result)
+            yield result
+
+    def _stream(self, pages):
+        """Return the text written followed by the result returned."""
+        result = stream_pages(self._pages(pages), self.written.append)
+        return ''.join(self.written), result
+
+    def test_same_as_merged(self):
+        """The output is the indented merged result."""
+        for pages in ([page([{'id': 1}], True), page([], True),
+                       page([{'id': 2, 'tags': ['a']}, {'id': 3}], False)],
+                      [page([], False)]):
+            self.written = []
+            text, result = self._stream(pages)
+            merged = json.dumps(json.loads(merge_pages(pages).text),
+                                indent=2)
+            self.assertEqual(text + result.text, merged)
+
+    def test_failed_page(self):
+        """A failed page stops the stream, and is returned."""
+        failed = DotDict({'text': 'Service Unavailable', 'status_code': 503})
+        text, result = self._stream([page([{'id': 1}], True), failed,
+                                     page([{'id': 2}], False)])
+        self.assertIs(result, failed)
+        self.assertIn('"id": 1', text)
+        self.assertEqual(len(self.requested), 2)
+
+    def test_not_merged(self):
+        """Results without data are returned as they are."""
+        first = DotDict({'text': '{"id": "a"}', 'status_code': 200})
+        text, result = self._stream([first])
+        self.assertEqual((text, result), ('', first))
+
+
+if __name__ == '__main__':
+    unittest.main()
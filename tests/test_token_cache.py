@@ -0,0 +1,53 @@
+"""Session token cache tests for rbkcli."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from rbkcli.base.api import TokenCache
+from rbkcli.base.essentials import DotDict
+
+
+class TokenCacheTest(unittest.TestCase):
+    """Verify cached tokens are bound to the password."""
+
+    def setUp(self):
+        """Create the cache in a temporary folder."""
+        self.folder = tempfile.mkdtemp()
+        self.cache = TokenCache()
+        self.cache.file_path = lambda: os.path.join(self.folder,
+                                                    TokenCache.FILE_NAME)
+        self.key = TokenCache.key(DotDict({'server': '10.0.0.1',
+                                           'username': 'admin',
+                                           'password': 'secret'}))
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.folder)
+
+    def test_password_not_stored(self):
+        """Neither the key nor the entry contain the password."""
+        self.cache.store(self.key, 'T1', 'secret')
+        with open(self.cache.file_path()) as file:
+            content = file.read()
+        self.assertNotIn('secret', content)
+        self.assertIn(self.key, json.loads(content))
+
+    def test_same_password(self):
+        """The token is reused with the password it was acquired with."""
+        self.cache.store(self.key, 'T1', 'secret')
+        self.cache.verified = {}
+        self.assertEqual(self.cache.load(self.key, 'secret'), 'T1')
+
+    def test_other_password(self):
+        """Another password drops the token, to authenticate again."""
+        self.cache.store(self.key, 'T1', 'secret')
+        self.cache.verified = {}
+        self.assertIsNone(self.cache.load(self.key, 'wrong'))
+        self.assertIsNone(self.cache.load(self.key, 'secret'))
+
+
+if __name__ == '__main__':
+    unittest.main()